@@ -0,0 +1,67 @@
+"""
+Benchmark: column-parallel ICU steps 6–9 (data_preparation/column_parallel.py)
+Runs ffill+bfill, median imputation, winsorisation and scaling on a synthetic
+ICU-shaped frame with 1, 2, 4, … worker processes, reports wall time,
+speed-up and parallel efficiency per job count, and checks that every run
+gives exactly the serial result.  Speed-up is bounded by the cores the
+process may use (printed first).
+
+    python benchmarks/bench_column_parallel.py --patients 40000 --jobs 1 2 4 8 16 32
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_imputation import make_frame  # noqa: E402
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_preparation.column_parallel import ColumnRunner, default_jobs  # noqa: E402
+
+
+def run(df, cols, jobs):
+    """Steps 6–9 on a copy of `df`; returns (seconds, result frame, summed kernel s)."""
+    df = df.copy()
+    t0 = time.perf_counter()
+    with ColumnRunner(df, "PATIENT_VISIT_IDENTIFIER", cols, jobs=jobs) as runner:
+        runner.ffill_bfill()
+        runner.median_fill()
+        runner.winsorise()
+        runner.scale()
+        df = runner.write_back(df)
+        busy = runner.busy
+    return time.perf_counter() - t0, df, busy
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--patients", type=int, default=20000)
+    ap.add_argument("--cols", type=int, default=216)
+    ap.add_argument("--jobs", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = ap.parse_args()
+
+    df, cols = make_frame(args.patients, args.cols)
+    print(f"Synthetic frame: {len(df):,} rows × {len(cols)} cols  |  "
+          f"usable CPUs: {default_jobs()}")
+    print(f"  {'jobs':>4s}  {'wall s':>8s}  {'speed-up':>8s}  {'efficiency':>10s}  identical")
+
+    serial = None
+    same_all = True
+    for jobs in args.jobs:
+        seconds, out, busy = run(df, cols, jobs)
+        if serial is None:
+            serial = (seconds, out)
+        same = np.array_equal(out[cols].to_numpy(), serial[1][cols].to_numpy(), equal_nan=True)
+        same_all &= same
+        speedup = serial[0] / seconds
+        print(f"  {jobs:4d}  {seconds:8.3f}  {speedup:7.2f}x  {speedup / jobs:9.0%}  "
+              f"{'yes' if same else 'NO'}   (kernel time {busy:.2f} s)")
+    sys.exit(0 if same_all else 1)
+
+
+if __name__ == "__main__":
+    main()
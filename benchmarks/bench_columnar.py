@@ -0,0 +1,98 @@
+"""
+Benchmark: columnar tables vs CSV for projected reads (data_preparation/columnar.py)
+Writes a cleaned CSV as a WINDOW-partitioned columnar table, then times how
+04_visualization.py could load the columns its plots use: the whole CSV,
+the CSV with usecols, and a columnar projection — plus one partition only.
+Reports on-disk sizes and checks that every read gives the CSV values.
+
+    python benchmarks/bench_columnar.py --csv cleaned/icu_cleaned_full.csv
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from data_preparation.columnar import ColumnarTable, write_table  # noqa: E402
+
+ICU_PLOT_COLUMNS = ["WINDOW", "ICU", "AGE_ABOVE65", "AGE_PERCENTIL", "GENDER",
+                    "DISEASE GROUPING 1", "DISEASE GROUPING 2", "DISEASE GROUPING 3",
+                    "DISEASE GROUPING 4", "DISEASE GROUPING 5", "DISEASE GROUPING 6",
+                    "HTN", "IMMUNOCOMPROMISED", "OTHER"]
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        times.append(time.perf_counter() - t0)
+    return min(times), out
+
+
+def dir_size(path):
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+
+
+def plain(df):
+    for col in df.columns[df.dtypes == "category"]:
+        df[col] = df[col].astype(df[col].cat.categories.dtype)
+    return df.reset_index(drop=True)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--csv", default=os.path.join(ROOT, "cleaned", "icu_cleaned_full.csv"))
+    ap.add_argument("--partition-by", default="WINDOW")
+    ap.add_argument("--columns", nargs="+", default=ICU_PLOT_COLUMNS)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    full = pd.read_csv(args.csv)
+    tmp = tempfile.mkdtemp(prefix="columnar_")
+    table_dir = os.path.join(tmp, "table")
+    try:
+        t_write, _ = best_of(lambda: write_table(full, table_dir, partition_by=args.partition_by),
+                             1)
+        table = ColumnarTable(table_dir)
+        first = table.partitions[0]
+        print(f"{args.csv}: {len(full):,} rows × {full.shape[1]} cols, "
+              f"projecting {len(args.columns)} cols")
+        print(f"  CSV {os.path.getsize(args.csv) / 1e6:7.2f} MB  |  columnar "
+              f"{dir_size(table_dir) / 1e6:7.2f} MB in {len(table.partitions)} partitions "
+              f"(written in {t_write:.2f} s)\n")
+
+        expected = full[args.columns]
+        cases = [
+            ("CSV, all columns",        lambda: pd.read_csv(args.csv)[args.columns], expected),
+            ("CSV, usecols",            lambda: pd.read_csv(args.csv, usecols=args.columns)
+                                                  [args.columns], expected),
+            ("columnar, projection",    lambda: plain(table.read(columns=args.columns)),
+             expected),
+            (f"columnar, partition {first}",
+             lambda: plain(table.read(columns=args.columns, partitions=[first])),
+             expected[full[args.partition_by] == first]),
+        ]
+        ok = True
+        print(f"  {'read':28s}  {'best s':>8s}  {'vs CSV':>7s}  identical")
+        baseline = None
+        for label, fn, want in cases:
+            seconds, got = best_of(fn, args.repeat)
+            baseline = baseline or seconds
+            same = got.reset_index(drop=True).equals(want.reset_index(drop=True))
+            ok &= same
+            print(f"  {label:28s}  {seconds:8.4f}  {baseline / seconds:6.1f}x  "
+                  f"{'yes' if same else 'NO'}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark: merged vs refit fold parameters (data_preparation/cv_folds.py)
+Builds a synthetic ICU-shaped tensor (patients × 5 windows × features,
+heavy-tailed lab values) and, for every fold of a repeated patient-grouped
+split, compares a direct refit — Winsorizer.fit, clip and StandardScaler.fit
+on the training rows — with the parameters PatientFolds merges from its
+per-group statistics: time per fold and the largest relative difference of
+the cap bounds and scales (means: difference in units of the scale).
+
+    python benchmarks/bench_cv_folds.py --patients 100000 --features 100
+    python benchmarks/bench_cv_folds.py --patients 20000 --sketch-k 200
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_preparation.cv_folds import PatientFolds  # noqa: E402
+from data_preparation.winsorizer import Winsorizer  # noqa: E402
+
+
+def make_tensor(patients, features, seed=0):
+    rng = np.random.default_rng(seed)
+    values = rng.standard_t(3, size=(patients, 5, features)) * rng.uniform(0.1, 10, features)
+    values = values.round(2)                           # lab values repeat, like the real data
+    present = rng.random((patients, 5)) < 0.9
+    present[:, 0] = True
+    values[~present] = np.nan
+    icu = np.where(present, (rng.random((patients, 5)) < 0.25).astype(np.int8), -1)
+    return values, present, icu.astype(np.int8)
+
+
+def refit(folds, groups):
+    X = pd.DataFrame(folds.rows[folds.rows_of(groups)][:, folds.continuous],
+                     columns=folds.cont_names)
+    capper = Winsorizer(folds.lower_pct, folds.upper_pct).fit(X, X.columns)
+    capper.transform(X)
+    return capper, StandardScaler().fit(X)
+
+
+def rel_diff(a, b):
+    a, b = np.asarray(a, dtype=float), np.asarray(b, dtype=float)
+    return np.nanmax(np.abs(a - b) / np.maximum(np.abs(b), 1e-12))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--patients", type=int, default=50_000)
+    ap.add_argument("--features", type=int, default=50)
+    ap.add_argument("--k", type=int, default=5)
+    ap.add_argument("--repeats", type=int, default=2)
+    ap.add_argument("--groups", type=int, default=20)
+    ap.add_argument("--sketch-k", type=int, default=1000)
+    ap.add_argument("--tol", type=float, default=1e-6, help="allowed relative difference")
+    args = ap.parse_args()
+
+    values, present, icu = make_tensor(args.patients, args.features)
+    t0 = time.perf_counter()
+    folds = PatientFolds(values, present, icu, np.arange(args.patients),
+                         [f"lab_{i:03d}" for i in range(args.features)],
+                         slice(0, args.features), n_groups=args.groups, sketch_k=args.sketch_k)
+    t_stats = time.perf_counter() - t0
+    print(f"Synthetic tensor: {args.patients:,} patients, {len(folds.rows):,} rows × "
+          f"{args.features} features; group statistics in {t_stats:.2f} s")
+    print(f"  {'fold':>6s}  {'refit s':>8s}  {'merged s':>8s}  {'speed-up':>8s}  "
+          f"{'bounds':>7s}  {'mean/σ':>7s}  {'scale':>7s}   (max relative difference)")
+
+    worst = 0.0
+    total_refit = total_merged = 0.0
+    split = folds.split(args.k, args.repeats)
+    while True:
+        t0 = time.perf_counter()
+        fold = next(split, None)
+        t_merged = time.perf_counter() - t0
+        if fold is None:
+            break
+        t0 = time.perf_counter()
+        capper, scaler = refit(folds, fold.train_groups)
+        t_refit = time.perf_counter() - t0
+        diffs = [max(rel_diff(fold.capper.lower_, capper.lower_),
+                     rel_diff(fold.capper.upper_, capper.upper_)),
+                 np.nanmax(np.abs(fold.scaler.mean_ - scaler.mean_) / scaler.scale_),
+                 rel_diff(fold.scaler.scale_, scaler.scale_)]
+        worst = max(worst, *diffs)
+        total_refit += t_refit
+        total_merged += t_merged
+        print(f"  {fold.repeat}/{fold.index:<4d}  {t_refit:8.3f}  {t_merged:8.3f}  "
+              f"{t_refit / t_merged:7.1f}x  " + "  ".join(f"{d:7.1e}" for d in diffs))
+    print(f"  total   {total_refit:8.3f}  {total_merged:8.3f}  "
+          f"{total_refit / total_merged:7.1f}x  (+{t_stats:.2f} s once for the statistics)")
+    sys.exit(0 if worst <= args.tol else 1)
+
+
+if __name__ == "__main__":
+    main()
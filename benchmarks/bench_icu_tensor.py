@@ -0,0 +1,83 @@
+"""
+Benchmark: ICU tensor store vs. long CSV (data_preparation/icu_tensor.py)
+Times what a training job does to get its inputs from the outputs of
+03_icu_cleaning.py — the first window, and the full (patients, windows,
+features) sequence array — once by parsing icu_cleaned_full.csv and once
+by memory-mapping cleaned/icu_tensor/, and checks both give the same values.
+Run 03_icu_cleaning.py --tensor first (use --input for a large synthetic extract).
+
+    python benchmarks/bench_icu_tensor.py --repeat 5
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from data_preparation.icu_schema import WINDOW_ORDER  # noqa: E402
+from data_preparation.icu_tensor import TENSOR_DIR, IcuTensor  # noqa: E402
+
+CSV_FILE = os.path.join(ROOT, "cleaned", "icu_cleaned_full.csv")
+
+
+def from_csv(path, features):
+    df = pd.read_csv(path, float_precision="round_trip")
+    first = df.loc[df["WINDOW"] == "0-2", features].to_numpy(dtype=float)
+    # Re-pivot the long frame to (patients, windows, features)
+    patients, p_idx = np.unique(df["PATIENT_VISIT_IDENTIFIER"].to_numpy(), return_inverse=True)
+    w_idx = df["WINDOW"].map(WINDOW_ORDER).to_numpy()
+    seq = np.full((len(patients), len(WINDOW_ORDER), len(features)), np.nan)
+    seq[p_idx, w_idx] = df[features].to_numpy(dtype=float)
+    return first, seq
+
+
+def from_tensor(path):
+    t = IcuTensor.load(path)
+    return t, t.window("0-2"), t.values
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        times.append(time.perf_counter() - t0)
+    return min(times), out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--csv", default=CSV_FILE)
+    ap.add_argument("--tensor-dir", default=TENSOR_DIR)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    t_tensor, (tensor, first_t, seq_t) = best_of(lambda: from_tensor(args.tensor_dir),
+                                                 args.repeat)
+    t_csv, (first_c, seq_c) = best_of(lambda: from_csv(args.csv, tensor.features), args.repeat)
+    # Touch every page once so the mmap timing includes reading the data
+    t_touch, _ = best_of(lambda: float(np.nansum(seq_t)), args.repeat)
+
+    p, w, f = tensor.shape
+    print(f"ICU tensor: {p:,} patients × {w} windows × {f} features "
+          f"({seq_t.nbytes / 2**20:,.1f} MB, {tensor.meta['dtype']})")
+    print(f"  CSV parse + filter + pivot : {t_csv * 1e3:10.1f} ms")
+    print(f"  tensor mmap + slice        : {t_tensor * 1e3:10.1f} ms"
+          f"   (x{t_csv / t_tensor:,.0f})")
+    print(f"  tensor full read (nansum)  : {t_touch * 1e3:10.1f} ms")
+
+    # A --float32 run writes float32 values to the CSV; compare at that precision
+    dtype = seq_t.dtype
+    same = (np.array_equal(first_c.astype(dtype), first_t, equal_nan=True)
+            and np.array_equal(seq_c.astype(dtype), seq_t, equal_nan=True))
+    print(f"identical to the CSV: {'yes' if same else 'NO'}")
+    sys.exit(0 if same else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark: start-up cost of the package command line (python -m data_preparation)
+Runs `--help` of the CLI and of every stage in a fresh interpreter under
+-X importtime and fails when one of them imports a heavy library (numpy,
+pandas, scikit-learn, scipy, matplotlib, seaborn) or takes longer than the
+budget (best of --repeats, interpreter start-up included).  A bare
+`import pandas` and `import matplotlib.pyplot` are timed for reference.
+tests/test_import_time.py enforces the default budget under pytest.
+
+    python benchmarks/bench_import_time.py
+    python benchmarks/bench_import_time.py --budget-ms 200 --repeats 5
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from data_preparation import STAGES  # noqa: E402
+
+HEAVY = ("numpy", "pandas", "sklearn", "scipy", "matplotlib", "seaborn")
+
+
+def measure(args, repeats):
+    """Best wall time (ms) of `python -X importtime ARGS` and the top-level modules it imported."""
+    best, modules = float("inf"), set()
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-X", "importtime", *args], cwd=ROOT,
+                              capture_output=True, text=True)
+        best = min(best, (time.perf_counter() - t0) * 1000)
+        if proc.returncode != 0:
+            raise RuntimeError(f"{' '.join(args)} exited with {proc.returncode}:\n"
+                               + proc.stderr[-2000:])
+        # "import time: self [us] | cumulative | imported package"
+        for line in proc.stderr.splitlines():
+            if line.startswith("import time:") and line.count("|") == 2:
+                modules.add(line.rsplit("|", 1)[1].strip().split(".")[0])
+    return best, modules
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--budget-ms", type=float, default=250,
+                    help="allowed wall time of each --help call")
+    ap.add_argument("--repeats", type=int, default=3)
+    args = ap.parse_args()
+
+    print(f"  {'command':42s}  {'ms':>7s}  heavy imports")
+    failed = False
+    cli = ["-m", "data_preparation"]
+    for cmd in [cli + ["--help"]] + [cli + [stage, "--help"] for stage in STAGES]:
+        ms, modules = measure(cmd, args.repeats)
+        heavy = sorted(set(HEAVY) & modules)
+        ok = not heavy and ms <= args.budget_ms
+        failed |= not ok
+        print(f"  {' '.join(cmd[1:]):42s}  {ms:7.1f}  {', '.join(heavy) or '-':s}"
+              + ("" if ok else "   ✗"))
+    for ref in ("import pandas", "import matplotlib.pyplot"):
+        ms, _ = measure(["-c", ref], args.repeats)
+        print(f"  {ref:42s}  {ms:7.1f}  (reference)")
+    print(f"Budget {args.budget_ms:.0f} ms per call: {'FAILED' if failed else 'ok'}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
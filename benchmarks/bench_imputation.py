@@ -0,0 +1,71 @@
+"""
+Benchmark: within-patient ffill+bfill (03_icu_cleaning.py, step 6)
+Compares the original groupby/transform(lambda) path against the vectorised
+`imputation.grouped_ffill_bfill` on a synthetic ICU-shaped frame, checks that
+both give identical results and reports rows/sec.
+
+    python benchmarks/bench_imputation.py --patients 20000 --cols 216
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_preparation.imputation import grouped_ffill_bfill  # noqa: E402
+
+N_WINDOWS = 5
+
+
+def make_frame(n_patients, n_cols, missing=0.6, seed=0):
+    rng  = np.random.default_rng(seed)
+    rows = n_patients * N_WINDOWS
+    vals = rng.normal(size=(rows, n_cols))
+    vals[rng.random((rows, n_cols)) < missing] = np.nan
+    cols = [f"LAB_{i}" for i in range(n_cols)]
+    df = pd.DataFrame(vals, columns=cols)
+    df.insert(0, "PATIENT_VISIT_IDENTIFIER", np.repeat(np.arange(n_patients), N_WINDOWS))
+    df.insert(1, "WINDOW_ORDER", np.tile(np.arange(N_WINDOWS), n_patients))
+    return df, cols
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--patients", type=int, default=20000)
+    ap.add_argument("--cols", type=int, default=216)
+    ap.add_argument("--skip-lambda", action="store_true",
+                    help="only time the vectorised path (for very large sizes)")
+    args = ap.parse_args()
+
+    df, cols = make_frame(args.patients, args.cols)
+    rows = len(df)
+    print(f"Synthetic frame: {rows:,} rows × {len(cols)} cols "
+          f"({args.patients:,} patients)")
+
+    fast = df.copy()
+    t0 = time.perf_counter()
+    grouped_ffill_bfill(fast, "PATIENT_VISIT_IDENTIFIER", cols)
+    t_fast = time.perf_counter() - t0
+    print(f"  vectorised       : {t_fast:8.3f} s  →  {rows / t_fast:12,.0f} rows/sec")
+
+    if args.skip_lambda:
+        return
+
+    slow = df.copy()
+    t0 = time.perf_counter()
+    slow[cols] = (slow.groupby("PATIENT_VISIT_IDENTIFIER")[cols]
+                  .transform(lambda x: x.ffill().bfill()))
+    t_slow = time.perf_counter() - t0
+    print(f"  groupby + lambda : {t_slow:8.3f} s  →  {rows / t_slow:12,.0f} rows/sec")
+    print(f"  speed-up         : {t_slow / t_fast:8.1f}x")
+
+    pd.testing.assert_frame_equal(fast, slow)
+    print("  results identical: yes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Benchmark: out-of-core fitting (data_preparation/outofcore_fit.py)
+Fits the cardiac and ICU scaler / cap bounds (and ICU medians) twice on the
+same CSV — exactly in memory, as scripts 2 and 3 do, and streamed in chunks
+by outofcore_fit.py — then reports throughput and the error of the streamed
+artifacts:
+
+  scaler       max |Δmean| and |Δscale| of the streamed scaler vs. the exact
+               one, relative to the exact scale (end to end: includes the
+               streamed caps / medians)
+  caps/median  max rank error, i.e. |fraction of values ≤ estimate − target|
+
+The raw datasets are tiled `--tile` times (ICU patient ids kept distinct)
+to get a larger input.  Exits non-zero if an error exceeds its tolerance;
+tests/test_outofcore_fit.py runs the same checks on a smaller input.
+
+    python benchmarks/bench_outofcore_fit.py --tile 50 --chunksize 20000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from data_preparation.icu_schema import continuous_cols  # noqa: E402
+from data_preparation.ingest import load_table  # noqa: E402
+from data_preparation.medical_schema import NUMERIC_COLS  # noqa: E402
+from data_preparation.outofcore_fit import (fit_icu, fit_medical,  # noqa: E402
+                                            prepare_icu_chunk, prepare_medical_chunk)
+from data_preparation.winsorizer import Winsorizer  # noqa: E402
+
+SCALE_TOL = 1e-9      # exact caps / medians: partial_fit vs one fit differ by rounding only
+
+
+def write_tiled(tmp, tile):
+    med, _ = load_table(os.path.join(ROOT, "Medicaldataset.csv"))
+    icu, _ = load_table(os.path.join(ROOT, "Kaggle_Sirio_Libanes_ICU_Prediction.xlsx"))
+    step = int(icu["PATIENT_VISIT_IDENTIFIER"].max()) + 1
+    tiles = []
+    for i in range(tile):
+        part = icu.copy()
+        part["PATIENT_VISIT_IDENTIFIER"] += i * step
+        tiles.append(part)
+    paths = {"medical": os.path.join(tmp, "medical.csv"), "icu": os.path.join(tmp, "icu.csv")}
+    pd.concat([med] * tile, ignore_index=True).to_csv(paths["medical"], index=False)
+    pd.concat(tiles, ignore_index=True).to_csv(paths["icu"], index=False)
+    return paths
+
+
+def rank_error(values, estimates, targets):
+    """Max over columns of |fraction of non-NaN values ≤ estimate − target|."""
+    worst = 0.0
+    for j in range(values.shape[1]):
+        col = np.sort(values[:, j][~np.isnan(values[:, j])])
+        for est, q in zip(estimates[j], targets):
+            # Any rank inside the run of values equal to `est` is exact
+            lo = np.searchsorted(col, est, side="left") / max(len(col) - 1, 1)
+            hi = (np.searchsorted(col, est, side="right") - 1) / max(len(col) - 1, 1)
+            worst = max(worst, 0.0 if lo <= q <= hi else min(abs(lo - q), abs(hi - q)))
+    return worst
+
+
+def scaler_error(exact, streamed):
+    d_mean  = np.max(np.abs(exact.mean_ - streamed.mean_) / exact.scale_)
+    d_scale = np.max(np.abs(exact.scale_ - streamed.scale_) / exact.scale_)
+    return max(d_mean, d_scale)
+
+
+def exact_medical(path):
+    df = prepare_medical_chunk(pd.read_csv(path))
+    before = df[NUMERIC_COLS].to_numpy(dtype=float)
+    capper = Winsorizer(lower_pct=0.01, upper_pct=0.99)
+    capper.fit_transform(df, NUMERIC_COLS)
+    scaler = StandardScaler().fit(df[NUMERIC_COLS])
+    return {"caps": (capper, before)}, scaler
+
+
+def exact_icu(path):
+    df   = pd.read_csv(path)
+    cols = continuous_cols(df.columns)
+    df   = prepare_icu_chunk(df, cols)
+    filled  = df[cols].to_numpy(dtype=float)
+    medians = df[cols].median()
+    df[cols] = df[cols].fillna(medians)
+    before = df[cols].to_numpy(dtype=float)
+    capper = Winsorizer(lower_pct=0.01, upper_pct=0.99)
+    capper.fit_transform(df, cols)
+    scaler = StandardScaler().fit(df[cols])
+    return {"caps": (capper, before), "medians": (medians, filled)}, scaler
+
+
+def report(name, rows, t_exact, t_stream, exact, scaler, streamed, tol):
+    print(f"\n{name}: {rows:,} rows")
+    print(f"  in memory (exact)  : {t_exact:8.2f} s  →  {rows / t_exact:12,.0f} rows/sec")
+    print(f"  streamed (chunks)  : {t_stream:8.2f} s  →  {rows / t_stream:12,.0f} rows/sec")
+    err = scaler_error(scaler, streamed["scaler"])
+    ok = err <= SCALE_TOL
+    print(f"  scaler  max rel. error : {err:.2e}")
+    capper, values = exact["caps"]
+    bounds = np.column_stack([streamed["caps"].lower_[capper.columns],
+                              streamed["caps"].upper_[capper.columns]])
+    err = rank_error(values, bounds, [capper.lower_pct, capper.upper_pct])
+    ok &= err <= tol
+    print(f"  caps    max rank error : {err:.4%}")
+    if "medians" in exact:
+        medians, values = exact["medians"]
+        est = np.array([[streamed["medians"][c]] for c in medians.index])
+        err = rank_error(values, est, [0.5])
+        ok &= err <= tol
+        print(f"  medians max rank error : {err:.4%}")
+    return ok
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--tile", type=int, default=20)
+    ap.add_argument("--chunksize", type=int, default=20_000)
+    ap.add_argument("--sketch-k", type=int, default=1000)
+    args = ap.parse_args()
+    tol = 3.4 / args.sketch_k            # 0 expected; a missed band falls back to the sketch
+
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_tiled(tmp, args.tile)
+
+        t0 = time.perf_counter()
+        exact, scaler = exact_medical(paths["medical"])
+        t_exact = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        caps, streamed_scaler, rows = fit_medical(paths["medical"], args.chunksize, args.sketch_k)
+        t_stream = time.perf_counter() - t0
+        ok &= report("medical", rows, t_exact, t_stream, exact, scaler,
+                     {"caps": caps, "scaler": streamed_scaler}, tol)
+
+        t0 = time.perf_counter()
+        exact, scaler = exact_icu(paths["icu"])
+        t_exact = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        medians, caps, streamed_scaler, rows = fit_icu(paths["icu"], args.chunksize, args.sketch_k)
+        t_stream = time.perf_counter() - t0
+        ok &= report("icu", rows, t_exact, t_stream, exact, scaler,
+                     {"caps": caps, "scaler": streamed_scaler, "medians": medians}, tol)
+
+    print(f"\nwithin tolerance (scaler {SCALE_TOL:g}, rank {tol:.2%}): {'yes' if ok else 'NO'}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark: plot summaries vs raw arrays (data_preparation/plot_summaries.py)
+Times the aggregates behind the box plots and histograms of
+04_visualization.py on a synthetic frame: the per-group Python lists +
+matplotlib.cbook.boxplot_stats the plots used to build, against the
+single-sort grouped_box_stats, and plt.hist-style binning against
+histogram().  Checks that quartiles, whiskers and flier counts agree and
+reports how large the cached summary is.
+
+    python benchmarks/bench_plot_summaries.py --rows 5000000 --groups 3
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import matplotlib.cbook as cbook
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_preparation.plot_summaries import _to_json, grouped_box_stats, histogram  # noqa: E402
+
+KEYS = ["q1", "med", "q3", "whislo", "whishi"]
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return time.perf_counter() - t0, out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--rows", type=int, default=2_000_000)
+    ap.add_argument("--groups", type=int, default=3)
+    ap.add_argument("--bins", type=int, default=20)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"Route": rng.integers(0, args.groups, args.rows),
+                       "Dosage (gram)": rng.lognormal(0, 1, args.rows)})
+    print(f"Synthetic frame: {args.rows:,} rows, {args.groups} groups")
+
+    def lists():
+        data = df.groupby("Route")["Dosage (gram)"].apply(list)
+        return cbook.boxplot_stats(data.values, labels=data.index)
+
+    t_old, old = timed(lists)
+    t_new, new = timed(lambda: grouped_box_stats(df["Route"], df["Dosage (gram)"]))
+    same = all(all(np.isclose(o[k], n[k], rtol=0, atol=0) for k in KEYS)
+               and len(o["fliers"]) == n["n_fliers"] for o, (_, n) in zip(old, new))
+    size = len(json.dumps(_to_json([dict(stats, label=g) for g, stats in new])))
+    print(f"  box plot   lists + boxplot_stats {t_old:7.3f} s  |  grouped_box_stats "
+          f"{t_new:7.3f} s  ({t_old / t_new:5.1f}x)  identical: {'yes' if same else 'NO'}")
+    print(f"             summary: {size / 1e3:.1f} kB "
+          f"({sum(n['n_fliers'] for _, n in new):,} fliers, sampled to "
+          f"{sum(len(n['fliers']) for _, n in new):,})")
+
+    values = df["Dosage (gram)"]
+    t_old, (c_old, e_old) = timed(lambda: np.histogram(values.dropna().tolist(), args.bins))
+    t_new, (c_new, e_new) = timed(lambda: histogram(values, args.bins))
+    same_hist = np.array_equal(c_old, c_new) and np.array_equal(e_old, e_new)
+    print(f"  histogram  list + np.histogram   {t_old:7.3f} s  |  histogram()        "
+          f"{t_new:7.3f} s  ({t_old / t_new:5.1f}x)  identical: {'yes' if same_hist else 'NO'}")
+    sys.exit(0 if same and same_hist else 1)
+
+
+if __name__ == "__main__":
+    main()
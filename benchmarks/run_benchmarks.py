@@ -0,0 +1,260 @@
+"""
+Benchmark harness: scripts 01–04 on synthetic inputs of any size
+Builds a scratch copy of the project with synthetic raw files (see
+synthetic.py), runs every numbered script in its own process and records,
+per script and per numbered stage, wall time and peak RSS.  Results are
+written as JSON under benchmarks/results/, keyed by commit, so two runs can
+be compared for regressions.
+
+Stages are taken from the "[N] …" progress lines the scripts print (plot
+file names for 04).  A stage ends at the last line it prints, so its time
+and peak memory cover everything since the previous stage's last line.
+RSS and its high-water mark (VmRSS / VmHWM) are sampled from /proc every
+10 ms (Linux), so short peaks between samples are still attributed to the
+stage in which the high-water mark rose.
+
+    python benchmarks/run_benchmarks.py --rows 1000000
+    python benchmarks/run_benchmarks.py --rows 200000 --scripts 03_icu_cleaning
+    python benchmarks/run_benchmarks.py --compare results/OLD.json results/NEW.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+from synthetic import RAW_FILES, write_dataset
+
+ROOT        = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+# script → (dataset it reads, extra arguments); 04 reads the cleaned CSVs
+SCRIPTS = {
+    "01_hospital_cleaning": ("hospital", []),
+    "02_medical_cleaning":  ("medical", []),
+    "03_icu_cleaning":      ("icu", []),
+    "04_visualization":     (None, []),
+}
+STAGE_LINE = re.compile(r"^\[(\d+(?:-\d+)?)\]\s*(.*)")
+PLOT_LINE  = re.compile(r"Saved\s+\S+\s+.*?([^/\\]+)\.png")
+
+
+# ── Workspace ───────────────────────────────────────────────────────────────
+def build_workspace(tmp, rows, seed, datasets):
+    """Copy data_preparation/ into `tmp` and write synthetic raw files."""
+    shutil.copytree(os.path.join(ROOT, "data_preparation"), os.path.join(tmp, "data_preparation"),
+                    ignore=shutil.ignore_patterns("__pycache__"))
+    os.makedirs(os.path.join(tmp, "cleaned"), exist_ok=True)
+    inputs, gen_seconds = {}, {}
+    for name in datasets:
+        # The ICU workbook is replaced by a CSV passed with --input
+        fname = RAW_FILES[name] if name != "icu" else "icu_synthetic.csv"
+        path  = os.path.join(tmp, fname)
+        t0 = time.perf_counter()
+        write_dataset(name, path, rows, seed=seed)
+        gen_seconds[name] = round(time.perf_counter() - t0, 3)
+        inputs[name] = path
+        print(f"  generated {name:9s} {rows:,} rows  ({gen_seconds[name]:.1f} s)")
+    return inputs, gen_seconds
+
+
+# ── Running one script ──────────────────────────────────────────────────────
+def _rss_mb(pid):
+    """(current RSS, peak RSS) of `pid` in MB, or None once it has exited."""
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith(("VmRSS:", "VmHWM:")):
+                    fields[line[:5]] = int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return (fields["VmRSS"], fields["VmHWM"]) if len(fields) == 2 else None
+
+
+def run_script(workdir, script, args):
+    cmd = [sys.executable, "-m", f"data_preparation.{script}", *args]
+    env = dict(os.environ, PYTHONUNBUFFERED="1", MPLBACKEND="Agg")
+    t_start = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=workdir, env=env, stdout=subprocess.PIPE,
+                            stderr=subprocess.STDOUT, text=True, encoding="utf-8",
+                            errors="replace")
+    samples, running = [], True
+
+    def sample():
+        while running:
+            mem = _rss_mb(proc.pid)
+            if mem is not None:
+                samples.append((time.perf_counter(), *mem))
+            time.sleep(0.01)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    lines = [(time.perf_counter(), line.rstrip("\n")) for line in proc.stdout]
+    proc.wait()
+    t_end = time.perf_counter()
+    running = False
+    sampler.join()
+
+    peak = max((hwm for _, _, hwm in samples), default=None)
+    return {"returncode": proc.returncode,
+            "seconds": round(t_end - t_start, 3),
+            "peak_rss_mb": None if peak is None else round(peak, 1),
+            "stages": _stages(lines, samples, t_start),
+            "log_tail": [l for _, l in lines[-15:]] if proc.returncode else []}
+
+
+def _stages(lines, samples, t_start):
+    """Split the run at the last output line of every stage."""
+    marks = []                           # [stage id, label, time of its last line]
+    for t, line in lines:
+        m = STAGE_LINE.match(line)
+        p = PLOT_LINE.search(line)
+        stage = m.group(1) if m else p.group(1) if p else None
+        if stage is not None and (not marks or marks[-1][0] != stage):
+            marks.append([stage, m.group(2).strip()[:60] if m else "", t])
+        elif marks and line.strip():
+            marks[-1][2] = t
+    stages, prev = [], t_start
+    for stage, label, end in marks:
+        window = [(rss, hwm) for t, rss, hwm in samples if prev <= t <= end]
+        before = [hwm for t, _, hwm in samples if t < prev]
+        peak = max((rss for rss, _ in window), default=None)
+        if window and window[-1][1] > (before[-1] if before else 0):
+            peak = max(peak, window[-1][1])      # the high-water mark rose here
+        stages.append({"stage": stage, "label": label, "seconds": round(end - prev, 3),
+                       "peak_rss_mb": None if peak is None else round(peak, 1)})
+        prev = end
+    return stages
+
+
+# ── Results ─────────────────────────────────────────────────────────────────
+def _git(*args):
+    try:
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(rows, scripts, seed=0):
+    datasets = [SCRIPTS[s][0] for s in scripts if SCRIPTS[s][0]]
+    if "04_visualization" in scripts and len(datasets) < 3:
+        raise SystemExit("04_visualization needs 01, 02 and 03 in the same run")
+    result = {"commit": _git("rev-parse", "--short", "HEAD"),
+              "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+              "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+              "python": platform.python_version(),
+              "platform": platform.platform(),
+              "cpus": os.cpu_count(),
+              "rows": rows, "seed": seed, "scripts": {}}
+
+    with tempfile.TemporaryDirectory(prefix="bench_") as tmp:
+        inputs, result["generate_seconds"] = build_workspace(tmp, rows, seed, datasets)
+        for script in scripts:
+            dataset, args = SCRIPTS[script]
+            if dataset:
+                args = [*args, "--input", inputs[dataset]]
+            res = run_script(tmp, script, args)
+            result["scripts"][script] = res
+            status = "ok" if res["returncode"] == 0 else f"FAILED ({res['returncode']})"
+            peak = "n/a" if res["peak_rss_mb"] is None else f"{res['peak_rss_mb']:,.1f}"
+            print(f"  {script:22s} {res['seconds']:9.2f} s  peak {peak:>9s} MB  {status}")
+            for line in res["log_tail"]:
+                print(f"      {line}")
+    return result
+
+
+def save_result(result):
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    stamp = result["created"].replace(":", "").replace("-", "")[:15]
+    name  = f"{stamp}_{result['commit'] or 'nogit'}{'-dirty' if result['dirty'] else ''}.json"
+    path  = os.path.join(RESULTS_DIR, name)
+    with open(path, "w") as f:
+        json.dump(result, f, indent=2)
+    return path
+
+
+def print_stages(result):
+    for script, res in result["scripts"].items():
+        print(f"\n{script}  ({res['seconds']:.2f} s, peak {res['peak_rss_mb']} MB)")
+        for st in res["stages"]:
+            peak = "n/a" if st["peak_rss_mb"] is None else f"{st['peak_rss_mb']:,.1f}"
+            print(f"    {st['seconds']:8.2f} s  {peak:>9s} MB  [{st['stage']}] {st['label']}")
+
+
+def compare(old_path, new_path, threshold):
+    """Print time / memory ratios per script and stage; return True if none regressed."""
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"old: {old['commit']} ({old['created']}, {old['rows']:,} rows)")
+    print(f"new: {new['commit']} ({new['created']}, {new['rows']:,} rows)")
+    if old["rows"] != new["rows"]:
+        print("warning: the two runs used different input sizes")
+
+    ok = True
+
+    def row(name, a, b, unit):
+        nonlocal ok
+        if not a or b is None:
+            return
+        ratio = b / a
+        flag = ""
+        if ratio > threshold:
+            flag, ok = "  REGRESSION", False
+        print(f"    {name:34s} {a:10,.2f} → {b:10,.2f} {unit:2s}  x{ratio:5.2f}{flag}")
+
+    for script, res in new["scripts"].items():
+        prev = old["scripts"].get(script)
+        if prev is None:
+            continue
+        print(f"\n{script}")
+        row("total time", prev["seconds"], res["seconds"], "s")
+        row("peak RSS", prev["peak_rss_mb"], res["peak_rss_mb"], "MB")
+        before = {st["stage"]: st for st in prev["stages"]}
+        for st in res["stages"]:
+            if st["stage"] in before:
+                row(f"[{st['stage']}] time", before[st["stage"]]["seconds"], st["seconds"], "s")
+    return ok
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--rows", type=int, default=100_000,
+                    help="synthetic rows per dataset (default: 100000)")
+    ap.add_argument("--scripts", nargs="+", default=list(SCRIPTS), metavar="SCRIPT",
+                    help=f"scripts to run (default: all) — {', '.join(SCRIPTS)}")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"),
+                    help="compare two result files instead of running")
+    ap.add_argument("--threshold", type=float, default=1.2,
+                    help="new/old ratio reported as a regression (default: 1.2)")
+    args = ap.parse_args()
+
+    if args.compare:
+        sys.exit(0 if compare(*args.compare, args.threshold) else 1)
+    unknown = set(args.scripts) - set(SCRIPTS)
+    if unknown:
+        ap.error(f"unknown script(s): {', '.join(sorted(unknown))}")
+
+    scripts = [s for s in SCRIPTS if s in args.scripts]
+    print(f"Benchmark: {args.rows:,} rows per dataset, scripts: {', '.join(scripts)}")
+    result = run_suite(args.rows, scripts, args.seed)
+    print_stages(result)
+    print(f"\nResults  →  {save_result(result)}")
+    failed = [s for s, r in result["scripts"].items() if r["returncode"]]
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""
+Synthetic inputs for the cleaning pipelines, at any size
+Rows are bootstrapped from the bundled raw datasets, so column names,
+dtypes, category frequencies and the ICU missing-value pattern match the
+real files, then perturbed and seeded with the quirks each script cleans up:
+
+  hospital : embedded header rows, exact duplicate rows, missing Indication,
+             padded / mixed-case text, random entry dates, Age / Dosage /
+             Duration outliers
+  cardiac  : padded / mixed-case Result labels, vital and lab outliers
+  ICU      : 5 windows per patient with some windows dropped entirely and
+             some with every lab / vital missing, continuous outliers
+
+Output is written chunk by chunk, so memory stays flat from 1M to 100M rows.
+The same seed always gives the same file.  ICU lab / vital values are
+written with 4 decimals through a lookup table of formatted strings, which
+is ~15x faster than DataFrame.to_csv on 216 float columns.
+
+    python benchmarks/synthetic.py hospital 10000000 --out /data/hospital.csv
+    python benchmarks/synthetic.py icu 1000000 --out /data/icu.csv
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from data_preparation.hospital_steps import DATE_COL, header_mask  # noqa: E402
+from data_preparation.icu_schema import continuous_cols  # noqa: E402
+from data_preparation.ingest import load_table  # noqa: E402
+from data_preparation.medical_schema import NUMERIC_COLS as MEDICAL_NUMERIC  # noqa: E402
+
+RAW_FILES = {
+    "hospital": "Hopsital Dataset.csv",
+    "medical":  "Medicaldataset.csv",
+    "icu":      "Kaggle_Sirio_Libanes_ICU_Prediction.xlsx",
+}
+
+# Quirk rates (fraction of rows, or of values for ICU outliers)
+HEADER_RATE    = 0.003
+DUPLICATE_RATE = 0.01
+MISSING_RATE   = 0.002
+TEXT_RATE      = 0.01
+OUTLIER_RATE   = 0.005
+DROP_WINDOW    = 0.02
+BLANK_WINDOW   = 0.05
+
+
+def _template(name):
+    df, _ = load_table(os.path.join(ROOT, RAW_FILES[name]))
+    return df
+
+
+def _text_noise(values, rng, rate):
+    """Pad or re-case a fraction of the strings in `values` (object array)."""
+    values = values.astype(object)
+    hit = np.flatnonzero(rng.random(len(values)) < rate)
+    styles = rng.integers(3, size=len(hit))
+    for i, style in zip(hit, styles):
+        v = values[i]
+        if isinstance(v, str):
+            values[i] = (v.upper(), f"  {v} ", v.capitalize())[style]
+    return values
+
+
+# ── Hospital ────────────────────────────────────────────────────────────────
+class HospitalGenerator:
+    def __init__(self, seed=0):
+        raw = _template("hospital").astype(str).replace("nan", np.nan)
+        is_header = header_mask(raw)
+        self.headers = raw[is_header].reset_index(drop=True)
+        self.rows    = raw[~is_header].drop_duplicates().reset_index(drop=True)
+        self.rng     = np.random.default_rng(seed)
+        self.t0      = pd.Timestamp("2019-01-01").value // 10**9
+        self.span    = 3 * 365 * 86400
+
+    def chunk(self, n):
+        rng = self.rng
+        n_headers = rng.binomial(n, HEADER_RATE)
+        n_data = n - n_headers
+        df = self.rows.iloc[rng.integers(len(self.rows), size=n_data)].reset_index(drop=True)
+
+        age  = pd.to_numeric(df["Age"]).to_numpy(copy=True) + rng.integers(-3, 4, size=n_data)
+        dose = pd.to_numeric(df["Dosage (gram)"]).to_numpy(copy=True)
+        days = pd.to_numeric(df["Duration (days)"]).to_numpy(copy=True)
+        out = rng.random(n_data) < OUTLIER_RATE
+        age[out]  = rng.integers(110, 200, size=out.sum())
+        out = rng.random(n_data) < OUTLIER_RATE
+        dose[out] = dose[out] * rng.uniform(10, 50, size=out.sum())
+        out = rng.random(n_data) < OUTLIER_RATE
+        days[out] = rng.integers(60, 365, size=out.sum())
+        df["Age"] = np.clip(age, 1, None)
+        df["Dosage (gram)"] = np.round(dose, 3)
+        df["Duration (days)"] = days
+
+        seconds = self.t0 + rng.integers(self.span, size=n_data)
+        df[DATE_COL] = pd.to_datetime(seconds, unit="s").strftime("%d/%m/%Y %H:%M:%S")
+        for col in ["Gender", "Route", "Name of Drug"]:
+            df[col] = _text_noise(df[col].to_numpy(), rng, TEXT_RATE)
+        df.loc[rng.random(n_data) < MISSING_RATE, "Indication"] = np.nan
+
+        # Exact duplicates of other rows in the chunk
+        dup = np.flatnonzero(rng.random(n_data) < DUPLICATE_RATE)
+        if len(dup):
+            df.iloc[dup] = df.iloc[rng.integers(n_data, size=len(dup))].to_numpy()
+
+        # Repeated header lines scattered through the data
+        if n_headers:
+            headers = self.headers.iloc[rng.integers(len(self.headers), size=n_headers)]
+            pos = np.r_[np.arange(n_data), rng.uniform(0, n_data, size=n_headers)]
+            df = pd.concat([df, headers], ignore_index=True).iloc[np.argsort(pos, kind="stable")]
+        return df
+
+
+# ── Cardiac ─────────────────────────────────────────────────────────────────
+class MedicalGenerator:
+    def __init__(self, seed=0):
+        self.rows = _template("medical")
+        self.rng  = np.random.default_rng(seed)
+        # Decimal places each float column is recorded with (at most 3)
+        self.decimals = {}
+        for col in MEDICAL_NUMERIC:
+            values = self.rows[col].to_numpy(dtype=float)
+            self.decimals[col] = next((d for d in range(3) if np.allclose(values, values.round(d))), 3)
+
+    def chunk(self, n):
+        rng = self.rng
+        df = self.rows.iloc[rng.integers(len(self.rows), size=n)].reset_index(drop=True)
+        for col in MEDICAL_NUMERIC:
+            values = df[col].to_numpy(dtype=float, copy=True)
+            if df[col].dtype.kind in "iu":
+                values = np.clip(values + rng.integers(-2, 3, size=n), 1, None)
+            else:
+                values = values * rng.lognormal(0, 0.05, size=n)
+            out = rng.random(n) < OUTLIER_RATE / len(MEDICAL_NUMERIC)
+            values[out] = values[out] * rng.uniform(3, 10, size=out.sum())
+            if df[col].dtype.kind in "iu":
+                df[col] = values.round().astype(np.int64)
+            else:
+                step = 10.0 ** -self.decimals[col]
+                df[col] = np.clip(values.round(self.decimals[col]), step, None)
+        df["Result"] = _text_noise(df["Result"].to_numpy(), rng, TEXT_RATE)
+        return df
+
+
+# ── ICU ─────────────────────────────────────────────────────────────────────
+class IcuGenerator:
+    """Generates whole patients (5 windows each, before dropped windows)."""
+
+    def __init__(self, seed=0):
+        raw = _template("icu").sort_values("PATIENT_VISIT_IDENTIFIER", kind="stable")
+        self.rows = raw.reset_index(drop=True)
+        self.cols = continuous_cols(raw.columns)
+        starts = np.flatnonzero(np.r_[True, np.diff(self.rows["PATIENT_VISIT_IDENTIFIER"]) != 0])
+        self.starts = starts
+        self.sizes  = np.diff(np.r_[starts, len(self.rows)])
+        self.rng = np.random.default_rng(seed)
+        self.next_id = 0
+
+    def chunk(self, n):
+        rng = self.rng
+        n_patients = max(1, int(np.ceil(n / self.sizes.mean())))
+        src = rng.integers(len(self.starts), size=n_patients)
+        sizes = self.sizes[src]
+        idx = np.repeat(self.starts[src], sizes) + (
+            np.arange(sizes.sum()) - np.repeat(np.cumsum(sizes) - sizes, sizes))
+        df = self.rows.iloc[idx].reset_index(drop=True)
+        df["PATIENT_VISIT_IDENTIFIER"] = self.next_id + np.repeat(np.arange(n_patients), sizes)
+        self.next_id += n_patients
+
+        values = df[self.cols].to_numpy(dtype=float, copy=True)
+        observed = ~np.isnan(values)
+        values[observed] = np.clip(values[observed] + rng.normal(0, 0.02, size=observed.sum()), -1, 1)
+        out = observed & (rng.random(values.shape) < OUTLIER_RATE / 5)
+        values[out] = rng.choice([-1, 1], size=out.sum()) * rng.uniform(2, 10, size=out.sum())
+        values[rng.random(len(df)) < BLANK_WINDOW] = np.nan
+        df[self.cols] = values
+
+        # Drop whole windows, but never a patient's first row
+        first = np.r_[True, np.diff(df["PATIENT_VISIT_IDENTIFIER"].to_numpy()) != 0]
+        keep = first | (rng.random(len(df)) >= DROP_WINDOW)
+        return df[keep].head(n)
+
+    def to_csv(self, df, f, header):
+        table = self._table()
+        out = np.empty(df.shape, dtype=object)
+        for j, col in enumerate(df.columns):
+            if col in self._col_set:
+                v = df[col].to_numpy(dtype=float)
+                code = np.rint(np.nan_to_num(np.clip(v, -10, 10)) * 1e4).astype(np.int64) + 100_000
+                out[:, j] = table[np.where(np.isnan(v), len(table) - 1, code)]
+            else:
+                out[:, j] = df[col].astype(str).to_numpy(dtype=object)
+                out[df[col].isna().to_numpy(), j] = ""
+        if header:
+            f.write(",".join(df.columns) + "\n")
+        f.write("\n".join(map(",".join, out.tolist())) + "\n")
+
+    def _table(self):
+        if not hasattr(self, "_strings"):
+            self._col_set = set(self.cols)
+            self._strings = np.array([f"{i / 1e4:.4f}".rstrip("0").rstrip(".")
+                                      for i in range(-100_000, 100_001)] + [""], dtype=object)
+        return self._strings
+
+
+GENERATORS = {"hospital": HospitalGenerator, "medical": MedicalGenerator, "icu": IcuGenerator}
+
+
+def write_dataset(name, path, n_rows, chunksize=500_000, seed=0):
+    """Write `n_rows` synthetic rows of dataset `name` to the CSV `path`."""
+    gen = GENERATORS[name](seed)
+    written = 0
+    with open(path, "w", newline="") as f:
+        while written < n_rows:
+            chunk = gen.chunk(min(chunksize, n_rows - written))
+            if hasattr(gen, "to_csv"):
+                gen.to_csv(chunk, f, header=(written == 0))
+            else:
+                chunk.to_csv(f, index=False, header=(written == 0))
+            written += len(chunk)
+    return written
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("dataset", choices=sorted(GENERATORS))
+    ap.add_argument("rows", type=int)
+    ap.add_argument("--out", required=True)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--chunksize", type=int, default=500_000)
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    rows = write_dataset(args.dataset, args.out, args.rows, args.chunksize, args.seed)
+    elapsed = time.perf_counter() - t0
+    print(f"Wrote {rows:,} {args.dataset} rows  →  {args.out}  "
+          f"({elapsed:.1f} s, {rows / elapsed:,.0f} rows/sec)")
+
+
+if __name__ == "__main__":
+    main()
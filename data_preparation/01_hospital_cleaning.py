@@ -4,8 +4,7 @@ Dataset : Hopsital Dataset.csv
 Output  : cleaned/hospital_cleaned.csv
 """
 
-import pandas as pd
-import numpy as np
+import argparse
 import os
 
 # â”€â”€ Paths â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
@@ -13,83 +12,167 @@ BASE_DIR   = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 INPUT_FILE = os.path.join(BASE_DIR, "Hopsital Dataset.csv")
 OUTPUT_DIR = os.path.join(BASE_DIR, "cleaned")
 OUTPUT_FILE = os.path.join(OUTPUT_DIR, "hospital_cleaned.csv")
+COLUMNAR_DIR = os.path.join(OUTPUT_DIR, "hospital_cleaned")
+CAPS_FILE   = os.path.join(OUTPUT_DIR, "hospital_caps.pkl")
+CODES_FILE  = os.path.join(OUTPUT_DIR, "hospital_codes.json")
 
-# â”€â”€ 1. Load â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
-df = pd.read_csv(INPUT_FILE)
-print(f"[1] Loaded  â†’  {df.shape[0]} rows Ã— {df.shape[1]} cols")
-
-# â”€â”€ 2. Remove embedded header rows â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
-#   The raw file contains duplicate header rows mixed into the data.
-#   Detected by sentinel values: Gender='Sex', Route='Route', Frequency='Freq'/'Frequency'
-header_mask = (
-    df["Gender"].isin(["Sex", "Gender"]) |
-    df["Route"].isin(["Route"]) |
-    df["Frequency"].isin(["Freq", "Frequency"])
-)
-removed_headers = header_mask.sum()
-df = df[~header_mask].reset_index(drop=True)
-print(f"[2] Removed {removed_headers} embedded header rows  â†’  {df.shape[0]} rows")
-
-# â”€â”€ 3. Drop duplicate rows â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
-dupes = df.duplicated().sum()
-df = df.drop_duplicates().reset_index(drop=True)
-print(f"[3] Dropped {dupes} duplicate rows  â†’  {df.shape[0]} rows")
-
-# â”€â”€ 4. Fix data types â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
-df["Age"]            = pd.to_numeric(df["Age"], errors="coerce")
-df["Dosage (gram)"]  = pd.to_numeric(df["Dosage (gram)"], errors="coerce")
-df["Duration (days)"] = pd.to_numeric(df["Duration (days)"], errors="coerce")
-df["Date of Data Entry"] = pd.to_datetime(df["Date of Data Entry"],
-                                           dayfirst=True, errors="coerce")
-print(f"[4] Fixed dtypes  â€”  Age, Dosage, Duration â†’ numeric; Date â†’ datetime")
-
-# â”€â”€ 5. Extract datetime features â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
-df["entry_year"]        = df["Date of Data Entry"].dt.year
-df["entry_month"]       = df["Date of Data Entry"].dt.month
-df["entry_day_of_week"] = df["Date of Data Entry"].dt.dayofweek   # 0=Monday
-df["entry_hour"]        = df["Date of Data Entry"].dt.hour
-df = df.drop(columns=["Date of Data Entry"])
-print("[5] Extracted year / month / day_of_week / hour from Date of Data Entry")
-
-# â”€â”€ 6. Standardise text columns â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
-text_cols = ["Gender", "Diagnosis", "Name of Drug", "Route", "Frequency", "Indication"]
-for col in text_cols:
-    df[col] = df[col].astype(str).str.strip().str.lower()
-print(f"[6] Standardised text (strip + lower): {text_cols}")
-
-# â”€â”€ 7. Handle 1 missing Indication â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
-missing_ind = df["Indication"].isna().sum() + (df["Indication"] == "nan").sum()
-df["Indication"] = df["Indication"].replace("nan", np.nan)
-df["Indication"] = df["Indication"].fillna("unknown")
-print(f"[7] Filled {missing_ind} missing Indication value(s) with 'unknown'")
-
-# â”€â”€ 8. Encode Gender â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
-df["Gender"] = df["Gender"].map({"male": 1, "female": 0})
-unmapped_gender = df["Gender"].isna().sum()
-if unmapped_gender:
-    print(f"    WARNING: {unmapped_gender} Gender rows could not be mapped â†’ set to NaN")
-print("[8] Encoded Gender  â†’  male=1 / female=0")
-
-# â”€â”€ 9. Outlier capping (Winsorization) on numeric clinical columns â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
-def winsorise(series, lower_pct=0.01, upper_pct=0.99):
-    lo = series.quantile(lower_pct)
-    hi = series.quantile(upper_pct)
-    capped = series.clip(lower=lo, upper=hi)
-    n_capped = ((series < lo) | (series > hi)).sum()
-    return capped, lo, hi, n_capped
-
-for col in ["Age", "Dosage (gram)", "Duration (days)"]:
-    df[col], lo, hi, n = winsorise(df[col])
-    print(f"[9] Winsorised '{col}'  â†’  clipped {n} values to [{lo:.2f}, {hi:.2f}]")
-
-# â”€â”€ 10. Final state â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
-print(f"\n[10] Final shape: {df.shape[0]} rows Ã— {df.shape[1]} cols")
-print("     Missing values remaining:")
-print(df.isnull().sum()[df.isnull().sum() > 0].to_string() or "     None")
-print("\n     Dtypes:")
-print(df.dtypes.to_string())
-
-# â”€â”€ 11. Save â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
-df.to_csv(OUTPUT_FILE, index=False)
-print(f"\n[11] Saved  â†’  {OUTPUT_FILE}")
 
+def main(argv=None):
+    # â”€â”€ Streaming mode â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
+    #   --stream processes the CSV in fixed-size chunks with flat memory use
+    #   (see hospital_stream.py); the default is the in-memory run below.
+    parser = argparse.ArgumentParser(description="Clean Hopsital Dataset.csv")
+    parser.add_argument("--input", default=INPUT_FILE,
+                        help="raw prescription export (default: Hopsital Dataset.csv)")
+    parser.add_argument("--stream", action="store_true",
+                        help="chunked, bounded-memory mode for very large exports")
+    parser.add_argument("--chunksize", type=int, default=100_000,
+                        help="rows per chunk in --stream mode (default: 100000)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="clean only rows appended since the last run (see incremental.py)")
+    parser.add_argument("--drift-threshold", type=float, default=0.05,
+                        help="relative cap-bound change that forces a full refit in "
+                             "--incremental mode (default: 0.05)")
+    parser.add_argument("--format", choices=["csv", "columnar", "both"], default="csv",
+                        help="cleaned output as CSV, as a compressed columnar table "
+                             "(see columnar.py) or both (default: csv)")
+    args = parser.parse_args(argv)
+    if args.stream and args.incremental:
+        parser.error("--stream and --incremental cannot be combined")
+    if (args.stream or args.incremental) and args.format != "csv":
+        parser.error("--stream and --incremental write CSV only")
+    input_file = args.input
+    #   The saved code tables describe the real export only; other inputs
+    #   (benchmarks, ad-hoc files) get fresh tables that are not saved.
+    codes_file = CODES_FILE if os.path.abspath(input_file) == INPUT_FILE else None
+
+    # Imported only now: --help and the package CLI start without pandas
+    from .code_tables import CodeTables
+    from .columnar import write_table
+    from .date_parsing import DateParser
+    from .hospital_steps import (CAP_COLS, TEXT_COLS, add_entry_features, encode_gender,
+                                 fill_missing_indication, fix_dtypes, header_mask,
+                                 standardise_text)
+    from .ingest import load_table
+    from .profiling import StageProfiler
+    from .winsorizer import Winsorizer
+
+    prof = StageProfiler("01_hospital_cleaning")
+
+    if args.stream:
+        from .hospital_stream import stream_clean
+        stream_clean(input_file, OUTPUT_FILE, CAPS_FILE, chunksize=args.chunksize,
+                     codes_file=codes_file, prof=prof)
+        return
+
+    # â”€â”€ Incremental mode â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
+    #   Appends the new rows with the saved bounds and code tables; falls through
+    #   to the full run below (which re-seeds the store) when that is not possible
+    #   or the cap bounds have drifted.
+    store = None
+    if args.incremental:
+        from .incremental import DeltaStore, hospital_delta
+        store = DeltaStore("hospital", input_file, OUTPUT_FILE)
+        if store.can_append and hospital_delta(store, CAPS_FILE, codes_file,
+                                               args.drift_threshold, prof):
+            return
+        print(f"    Full run  â€”  {store.reason}\n")
+
+    # â”€â”€ 1. Load â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
+    #   Read as text, as --stream does (the embedded header rows make every column
+    #   text anyway); --incremental fingerprints these raw rows for later runs.
+    df, from_cache = load_table(input_file, dtype=str)
+    if store is not None:
+        store.add_new(df)
+    print(f"[1] Loaded  â†’  {df.shape[0]} rows Ã— {df.shape[1]} cols"
+          f"  ({'columnar cache' if from_cache else 'parsed CSV, cache written'})")
+    prof.mark(1, "load", df)
+
+    # â”€â”€ 2. Remove embedded header rows â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
+    #   The raw file contains duplicate header rows mixed into the data.
+    #   Detected by sentinel values: Gender='Sex', Route='Route', Frequency='Freq'/'Frequency'
+    is_header = header_mask(df)
+    removed_headers = is_header.sum()
+    df = df[~is_header].reset_index(drop=True)
+    print(f"[2] Removed {removed_headers} embedded header rows  â†’  {df.shape[0]} rows")
+    prof.mark(2, "remove header rows", df)
+
+    # â”€â”€ 3. Drop duplicate rows â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
+    dupes = df.duplicated().sum()
+    df = df.drop_duplicates().reset_index(drop=True)
+    print(f"[3] Dropped {dupes} duplicate rows  â†’  {df.shape[0]} rows")
+    prof.mark(3, "drop duplicates", df)
+
+    # â”€â”€ 4. Fix data types â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
+    #   Each distinct entry-date string is parsed once, with the format(s)
+    #   detected from a sample; see date_parsing.py.
+    dates = DateParser()
+    fix_dtypes(df, dates)
+    print(f"[4] Fixed dtypes  â€”  Age, Dosage, Duration â†’ numeric; Date â†’ datetime")
+    print(f"    Dates: {dates.summary()}")
+    prof.mark(4, "fix dtypes", df)
+
+    # â”€â”€ 5. Extract datetime features â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
+    df = add_entry_features(df)
+    print("[5] Extracted year / month / day_of_week / hour from Date of Data Entry")
+    prof.mark(5, "datetime features", df)
+
+    # â”€â”€ 6. Standardise text columns â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
+    #   Normalised once per distinct value; the columns stay categorical with
+    #   codes from the saved code tables (stable across runs, extended if needed).
+    codes = CodeTables.load(codes_file) if codes_file else CodeTables()
+    standardise_text(df, codes)
+    print(f"[6] Standardised text (strip + lower): {TEXT_COLS}")
+    prof.mark(6, "standardise text", df)
+
+    # â”€â”€ 7. Handle 1 missing Indication â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
+    missing_ind = fill_missing_indication(df, codes)
+    print(f"[7] Filled {missing_ind} missing Indication value(s) with 'unknown'")
+    if codes_file:
+        codes.save(codes_file)
+        print(f"    Code tables saved  â†’  {codes_file}")
+    prof.mark(7, "fill Indication", df)
+
+    # â”€â”€ 8. Encode Gender â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
+    unmapped_gender = encode_gender(df)
+    if unmapped_gender:
+        print(f"    WARNING: {unmapped_gender} Gender rows could not be mapped â†’ set to NaN")
+    print("[8] Encoded Gender  â†’  male=1 / female=0")
+    prof.mark(8, "encode Gender", df)
+
+    # â”€â”€ 9. Outlier capping (Winsorization) on numeric clinical columns â”€â”€â”€â”€â”€â”€â”€â”€
+    if store is not None:
+        store.observe_raw(df, CAP_COLS)          # value counts for later drift checks
+    capper = Winsorizer(lower_pct=0.01, upper_pct=0.99)
+    n_capped = capper.fit_transform(df, CAP_COLS)
+    for col, n in n_capped.items():
+        lo, hi = capper.lower_[col], capper.upper_[col]
+        print(f"[9] Winsorised '{col}'  â†’  clipped {n} values to [{lo:.2f}, {hi:.2f}]")
+    capper.save(CAPS_FILE)
+    print(f"    Cap bounds saved  â†’  {CAPS_FILE}")
+    prof.mark(9, "winsorise", df)
+
+    # â”€â”€ 10. Final state â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
+    print(f"\n[10] Final shape: {df.shape[0]} rows Ã— {df.shape[1]} cols")
+    print("     Missing values remaining:")
+    print(df.isnull().sum()[df.isnull().sum() > 0].to_string() or "     None")
+    print("\n     Dtypes:")
+    print(df.dtypes.to_string())
+    prof.mark(10, "summary", df)
+
+    # â”€â”€ 11. Save â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
+    print()
+    if args.format in ("csv", "both"):
+        df.to_csv(OUTPUT_FILE, index=False)
+        print(f"[11] Saved  â†’  {OUTPUT_FILE}")
+    if args.format in ("columnar", "both"):
+        write_table(df, COLUMNAR_DIR)
+        print(f"[11] Saved columnar  â†’  {COLUMNAR_DIR}")
+    if store is not None:
+        store.commit(df, date_formats=dates.formats)
+        print(f"     Incremental state saved  â†’  {store.dir}")
+    prof.mark(11, "save", df)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,76 +4,143 @@ Dataset : Medicaldataset.csv  (Cardiac / Heart-Attack Prediction)
 Output  : cleaned/medical_cleaned.csv
 """
 
-import pandas as pd
-import numpy as np
-from sklearn.preprocessing import StandardScaler
-import pickle
+import argparse
 import os
+import pickle
 
 # â”€â”€ Paths â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
 BASE_DIR    = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 INPUT_FILE  = os.path.join(BASE_DIR, "Medicaldataset.csv")
 OUTPUT_DIR  = os.path.join(BASE_DIR, "cleaned")
 OUTPUT_FILE = os.path.join(OUTPUT_DIR, "medical_cleaned.csv")
+COLUMNAR_DIR = os.path.join(OUTPUT_DIR, "medical_cleaned")
 SCALER_FILE = os.path.join(OUTPUT_DIR, "medical_scaler.pkl")
+CAPS_FILE   = os.path.join(OUTPUT_DIR, "medical_caps.pkl")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Clean Medicaldataset.csv")
+    parser.add_argument("--input", default=INPUT_FILE,
+                        help="cardiac extract (default: Medicaldataset.csv)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="clean only rows appended since the last run (see incremental.py)")
+    parser.add_argument("--drift-threshold", type=float, default=0.05,
+                        help="relative cap-bound / scaler change that forces a full refit "
+                             "in --incremental mode (default: 0.05)")
+    parser.add_argument("--format", choices=["csv", "columnar", "both"], default="csv",
+                        help="cleaned output as CSV, as a compressed columnar table "
+                             "(see columnar.py) or both (default: csv)")
+    args = parser.parse_args(argv)
+    if args.incremental and args.format != "csv":
+        parser.error("--incremental writes CSV only")
+    input_file = args.input
+
+    # Imported only now: --help and the package CLI start without pandas / sklearn
+    from sklearn.preprocessing import StandardScaler
+
+    from .columnar import write_table
+    from .ingest import load_table
+    from .medical_schema import NUMERIC_COLS, RESULT_MAP
+    from .profiling import StageProfiler
+    from .winsorizer import Winsorizer
+
+    prof = StageProfiler("02_medical_cleaning")
+
+    # â”€â”€ Incremental mode â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
+    #   Appends the new rows capped and scaled with the saved parameters; falls
+    #   through to the full run below when that is not possible or they drifted.
+    store = None
+    if args.incremental:
+        from .incremental import DeltaStore, medical_delta
+        store = DeltaStore("medical", input_file, OUTPUT_FILE)
+        if store.can_append:
+            with open(SCALER_FILE, "rb") as f:
+                saved_scaler = pickle.load(f)
+            if medical_delta(store, CAPS_FILE, saved_scaler, args.drift_threshold, prof):
+                return
+        print(f"    Full run  â€”  {store.reason}\n")
+
+    # â”€â”€ 1. Load â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
+    df, from_cache = load_table(input_file)
+    print(f"[1] Loaded  â†’  {df.shape[0]} rows Ã— {df.shape[1]} cols"
+          f"  ({'columnar cache' if from_cache else 'parsed CSV, cache written'})")
+    print(f"    Columns: {df.columns.tolist()}")
+    prof.mark(1, "load", df)
+
+    # â”€â”€ 2. Verify no missing values / duplicates â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
+    print(f"\n[2] Missing values:\n{df.isnull().sum().to_string()}")
+    print(f"    Duplicate rows: {df.duplicated().sum()}")
+    prof.mark(2, "missing / duplicate check", df)
+
+    # â”€â”€ 3. Encode target column â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
+    df["Result"] = df["Result"].str.strip().str.lower().map(RESULT_MAP)
+    print(f"\n[3] Encoded 'Result'  â†’  positive=1 / negative=0")
+    print(f"    Class distribution:\n{df['Result'].value_counts().to_string()}")
+    pos_pct = df["Result"].mean() * 100
+    print(f"    Class imbalance  â†’  {pos_pct:.1f}% positive  (flag for modeling phase)")
+    prof.mark(3, "encode Result", df)
+
+    # â”€â”€ 4. Verify Gender encoding â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
+    print(f"\n[4] Gender unique values: {sorted(df['Gender'].unique())}")
+    print("    Gender already binary-encoded (0=Female / 1=Male) â€” no action needed")
+    prof.mark(4, "check Gender", df)
+
+    # â”€â”€ 5. Outlier detection and capping (IQR Winsorization) â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
+    numeric_cols = NUMERIC_COLS
+
+    print("\n[5] Outlier capping (IQR-based, 1stâ€“99th percentile):")
+    if store is not None:
+        store.observe_raw(df, numeric_cols)      # value counts for later drift checks
+    capper = Winsorizer(lower_pct=0.01, upper_pct=0.99)
+    n_capped = capper.fit_transform(df, numeric_cols)
+    outlier_report = []
+    for col in numeric_cols:
+        lo, hi, n = capper.lower_[col], capper.upper_[col], n_capped[col]
+        outlier_report.append({"column": col, "lower_cap": round(lo, 4),
+                                "upper_cap": round(hi, 4), "values_capped": n})
+        print(f"    {col:35s}  capped {n:3d} values  â†’  [{lo:.4f}, {hi:.4f}]")
+    capper.save(CAPS_FILE)
+    print(f"    Cap bounds saved  â†’  {CAPS_FILE}")
+    prof.mark(5, "winsorise", df)
+
+    # â”€â”€ 6. Feature scaling â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
+    #   Scale only continuous numeric columns (not Gender or the target Result).
+    scale_cols = numeric_cols  # Age + 6 vitals/labs
+
+    if store is not None:
+        store.observe_capped(df, scale_cols)     # mean / variance for later drift checks
+    scaler    = StandardScaler()
+    scaled_df = df.copy()
+    scaled_df[scale_cols] = scaler.fit_transform(df[scale_cols])
+
+    print(f"\n[6] StandardScaler applied to: {scale_cols}")
+    print("    Scaler saved for inverse-transform at modeling stage.")
+
+    # Persist the scaler
+    with open(SCALER_FILE, "wb") as f:
+        pickle.dump(scaler, f)
+    print(f"    Scaler written  â†’  {SCALER_FILE}")
+    prof.mark(6, "scale", scaled_df)
+
+    # â”€â”€ 7. Summary statistics post-cleaning â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
+    print(f"\n[7] Post-cleaning shape: {scaled_df.shape[0]} rows Ã— {scaled_df.shape[1]} cols")
+    print("    Describe (scaled numeric cols):")
+    print(scaled_df[scale_cols].describe().round(4).to_string())
+    prof.mark(7, "summary", scaled_df)
+
+    # â”€â”€ 8. Save â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
+    print()
+    if args.format in ("csv", "both"):
+        scaled_df.to_csv(OUTPUT_FILE, index=False)
+        print(f"[8] Saved  â†’  {OUTPUT_FILE}")
+    if args.format in ("columnar", "both"):
+        write_table(scaled_df, COLUMNAR_DIR)
+        print(f"[8] Saved columnar  â†’  {COLUMNAR_DIR}")
+    if store is not None:
+        store.commit(scaled_df)
+        print(f"    Incremental state saved  â†’  {store.dir}")
+    prof.mark(8, "save", scaled_df)
 
-# â”€â”€ 1. Load â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
-df = pd.read_csv(INPUT_FILE)
-print(f"[1] Loaded  â†’  {df.shape[0]} rows Ã— {df.shape[1]} cols")
-print(f"    Columns: {df.columns.tolist()}")
-
-# â”€â”€ 2. Verify no missing values / duplicates â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
-print(f"\n[2] Missing values:\n{df.isnull().sum().to_string()}")
-print(f"    Duplicate rows: {df.duplicated().sum()}")
-
-# â”€â”€ 3. Encode target column â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
-df["Result"] = df["Result"].str.strip().str.lower().map({"positive": 1, "negative": 0})
-print(f"\n[3] Encoded 'Result'  â†’  positive=1 / negative=0")
-print(f"    Class distribution:\n{df['Result'].value_counts().to_string()}")
-pos_pct = df["Result"].mean() * 100
-print(f"    Class imbalance  â†’  {pos_pct:.1f}% positive  (flag for modeling phase)")
-
-# â”€â”€ 4. Verify Gender encoding â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
-print(f"\n[4] Gender unique values: {sorted(df['Gender'].unique())}")
-print("    Gender already binary-encoded (0=Female / 1=Male) â€” no action needed")
-
-# â”€â”€ 5. Outlier detection and capping (IQR Winsorization) â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
-numeric_cols = ["Age", "Heart rate", "Systolic blood pressure",
-                "Diastolic blood pressure", "Blood sugar", "CK-MB", "Troponin"]
-
-print("\n[5] Outlier capping (IQR-based, 1stâ€“99th percentile):")
-outlier_report = []
-for col in numeric_cols:
-    lo  = df[col].quantile(0.01)
-    hi  = df[col].quantile(0.99)
-    n   = ((df[col] < lo) | (df[col] > hi)).sum()
-    df[col] = df[col].clip(lower=lo, upper=hi)
-    outlier_report.append({"column": col, "lower_cap": round(lo, 4),
-                            "upper_cap": round(hi, 4), "values_capped": n})
-    print(f"    {col:35s}  capped {n:3d} values  â†’  [{lo:.4f}, {hi:.4f}]")
-
-# â”€â”€ 6. Feature scaling â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
-#   Scale only continuous numeric columns (not Gender or the target Result).
-scale_cols = numeric_cols  # Age + 6 vitals/labs
-
-scaler    = StandardScaler()
-scaled_df = df.copy()
-scaled_df[scale_cols] = scaler.fit_transform(df[scale_cols])
-
-print(f"\n[6] StandardScaler applied to: {scale_cols}")
-print("    Scaler saved for inverse-transform at modeling stage.")
-
-# Persist the scaler
-with open(SCALER_FILE, "wb") as f:
-    pickle.dump(scaler, f)
-print(f"    Scaler written  â†’  {SCALER_FILE}")
-
-# â”€â”€ 7. Summary statistics post-cleaning â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
-print(f"\n[7] Post-cleaning shape: {scaled_df.shape[0]} rows Ã— {scaled_df.shape[1]} cols")
-print("    Describe (scaled numeric cols):")
-print(scaled_df[scale_cols].describe().round(4).to_string())
-
-# â”€â”€ 8. Save â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
-scaled_df.to_csv(OUTPUT_FILE, index=False)
-print(f"\n[8] Saved  â†’  {OUTPUT_FILE}")
 
+if __name__ == "__main__":
+    main()
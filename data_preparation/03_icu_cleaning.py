@@ -4,13 +4,14 @@ Dataset : Kaggle_Sirio_Libanes_ICU_Prediction.xlsx  (ICU Admission Prediction)
 Outputs :
   cleaned/icu_cleaned_full.csv      â€” all 5 time-windows, imputed & scaled
   cleaned/icu_cleaned_window0_2.csv â€” first window only (0-2h), for early-admission models
+  cleaned/icu_cleaned_full/         â€” with --format columnar: compressed, one partition per WINDOW
+  cleaned/icu_tensor/               â€” with --tensor: patients Ã— 5 windows Ã— features, memory-mappable
+  cleaned/icu_corr/                 â€” with --correlation: Pearson matrix of all features + ICU, float32, memory-mappable
 """
 
-import pandas as pd
-import numpy as np
-from sklearn.preprocessing import StandardScaler
-import pickle
+import argparse
 import os
+import pickle
 
 # â”€â”€ Paths â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
 BASE_DIR       = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -18,104 +19,211 @@ INPUT_FILE     = os.path.join(BASE_DIR, "Kaggle_Sirio_Libanes_ICU_Prediction.xls
 OUTPUT_DIR     = os.path.join(BASE_DIR, "cleaned")
 OUTPUT_FULL    = os.path.join(OUTPUT_DIR, "icu_cleaned_full.csv")
 OUTPUT_W02     = os.path.join(OUTPUT_DIR, "icu_cleaned_window0_2.csv")
+COLUMNAR_DIR   = os.path.join(OUTPUT_DIR, "icu_cleaned_full")
+CORR_DIR       = os.path.join(OUTPUT_DIR, "icu_corr")
 SCALER_FILE    = os.path.join(OUTPUT_DIR, "icu_scaler.pkl")
-
-# â”€â”€ 1. Load â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
-print("[1] Loading Excel file (may take a moment)â€¦")
-df = pd.read_excel(INPUT_FILE)
-print(f"    Loaded  â†’  {df.shape[0]} rows Ã— {df.shape[1]} cols")
-print(f"    Unique patients : {df['PATIENT_VISIT_IDENTIFIER'].nunique()}")
-print(f"    Windows per patient: {df.groupby('PATIENT_VISIT_IDENTIFIER').size().value_counts().to_dict()}")
-print(f"    ICU distribution:\n{df['ICU'].value_counts().to_string()}")
-
-# â”€â”€ 2. Sort by patient + time window â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
-WINDOW_ORDER = {"0-2": 0, "2-4": 1, "4-6": 2, "6-12": 3, "ABOVE_12": 4}
-df["WINDOW_ORDER"] = df["WINDOW"].map(WINDOW_ORDER)
-df = df.sort_values(["PATIENT_VISIT_IDENTIFIER", "WINDOW_ORDER"]).reset_index(drop=True)
-print("\n[2] Sorted by PATIENT_VISIT_IDENTIFIER â†’ WINDOW order")
-
-# â”€â”€ 3. Ordinal-encode AGE_PERCENTIL â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
-age_map = {
-    "10th": 1, "20th": 2, "30th": 3, "40th": 4, "50th": 5,
-    "60th": 6, "70th": 7, "80th": 8, "90th": 9, "Above 90th": 10
-}
-df["AGE_PERCENTIL"] = df["AGE_PERCENTIL"].map(age_map)
-unmapped = df["AGE_PERCENTIL"].isna().sum()
-print(f"\n[3] Ordinal-encoded AGE_PERCENTIL (10th=1 â€¦ Above90th=10)  |  unmapped: {unmapped}")
-
-# â”€â”€ 4. Identify column groups â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
-ID_COLS      = ["PATIENT_VISIT_IDENTIFIER", "WINDOW", "WINDOW_ORDER"]
-TARGET_COL   = "ICU"
-# Columns that are fully present (demographic / disease flags)
-DEMO_COLS    = ["AGE_ABOVE65", "AGE_PERCENTIL", "GENDER",
-                "DISEASE GROUPING 1", "DISEASE GROUPING 2", "DISEASE GROUPING 3",
-                "DISEASE GROUPING 4", "DISEASE GROUPING 5", "DISEASE GROUPING 6",
-                "HTN", "IMMUNOCOMPROMISED", "OTHER"]
-# All remaining columns (lab / vital statistics per window) are continuous
-CONTINUOUS_COLS = [c for c in df.columns
-                   if c not in ID_COLS + [TARGET_COL] + DEMO_COLS]
-
-print(f"\n[4] Column groups:")
-print(f"    Demo / flag cols : {len(DEMO_COLS)}")
-print(f"    Continuous cols  : {len(CONTINUOUS_COLS)}")
-
-# â”€â”€ 5. Missing value analysis â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
-miss_before = df[CONTINUOUS_COLS].isnull().sum().sum()
-miss_pct    = df[CONTINUOUS_COLS].isnull().mean() * 100
-print(f"\n[5] Missing values BEFORE imputation: {miss_before:,}")
-print(f"    Continuous cols with >50% missing: {(miss_pct > 50).sum()}")
-
-# â”€â”€ 6. Within-patient forward-fill then backward-fill â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
-#   Clinical vitals tend to be stable across adjacent windows â€” fill from
-#   the nearest observed measurement for the same patient.
-df[CONTINUOUS_COLS] = (
-    df.groupby("PATIENT_VISIT_IDENTIFIER")[CONTINUOUS_COLS]
-    .transform(lambda x: x.ffill().bfill())
-)
-miss_after_ffill = df[CONTINUOUS_COLS].isnull().sum().sum()
-print(f"\n[6] After within-patient ffill+bfill: {miss_after_ffill:,} missing remaining")
-
-# â”€â”€ 7. Median imputation for any remaining missing values â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
-col_medians = df[CONTINUOUS_COLS].median()
-df[CONTINUOUS_COLS] = df[CONTINUOUS_COLS].fillna(col_medians)
-miss_after_median = df[CONTINUOUS_COLS].isnull().sum().sum()
-print(f"[7] After global median imputation:    {miss_after_median:,} missing remaining")
-
-# â”€â”€ 8. Outlier capping on continuous columns (1stâ€“99th percentile) â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
-print("\n[8] Winsorising continuous columns (1stâ€“99th percentile)â€¦")
-total_capped = 0
-for col in CONTINUOUS_COLS:
-    lo = df[col].quantile(0.01)
-    hi = df[col].quantile(0.99)
-    n  = ((df[col] < lo) | (df[col] > hi)).sum()
-    df[col] = df[col].clip(lower=lo, upper=hi)
-    total_capped += n
-print(f"    Total values capped across all continuous cols: {total_capped:,}")
-
-# â”€â”€ 9. Feature scaling â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
-scaler = StandardScaler()
-df_scaled = df.copy()
-df_scaled[CONTINUOUS_COLS] = scaler.fit_transform(df[CONTINUOUS_COLS])
-
-with open(SCALER_FILE, "wb") as f:
-    pickle.dump(scaler, f)
-print(f"\n[9] StandardScaler applied to {len(CONTINUOUS_COLS)} continuous columns.")
-print(f"    Scaler saved  â†’  {SCALER_FILE}")
-
-# â”€â”€ 10. Final summary â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
-print(f"\n[10] Final shape (full):     {df_scaled.shape[0]} rows Ã— {df_scaled.shape[1]} cols")
-print(f"     Missing values: {df_scaled.drop(columns=ID_COLS).isnull().sum().sum()}")
-print(f"     ICU distribution:\n{df_scaled[TARGET_COL].value_counts().to_string()}")
-
-# â”€â”€ 11. Save full dataset â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
-save_cols = [c for c in df_scaled.columns if c != "WINDOW_ORDER"]
-df_scaled[save_cols].to_csv(OUTPUT_FULL, index=False)
-print(f"\n[11] Saved full dataset  â†’  {OUTPUT_FULL}")
-
-# â”€â”€ 12. Save first-window (0-2h) dataset for early-admission models â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
-df_w02 = df_scaled[df_scaled["WINDOW"] == "0-2"][save_cols].reset_index(drop=True)
-df_w02 = df_w02.drop(columns=["PATIENT_VISIT_IDENTIFIER", "WINDOW"])
-print(f"\n[12] First-window (0-2h) subset: {df_w02.shape[0]} rows Ã— {df_w02.shape[1]} cols")
-df_w02.to_csv(OUTPUT_W02, index=False)
-print(f"     Saved  â†’  {OUTPUT_W02}")
-
+CAPS_FILE      = os.path.join(OUTPUT_DIR, "icu_caps.pkl")
+MEDIANS_FILE   = os.path.join(OUTPUT_DIR, "icu_medians.pkl")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Clean the Sirio-Libanes ICU dataset")
+    parser.add_argument("--input", default=INPUT_FILE,
+                        help="ICU extract, .xlsx or .csv (default: the Kaggle workbook)")
+    parser.add_argument("--float32", action="store_true",
+                        help="hold the lab / vital statistics as float32 (half the memory; "
+                             "values differ from the float64 default in the last digits)")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="worker processes for steps 6â€“9, 0 = one per CPU (default: 1; "
+                             "the output does not depend on it)")
+    parser.add_argument("--format", choices=["csv", "columnar", "both"], default="csv",
+                        help="cleaned output as CSV, as a compressed columnar table "
+                             "(see columnar.py) or both (default: csv)")
+    parser.add_argument("--tensor", action="store_true",
+                        help="also write the patient Ã— window Ã— feature tensor store "
+                             "(cleaned/icu_tensor/, read by cv_folds.py)")
+    parser.add_argument("--correlation", action="store_true",
+                        help="also write the Pearson matrix of every feature and ICU "
+                             "(cleaned/icu_corr/)")
+    args = parser.parse_args(argv)
+
+    # Imported only now: --help and the package CLI start without pandas / sklearn
+    import numpy as np
+    import pandas as pd
+
+    from .column_parallel import ColumnRunner, default_jobs
+    from .columnar import write_table
+    from .correlation import correlation_matrix
+    from .icu_schema import AGE_MAP, DEMO_COLS, ID_COLS, TARGET_COL, WINDOW_ORDER, continuous_cols
+    from .ingest import load_table
+    from .icu_tensor import TENSOR_DIR, write_tensor
+    from .profiling import StageProfiler
+
+    args.jobs = args.jobs or default_jobs()
+    input_file = args.input
+    prof = StageProfiler("03_icu_cleaning", memory_table=True)
+
+    # â”€â”€ 1. Load â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
+    #   The workbook is parsed only when it changes; otherwise the typed columnar
+    #   cache under .cache/ingest/ is loaded instead.
+    input_format = os.path.splitext(input_file)[1].lstrip(".").lower()
+    print(f"[1] Loading {input_file} ({input_format}; first run after a change may take a moment)â€¦")
+    df, from_cache = load_table(input_file)
+    print(f"    Loaded  â†’  {df.shape[0]} rows Ã— {df.shape[1]} cols"
+          f"  ({'columnar cache' if from_cache else f'parsed {input_format}, cache written'})")
+    print(f"    Unique patients : {df['PATIENT_VISIT_IDENTIFIER'].nunique()}")
+    print(f"    Windows per patient: {df.groupby('PATIENT_VISIT_IDENTIFIER').size().value_counts().to_dict()}")
+    print(f"    ICU distribution:\n{df['ICU'].value_counts().to_string()}")
+    prof.mark(1, "load", df)
+
+    # â”€â”€ 2. Sort by patient + time window â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
+    df["WINDOW_ORDER"] = df["WINDOW"].map(WINDOW_ORDER)
+    df = df.sort_values(["PATIENT_VISIT_IDENTIFIER", "WINDOW_ORDER"]).reset_index(drop=True)
+    print("\n[2] Sorted by PATIENT_VISIT_IDENTIFIER â†’ WINDOW order")
+    prof.mark(2, "sort", df)
+
+    # â”€â”€ 3. Ordinal-encode AGE_PERCENTIL â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
+    df["AGE_PERCENTIL"] = df["AGE_PERCENTIL"].map(AGE_MAP)
+    unmapped = df["AGE_PERCENTIL"].isna().sum()
+    print(f"\n[3] Ordinal-encoded AGE_PERCENTIL (10th=1 â€¦ Above90th=10)  |  unmapped: {unmapped}")
+    prof.mark(3, "encode AGE_PERCENTIL", df)
+
+    # â”€â”€ 4. Identify column groups â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
+    #   ID_COLS / TARGET_COL / DEMO_COLS are defined in icu_schema.py; all
+    #   remaining columns (lab / vital statistics per window) are continuous.
+    cont_cols = continuous_cols(df.columns)
+
+    print(f"\n[4] Column groups:")
+    print(f"    Demo / flag cols : {len(DEMO_COLS)}")
+    print(f"    Continuous cols  : {len(cont_cols)}")
+
+    #   Compact dtypes â€” exact for every column unless --float32 is given:
+    #   integer flags / target / window order â†’ int8, flags with gaps â†’ float32,
+    #   patient id â†’ int32, WINDOW â†’ categorical.
+    size_before = df.memory_usage(deep=True).sum()
+    for col in DEMO_COLS + [TARGET_COL, "WINDOW_ORDER"]:
+        values = df[col]
+        if values.dtype.kind not in "iuf" or not (values.dropna() % 1 == 0).all():
+            continue
+        if values.notna().all() and values.between(-128, 127).all():
+            df[col] = values.astype(np.int8)
+        elif values.dtype.kind == "f" and values.abs().max() < 2**24:
+            df[col] = values.astype(np.float32)
+    if df["PATIENT_VISIT_IDENTIFIER"].abs().max() < 2**31:
+        df["PATIENT_VISIT_IDENTIFIER"] = df["PATIENT_VISIT_IDENTIFIER"].astype(np.int32)
+    df["WINDOW"] = df["WINDOW"].astype(pd.CategoricalDtype(list(WINDOW_ORDER)))
+    if args.float32:
+        df[cont_cols] = df[cont_cols].astype(np.float32)
+    print(f"    Compacted dtypes: {size_before / 2**20:,.1f} MB â†’ "
+          f"{df.memory_usage(deep=True).sum() / 2**20:,.1f} MB"
+          f"{'  (float32 statistics)' if args.float32 else ''}")
+    prof.mark(4, "compact dtypes", df)
+
+    # â”€â”€ 5. Missing value analysis â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
+    miss_before = df[cont_cols].isnull().sum().sum()
+    miss_pct    = df[cont_cols].isnull().mean() * 100
+    print(f"\n[5] Missing values BEFORE imputation: {miss_before:,}")
+    print(f"    Continuous cols with >50% missing: {(miss_pct > 50).sum()}")
+    prof.mark(5, "missing value analysis", df)
+
+    # â”€â”€ 6. Within-patient forward-fill then backward-fill â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
+    #   Clinical vitals tend to be stable across adjacent windows â€” fill from
+    #   the nearest observed measurement for the same patient.
+    #   Rows are already sorted (step 2), so the fill is done for all patients at
+    #   once without a per-patient Python callback.
+    #   Steps 6â€“9 run per block of continuous columns (column_parallel.py): in
+    #   this process, or with --jobs N in N workers sharing the column matrix.
+    with ColumnRunner(df, "PATIENT_VISIT_IDENTIFIER", cont_cols, jobs=args.jobs) as runner:
+        miss_after_ffill, fill_rate = runner.ffill_bfill()
+        print(f"\n[6] After within-patient ffill+bfill: {miss_after_ffill:,} missing remaining")
+        print(f"    Fill throughput: {fill_rate:,.0f} rows/sec"
+              f"  ({runner.jobs} job(s), {len(runner.blocks)} column blocks)")
+        prof.mark(6, "ffill+bfill", df)
+
+        # â”€â”€ 7. Median imputation for any remaining missing values â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
+        col_medians, miss_after_median = runner.median_fill()
+        print(f"[7] After global median imputation:    {miss_after_median:,} missing remaining")
+        with open(MEDIANS_FILE, "wb") as f:
+            pickle.dump(col_medians.to_dict(), f)
+        print(f"    Column medians saved  â†’  {MEDIANS_FILE}")
+        prof.mark(7, "median imputation", df)
+
+        # â”€â”€ 8. Outlier capping on continuous columns (1stâ€“99th percentile) â”€â”€â”€â”€
+        print("\n[8] Winsorising continuous columns (1stâ€“99th percentile)â€¦")
+        capper, n_capped = runner.winsorise(lower_pct=0.01, upper_pct=0.99)
+        total_capped = n_capped.sum()
+        print(f"    Total values capped across all continuous cols: {total_capped:,}")
+        capper.save(CAPS_FILE)
+        print(f"    Cap bounds saved  â†’  {CAPS_FILE}")
+        prof.mark(8, "winsorise", df)
+
+        # â”€â”€ 9. Feature scaling â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
+        #   Fitted and applied block by block, in place.  Column statistics are
+        #   independent, so the merged scaler and the scaled values are identical
+        #   to scaler.fit_transform on all columns.
+        scaler = runner.scale()
+        df = runner.write_back(df)
+
+        with open(SCALER_FILE, "wb") as f:
+            pickle.dump(scaler, f)
+        print(f"\n[9] StandardScaler applied to {len(cont_cols)} continuous columns.")
+        print(f"    Scaler saved  â†’  {SCALER_FILE}")
+        prof.mark(9, "scale", df)
+
+    # â”€â”€ 10. Final summary â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
+    print(f"\n[10] Final shape (full):     {df.shape[0]} rows Ã— {df.shape[1]} cols")
+    print(f"     Missing values: {df.drop(columns=ID_COLS).isnull().sum().sum()}")
+    print(f"     ICU distribution:\n{df[TARGET_COL].value_counts().to_string()}")
+    prof.mark(10, "summary", df)
+
+    # â”€â”€ 11. Save full dataset â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
+    #   The columnar table is partitioned by WINDOW, so the 0-2h subset of step 12
+    #   is also a single partition of it.
+    save_cols = [c for c in df.columns if c != "WINDOW_ORDER"]
+    print()
+    if args.format in ("csv", "both"):
+        df.to_csv(OUTPUT_FULL, columns=save_cols, index=False)
+        print(f"[11] Saved full dataset  â†’  {OUTPUT_FULL}")
+    if args.format in ("columnar", "both"):
+        write_table(df, COLUMNAR_DIR, partition_by="WINDOW", columns=save_cols)
+        print(f"[11] Saved columnar, partitioned by WINDOW  â†’  {COLUMNAR_DIR}")
+    prof.mark(11, "save full", df)
+
+    # â”€â”€ 12. Save first-window (0-2h) dataset for early-admission models â”€â”€â”€â”€â”€â”€â”€
+    w02_cols = [c for c in save_cols if c not in ("PATIENT_VISIT_IDENTIFIER", "WINDOW")]
+    df_w02 = df.loc[df["WINDOW"] == "0-2", w02_cols].reset_index(drop=True)
+    print(f"\n[12] First-window (0-2h) subset: {df_w02.shape[0]} rows Ã— {df_w02.shape[1]} cols")
+    if args.format in ("csv", "both"):
+        df_w02.to_csv(OUTPUT_W02, index=False)
+        print(f"     Saved  â†’  {OUTPUT_W02}")
+    if args.format in ("columnar", "both"):
+        print(f"     Columnar: partition '0-2' of {COLUMNAR_DIR}")
+    prof.mark(12, "save 0-2h", df_w02)
+
+    # â”€â”€ 13. Save patient Ã— window Ã— feature tensor â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
+    #   Dense (patients, windows, features) array for sequence / early-admission
+    #   models; any window, window prefix or feature group is a zero-copy slice.
+    #   Opt-in (--tensor): the CSV users of this script do not pay for it.
+    if args.tensor:
+        shape = write_tensor(df, TENSOR_DIR)
+        print(f"\n[13] Tensor {shape[0]} patients Ã— {shape[1]} windows Ã— {shape[2]} features"
+              f"  â†’  {TENSOR_DIR}")
+        prof.mark(13, "save tensor", df)
+
+    # â”€â”€ 14. Save correlation matrix (all numeric columns) â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
+    #   Pearson over every feature and the target, blockwise in float32, for
+    #   feature screening (CorrelationMatrix.load(CORR_DIR).top_pairs()).
+    #   Opt-in (--correlation), like step 13.
+    if args.correlation:
+        corr_cols = [c for c in save_cols if c not in ID_COLS]
+        correlation_matrix(df, corr_cols, out_dir=CORR_DIR)
+        print(f"\n[14] Correlation matrix {len(corr_cols)} Ã— {len(corr_cols)}  â†’  {CORR_DIR}")
+        prof.mark(14, "correlation", df)
+
+    # â”€â”€ 15. Memory report â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
+    print("\n[15] Memory per stage (peak = highest RSS so far):")
+    prof.print_memory()
+
+
+if __name__ == "__main__":
+    main()
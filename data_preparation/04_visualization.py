@@ -4,24 +4,61 @@ Post-cleaning visualisation for all three datasets.
 Reads from: cleaned/hospital_cleaned.csv
             cleaned/medical_cleaned.csv
             cleaned/icu_cleaned_full.csv
+            (or their columnar tables cleaned/<name>/, whichever is newer;
+             only the columns the plots use are read â€” see PLOT_COLUMNS)
 Saves plots to: cleaned/plots/
+
+Each figure is a `plot_*` function; `--dataset` limits the run to one or
+more datasets so a plot group can start as soon as its CSV is ready.
+`--jobs N` renders the figures as independent tasks in a process pool and
+`--changed-only` skips every figure whose source CSV and plot code are
+unchanged since it was last drawn.  Per-plot render times are printed.
+
+Plots draw from small precomputed aggregates (histogram bins, box-plot
+statistics, value counts, group rates, correlations; see plot_summaries.py)
+rather than from the rows.  The aggregates are cached under
+.cache/plots/summaries/ per version of the data, so re-rendering a figure
+whose data has not changed does not read the data again.
 """
 
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.gridspec as gridspec
-import seaborn as sns
+import argparse
+import ast
+import functools
+import hashlib
+import json
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-# â”€â”€ Style â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
-sns.set_theme(style="whitegrid", palette="muted")
-plt.rcParams.update({"figure.dpi": 120, "font.size": 10})
+from .digests import file_digest
+from .profiling import StageProfiler
+
+#   Set by _plotting() on first use, so importing this module (or --help)
+#   does not load matplotlib, seaborn or pandas
+matplotlib = plt = gridspec = sns = np = pd = None
 
 BASE_DIR   = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 CLEAN_DIR  = os.path.join(BASE_DIR, "cleaned")
 PLOTS_DIR  = os.path.join(CLEAN_DIR, "plots")
-os.makedirs(PLOTS_DIR, exist_ok=True)
+STATE_FILE = os.path.join(BASE_DIR, ".cache", "plots", "state.json")
+SUMMARY_DIR = os.path.join(BASE_DIR, ".cache", "plots", "summaries")
+
+
+# â”€â”€ Style â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
+@functools.lru_cache(maxsize=None)
+def _plotting():
+    """Import the plotting libraries and set the style, once per process."""
+    global matplotlib, plt, gridspec, sns, np, pd
+    import matplotlib
+    matplotlib.use("Agg")   # files only, no display — also safe in worker processes
+    import matplotlib.gridspec as gridspec
+    import matplotlib.pyplot as plt
+    import numpy as np
+    import pandas as pd
+    import seaborn as sns
+    sns.set_theme(style="whitegrid", palette="muted")
+    plt.rcParams.update({"figure.dpi": 120, "font.size": 10})
+
 
 # â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
 # HELPER
@@ -30,214 +67,440 @@ def save(fig, name):
     path = os.path.join(PLOTS_DIR, name)
     fig.savefig(path, bbox_inches="tight")
     plt.close(fig)
-    print(f"  Saved  â†’  {path}")
+    return path
 
 
 # â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•
 # 1. HOSPITAL DATASET
 # â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•
-print("\nâ”€â”€ Hospital Dataset visualisations â”€â”€")
-h = pd.read_csv(os.path.join(CLEAN_DIR, "hospital_cleaned.csv"))
 
 # 1-A  Age distribution
-fig, ax = plt.subplots(figsize=(8, 4))
-ax.hist(h["Age"].dropna(), bins=20, color="#4C72B0", edgecolor="white")
-ax.set_title("Hospital â€” Age Distribution (post-cleaning)")
-ax.set_xlabel("Age (years)")
-ax.set_ylabel("Count")
-save(fig, "H1_age_distribution.png")
+def plot_h1_age_distribution(h):
+    fig, ax = plt.subplots(figsize=(8, 4))
+    counts, edges = h.histogram("Age", bins=20)
+    ax.hist(edges[:-1], bins=edges, weights=counts, color="#4C72B0", edgecolor="white")
+    ax.set_title("Hospital â€” Age Distribution (post-cleaning)")
+    ax.set_xlabel("Age (years)")
+    ax.set_ylabel("Count")
+    save(fig, "H1_age_distribution.png")
+
 
 # 1-B  Gender balance
-fig, ax = plt.subplots(figsize=(5, 4))
-gender_counts = h["Gender"].value_counts().rename({1: "Male", 0: "Female"})
-bars = ax.bar(gender_counts.index, gender_counts.values,
-              color=["#4C72B0", "#DD8452"], edgecolor="white")
-ax.bar_label(bars, fmt="%d")
-ax.set_title("Hospital â€” Gender Balance")
-ax.set_ylabel("Count")
-save(fig, "H2_gender_balance.png")
+def plot_h2_gender_balance(h):
+    fig, ax = plt.subplots(figsize=(5, 4))
+    gender_counts = h.value_counts("Gender").rename({1: "Male", 0: "Female"})
+    bars = ax.bar(gender_counts.index, gender_counts.values,
+                  color=["#4C72B0", "#DD8452"], edgecolor="white")
+    ax.bar_label(bars, fmt="%d")
+    ax.set_title("Hospital â€” Gender Balance")
+    ax.set_ylabel("Count")
+    save(fig, "H2_gender_balance.png")
+
 
 # 1-C  Top 10 drugs
-fig, ax = plt.subplots(figsize=(9, 5))
-top_drugs = h["Name of Drug"].value_counts().head(10)
-sns.barplot(x=top_drugs.values, y=top_drugs.index, ax=ax,
-            hue=top_drugs.index, palette="Blues_r", legend=False)
-ax.set_title("Hospital â€” Top 10 Prescribed Drugs")
-ax.set_xlabel("Frequency")
-save(fig, "H3_top_drugs.png")
+def plot_h3_top_drugs(h):
+    fig, ax = plt.subplots(figsize=(9, 5))
+    top_drugs = h.value_counts("Name of Drug").head(10)
+    sns.barplot(x=top_drugs.values, y=top_drugs.index, ax=ax,
+                hue=top_drugs.index, palette="Blues_r", legend=False)
+    ax.set_title("Hospital â€” Top 10 Prescribed Drugs")
+    ax.set_xlabel("Frequency")
+    save(fig, "H3_top_drugs.png")
+
 
 # 1-D  Route of Administration
-fig, ax = plt.subplots(figsize=(6, 4))
-route_counts = h["Route"].value_counts()
-ax.pie(route_counts.values, labels=route_counts.index, autopct="%1.1f%%",
-       colors=sns.color_palette("pastel"), startangle=90)
-ax.set_title("Hospital â€” Route of Administration")
-save(fig, "H4_route_pie.png")
+def plot_h4_route_pie(h):
+    fig, ax = plt.subplots(figsize=(6, 4))
+    route_counts = h.value_counts("Route")
+    ax.pie(route_counts.values, labels=route_counts.index, autopct="%1.1f%%",
+           colors=sns.color_palette("pastel"), startangle=90)
+    ax.set_title("Hospital â€” Route of Administration")
+    save(fig, "H4_route_pie.png")
+
 
 # 1-E  Dosage boxplot by Route
-fig, ax = plt.subplots(figsize=(7, 4))
-route_labels = {0: "IV", 1: "Oral", 2: "IM"}   # may differ after encoding
-data_by_route = h.groupby("Route")["Dosage (gram)"].apply(list)
-ax.boxplot(data_by_route.values, tick_labels=data_by_route.index, patch_artist=True)
-ax.set_title("Hospital â€” Dosage (gram) by Route")
-ax.set_ylabel("Dosage (gram)")
-save(fig, "H5_dosage_by_route.png")
+def plot_h5_dosage_by_route(h):
+    fig, ax = plt.subplots(figsize=(7, 4))
+    route_labels = {0: "IV", 1: "Oral", 2: "IM"}   # may differ after encoding
+    ax.bxp(h.box("Dosage (gram)", by="Route"), patch_artist=True)
+    ax.set_title("Hospital â€” Dosage (gram) by Route")
+    ax.set_ylabel("Dosage (gram)")
+    save(fig, "H5_dosage_by_route.png")
+
 
 # 1-F  Duration distribution
-fig, ax = plt.subplots(figsize=(8, 4))
-ax.hist(h["Duration (days)"].dropna(), bins=15, color="#55A868", edgecolor="white")
-ax.set_title("Hospital â€” Treatment Duration Distribution")
-ax.set_xlabel("Duration (days)")
-ax.set_ylabel("Count")
-save(fig, "H6_duration_distribution.png")
+def plot_h6_duration_distribution(h):
+    fig, ax = plt.subplots(figsize=(8, 4))
+    counts, edges = h.histogram("Duration (days)", bins=15)
+    ax.hist(edges[:-1], bins=edges, weights=counts, color="#55A868", edgecolor="white")
+    ax.set_title("Hospital â€” Treatment Duration Distribution")
+    ax.set_xlabel("Duration (days)")
+    ax.set_ylabel("Count")
+    save(fig, "H6_duration_distribution.png")
+
 
 # 1-G  Entries by month
-fig, ax = plt.subplots(figsize=(9, 4))
-monthly = h["entry_month"].value_counts().sort_index()
-ax.bar(monthly.index, monthly.values, color="#C44E52", edgecolor="white")
-ax.set_xticks(range(1, 13))
-ax.set_xticklabels(["Jan","Feb","Mar","Apr","May","Jun",
-                    "Jul","Aug","Sep","Oct","Nov","Dec"])
-ax.set_title("Hospital â€” Data Entries by Month")
-ax.set_ylabel("Count")
-save(fig, "H7_entries_by_month.png")
+def plot_h7_entries_by_month(h):
+    fig, ax = plt.subplots(figsize=(9, 4))
+    monthly = h.value_counts("entry_month").sort_index()
+    ax.bar(monthly.index, monthly.values, color="#C44E52", edgecolor="white")
+    ax.set_xticks(range(1, 13))
+    ax.set_xticklabels(["Jan","Feb","Mar","Apr","May","Jun",
+                        "Jul","Aug","Sep","Oct","Nov","Dec"])
+    ax.set_title("Hospital â€” Data Entries by Month")
+    ax.set_ylabel("Count")
+    save(fig, "H7_entries_by_month.png")
 
 
 # â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•
 # 2. MEDICAL (CARDIAC) DATASET
 # â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•
-print("\nâ”€â”€ Medical Dataset visualisations â”€â”€")
-m = pd.read_csv(os.path.join(CLEAN_DIR, "medical_cleaned.csv"))
-result_label = m["Result"].map({1: "Positive", 0: "Negative"})
 
 # 2-A  Class balance
-fig, ax = plt.subplots(figsize=(5, 4))
-counts = m["Result"].value_counts().rename({1: "Positive", 0: "Negative"})
-bars = ax.bar(counts.index, counts.values, color=["#C44E52", "#4C72B0"], edgecolor="white")
-ax.bar_label(bars, fmt="%d")
-ax.set_title("Medical â€” Class Balance (Heart Attack Result)")
-ax.set_ylabel("Count")
-save(fig, "M1_class_balance.png")
+def plot_m1_class_balance(m):
+    fig, ax = plt.subplots(figsize=(5, 4))
+    counts = m.value_counts("Result").rename({1: "Positive", 0: "Negative"})
+    bars = ax.bar(counts.index, counts.values, color=["#C44E52", "#4C72B0"], edgecolor="white")
+    ax.bar_label(bars, fmt="%d")
+    ax.set_title("Medical â€” Class Balance (Heart Attack Result)")
+    ax.set_ylabel("Count")
+    save(fig, "M1_class_balance.png")
+
 
 # 2-B  Correlation heatmap
-fig, ax = plt.subplots(figsize=(9, 7))
-corr = m.corr(numeric_only=True)
-mask = np.triu(np.ones_like(corr, dtype=bool))
-sns.heatmap(corr, mask=mask, annot=True, fmt=".2f", cmap="coolwarm",
-            center=0, ax=ax, linewidths=0.5)
-ax.set_title("Medical â€” Feature Correlation Heatmap")
-save(fig, "M2_correlation_heatmap.png")
+def plot_m2_correlation_heatmap(m):
+    fig, ax = plt.subplots(figsize=(9, 7))
+    corr = m.corr()
+    mask = np.triu(np.ones_like(corr, dtype=bool))
+    sns.heatmap(corr, mask=mask, annot=True, fmt=".2f", cmap="coolwarm",
+                center=0, ax=ax, linewidths=0.5)
+    ax.set_title("Medical â€” Feature Correlation Heatmap")
+    save(fig, "M2_correlation_heatmap.png")
+
 
 # 2-C  Vitals boxplots by Result
-vitals = ["Age", "Heart rate", "Systolic blood pressure",
-          "Diastolic blood pressure", "Blood sugar"]
-fig, axes = plt.subplots(1, len(vitals), figsize=(16, 5))
-for ax, col in zip(axes, vitals):
-    data = [m.loc[m["Result"] == v, col].values for v in [0, 1]]
-    bp = ax.boxplot(data, patch_artist=True, tick_labels=["Negative", "Positive"])
-    bp["boxes"][0].set_facecolor("#4C72B0")
-    bp["boxes"][1].set_facecolor("#C44E52")
-    ax.set_title(col, fontsize=9)
-    ax.tick_params(axis="x", labelsize=8)
-fig.suptitle("Medical â€” Vitals by Result (scaled)", y=1.02)
-fig.tight_layout()
-save(fig, "M3_vitals_by_result.png")
+def plot_m3_vitals_by_result(m):
+    vitals = ["Age", "Heart rate", "Systolic blood pressure",
+              "Diastolic blood pressure", "Blood sugar"]
+    fig, axes = plt.subplots(1, len(vitals), figsize=(16, 5))
+    for ax, col in zip(axes, vitals):
+        boxes = {stats["label"]: stats for stats in m.box(col, by="Result")}
+        data = [dict(boxes[v], label=label) for v, label in [(0, "Negative"), (1, "Positive")]]
+        bp = ax.bxp(data, patch_artist=True)
+        bp["boxes"][0].set_facecolor("#4C72B0")
+        bp["boxes"][1].set_facecolor("#C44E52")
+        ax.set_title(col, fontsize=9)
+        ax.tick_params(axis="x", labelsize=8)
+    fig.suptitle("Medical â€” Vitals by Result (scaled)", y=1.02)
+    fig.tight_layout()
+    save(fig, "M3_vitals_by_result.png")
+
 
 # 2-D  CK-MB and Troponin distributions by Result
-fig, axes = plt.subplots(1, 2, figsize=(12, 5))
-for ax, col in zip(axes, ["CK-MB", "Troponin"]):
-    for val, label, color in [(0, "Negative", "#4C72B0"), (1, "Positive", "#C44E52")]:
-        subset = m.loc[m["Result"] == val, col]
-        ax.hist(subset, bins=30, alpha=0.6, label=label, color=color, edgecolor="white")
-    ax.set_title(f"Medical â€” {col} Distribution by Result (scaled)")
-    ax.set_xlabel(col)
-    ax.legend()
-fig.tight_layout()
-save(fig, "M4_cardiac_markers.png")
+def plot_m4_cardiac_markers(m):
+    fig, axes = plt.subplots(1, 2, figsize=(12, 5))
+    for ax, col in zip(axes, ["CK-MB", "Troponin"]):
+        by_result = m.histogram(col, bins=30, by="Result")
+        for val, label, color in [(0, "Negative", "#4C72B0"), (1, "Positive", "#C44E52")]:
+            counts, edges = by_result[val]
+            ax.hist(edges[:-1], bins=edges, weights=counts, alpha=0.6, label=label,
+                    color=color, edgecolor="white")
+        ax.set_title(f"Medical â€” {col} Distribution by Result (scaled)")
+        ax.set_xlabel(col)
+        ax.legend()
+    fig.tight_layout()
+    save(fig, "M4_cardiac_markers.png")
+
 
 # 2-E  Gender vs Result
-fig, ax = plt.subplots(figsize=(6, 4))
-gender_result = m.groupby(["Gender", "Result"]).size().unstack(fill_value=0)
-gender_result.index = ["Female (0)", "Male (1)"]
-gender_result.columns = ["Negative", "Positive"]
-gender_result.plot(kind="bar", ax=ax, color=["#4C72B0", "#C44E52"],
-                   edgecolor="white", rot=0)
-ax.set_title("Medical â€” Result by Gender")
-ax.set_ylabel("Count")
-ax.legend(title="Result")
-save(fig, "M5_gender_vs_result.png")
+def plot_m5_gender_vs_result(m):
+    fig, ax = plt.subplots(figsize=(6, 4))
+    gender_result = m.crosstab("Gender", "Result")
+    gender_result.index = ["Female (0)", "Male (1)"]
+    gender_result.columns = ["Negative", "Positive"]
+    gender_result.plot(kind="bar", ax=ax, color=["#4C72B0", "#C44E52"],
+                       edgecolor="white", rot=0)
+    ax.set_title("Medical â€” Result by Gender")
+    ax.set_ylabel("Count")
+    ax.legend(title="Result")
+    save(fig, "M5_gender_vs_result.png")
 
 
 # â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•
 # 3. ICU DATASET
 # â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•
-print("\nâ”€â”€ ICU Dataset visualisations â”€â”€")
-icu = pd.read_csv(os.path.join(CLEAN_DIR, "icu_cleaned_full.csv"))
+window_order = ["0-2", "2-4", "4-6", "6-12", "ABOVE_12"]
+
 
 # 3-A  ICU admission rate by time window
-fig, ax = plt.subplots(figsize=(8, 4))
-window_order = ["0-2", "2-4", "4-6", "6-12", "ABOVE_12"]
-icu_rate = (icu.groupby("WINDOW")["ICU"]
-              .mean()
-              .reindex(window_order) * 100)
-bars = ax.bar(icu_rate.index, icu_rate.values, color="#4C72B0", edgecolor="white")
-ax.bar_label(bars, fmt="%.1f%%", fontsize=9)
-ax.set_title("ICU â€” Admission Rate by Time Window")
-ax.set_xlabel("Time Window (hours)")
-ax.set_ylabel("ICU Admission Rate (%)")
-save(fig, "I1_icu_rate_by_window.png")
+def plot_i1_icu_rate_by_window(icu):
+    fig, ax = plt.subplots(figsize=(8, 4))
+    icu_rate = icu.rates("ICU", by="WINDOW").reindex(window_order) * 100
+    bars = ax.bar(icu_rate.index, icu_rate.values, color="#4C72B0", edgecolor="white")
+    ax.bar_label(bars, fmt="%.1f%%", fontsize=9)
+    ax.set_title("ICU â€” Admission Rate by Time Window")
+    ax.set_xlabel("Time Window (hours)")
+    ax.set_ylabel("ICU Admission Rate (%)")
+    save(fig, "I1_icu_rate_by_window.png")
+
 
 # 3-B  Overall ICU class balance
-fig, ax = plt.subplots(figsize=(5, 4))
-icu_counts = icu["ICU"].value_counts().rename({0: "Not ICU", 1: "ICU"})
-bars = ax.bar(icu_counts.index, icu_counts.values,
-              color=["#4C72B0", "#C44E52"], edgecolor="white")
-ax.bar_label(bars, fmt="%d")
-ax.set_title("ICU â€” Class Balance")
-ax.set_ylabel("Count")
-save(fig, "I2_icu_class_balance.png")
+def plot_i2_icu_class_balance(icu):
+    fig, ax = plt.subplots(figsize=(5, 4))
+    icu_counts = icu.value_counts("ICU").rename({0: "Not ICU", 1: "ICU"})
+    bars = ax.bar(icu_counts.index, icu_counts.values,
+                  color=["#4C72B0", "#C44E52"], edgecolor="white")
+    ax.bar_label(bars, fmt="%d")
+    ax.set_title("ICU â€” Class Balance")
+    ax.set_ylabel("Count")
+    save(fig, "I2_icu_class_balance.png")
+
 
 # 3-C  Age percentile vs ICU admission rate
-fig, ax = plt.subplots(figsize=(8, 4))
-age_icu = icu.groupby("AGE_PERCENTIL")["ICU"].mean() * 100
-age_icu.plot(kind="bar", ax=ax, color="#55A868", edgecolor="white", rot=0)
-ax.set_title("ICU â€” Admission Rate by Age Percentile")
-ax.set_xlabel("Age Percentile (ordinal encoded)")
-ax.set_ylabel("ICU Admission Rate (%)")
-save(fig, "I3_age_percentile_vs_icu.png")
+def plot_i3_age_percentile_vs_icu(icu):
+    fig, ax = plt.subplots(figsize=(8, 4))
+    age_icu = icu.rates("ICU", by="AGE_PERCENTIL") * 100
+    age_icu.plot(kind="bar", ax=ax, color="#55A868", edgecolor="white", rot=0)
+    ax.set_title("ICU â€” Admission Rate by Age Percentile")
+    ax.set_xlabel("Age Percentile (ordinal encoded)")
+    ax.set_ylabel("ICU Admission Rate (%)")
+    save(fig, "I3_age_percentile_vs_icu.png")
+
 
 # 3-D  Disease groupings vs ICU rate
-disease_cols = [c for c in icu.columns if "DISEASE GROUPING" in c]
-if disease_cols:
-    fig, ax = plt.subplots(figsize=(9, 4))
-    rates = {col: icu.loc[icu[col] == 1, "ICU"].mean() * 100 for col in disease_cols}
-    ax.bar(list(rates.keys()), list(rates.values()), color="#DD8452", edgecolor="white")
-    ax.set_title("ICU â€” Admission Rate by Disease Grouping")
-    ax.set_ylabel("ICU Admission Rate (%)")
-    ax.tick_params(axis="x", rotation=20)
-    save(fig, "I4_disease_grouping_vs_icu.png")
+def plot_i4_disease_grouping_vs_icu(icu):
+    disease_cols = [c for c in icu.columns if "DISEASE GROUPING" in c]
+    if disease_cols:
+        fig, ax = plt.subplots(figsize=(9, 4))
+        rates = {col: icu.rates("ICU", by=col).get(1, np.nan) * 100 for col in disease_cols}
+        ax.bar(list(rates.keys()), list(rates.values()), color="#DD8452", edgecolor="white")
+        ax.set_title("ICU â€” Admission Rate by Disease Grouping")
+        ax.set_ylabel("ICU Admission Rate (%)")
+        ax.tick_params(axis="x", rotation=20)
+        save(fig, "I4_disease_grouping_vs_icu.png")
+
 
 # 3-E  Correlation heatmap for static / demographic features
-static_cols = ["AGE_ABOVE65", "AGE_PERCENTIL", "GENDER",
-               "DISEASE GROUPING 1", "DISEASE GROUPING 2", "DISEASE GROUPING 3",
-               "DISEASE GROUPING 4", "DISEASE GROUPING 5", "DISEASE GROUPING 6",
-               "HTN", "IMMUNOCOMPROMISED", "OTHER", "ICU"]
-fig, ax = plt.subplots(figsize=(10, 8))
-corr_icu = icu[static_cols].corr()
-mask = np.triu(np.ones_like(corr_icu, dtype=bool))
-sns.heatmap(corr_icu, mask=mask, annot=True, fmt=".2f", cmap="coolwarm",
-            center=0, ax=ax, linewidths=0.5)
-ax.set_title("ICU â€” Demographic Feature Correlation Heatmap")
-save(fig, "I5_demo_correlation_heatmap.png")
+def plot_i5_demo_correlation_heatmap(icu):
+    static_cols = ["AGE_ABOVE65", "AGE_PERCENTIL", "GENDER",
+                   "DISEASE GROUPING 1", "DISEASE GROUPING 2", "DISEASE GROUPING 3",
+                   "DISEASE GROUPING 4", "DISEASE GROUPING 5", "DISEASE GROUPING 6",
+                   "HTN", "IMMUNOCOMPROMISED", "OTHER", "ICU"]
+    fig, ax = plt.subplots(figsize=(10, 8))
+    corr_icu = icu.corr(static_cols)
+    mask = np.triu(np.ones_like(corr_icu, dtype=bool))
+    sns.heatmap(corr_icu, mask=mask, annot=True, fmt=".2f", cmap="coolwarm",
+                center=0, ax=ax, linewidths=0.5)
+    ax.set_title("ICU â€” Demographic Feature Correlation Heatmap")
+    save(fig, "I5_demo_correlation_heatmap.png")
+
 
 # 3-F  WINDOW distribution (sanity check â€” should be uniform)
-fig, ax = plt.subplots(figsize=(7, 4))
-win_counts = icu["WINDOW"].value_counts().reindex(window_order)
-ax.bar(win_counts.index, win_counts.values, color="#8172B2", edgecolor="white")
-ax.set_title("ICU â€” Row Count per Time Window")
-ax.set_ylabel("Count")
-save(fig, "I6_window_distribution.png")
+def plot_i6_window_distribution(icu):
+    fig, ax = plt.subplots(figsize=(7, 4))
+    win_counts = icu.value_counts("WINDOW").reindex(window_order)
+    ax.bar(win_counts.index, win_counts.values, color="#8172B2", edgecolor="white")
+    ax.set_title("ICU â€” Row Count per Time Window")
+    ax.set_ylabel("Count")
+    save(fig, "I6_window_distribution.png")
+
+
+# â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•
+# RUN
+# â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•
+#   dataset â†’ (label, cleaned CSV, plot functions in drawing order)
+DATASETS = {
+    "hospital": ("Hospital", "hospital_cleaned.csv", [
+        plot_h1_age_distribution, plot_h2_gender_balance, plot_h3_top_drugs,
+        plot_h4_route_pie, plot_h5_dosage_by_route, plot_h6_duration_distribution,
+        plot_h7_entries_by_month]),
+    "medical": ("Medical", "medical_cleaned.csv", [
+        plot_m1_class_balance, plot_m2_correlation_heatmap, plot_m3_vitals_by_result,
+        plot_m4_cardiac_markers, plot_m5_gender_vs_result]),
+    "icu": ("ICU", "icu_cleaned_full.csv", [
+        plot_i1_icu_rate_by_window, plot_i2_icu_class_balance,
+        plot_i3_age_percentile_vs_icu, plot_i4_disease_grouping_vs_icu,
+        plot_i5_demo_correlation_heatmap, plot_i6_window_distribution]),
+}
+
+
+#   dataset â†’ columns its plots use (None: all â€” the cardiac heatmap correlates
+#   every column)
+PLOT_COLUMNS = {
+    "hospital": ["Age", "Gender", "Name of Drug", "Dosage (gram)", "Route",
+                 "Duration (days)", "entry_month"],
+    "medical":  None,
+    "icu":      ["WINDOW", "ICU", "AGE_ABOVE65", "AGE_PERCENTIL", "GENDER",
+                 "DISEASE GROUPING 1", "DISEASE GROUPING 2", "DISEASE GROUPING 3",
+                 "DISEASE GROUPING 4", "DISEASE GROUPING 5", "DISEASE GROUPING 6",
+                 "HTN", "IMMUNOCOMPROMISED", "OTHER"],
+}
+
+
+def png_name(plot):
+    """plot_h1_age_distribution â†’ H1_age_distribution.png"""
+    tag, rest = plot.__name__[len("plot_"):].split("_", 1)
+    return f"{tag.upper()}_{rest}.png"
+
+
+def data_source(dataset, source="auto"):
+    """("csv" | "columnar", path) of the cleaned data `dataset` is read from.
+
+    `source` "auto" picks whichever of the CSV and the columnar table was
+    written last.
+    """
+    csv = os.path.join(CLEAN_DIR, DATASETS[dataset][1])
+    table = csv[:-len(".csv")]
+    meta = os.path.join(table, "meta.json")
+    if source == "columnar" or (source == "auto" and os.path.exists(meta) and (
+            not os.path.exists(csv) or os.path.getmtime(meta) >= os.path.getmtime(csv))):
+        return "columnar", table
+    return "csv", csv
+
+
+@functools.lru_cache(maxsize=None)
+def load(dataset, source="auto"):
+    from .columnar import ColumnarTable
+    kind, path = data_source(dataset, source)
+    if kind == "csv":
+        return pd.read_csv(path, usecols=PLOT_COLUMNS[dataset])
+    df = ColumnarTable(path).read(columns=PLOT_COLUMNS[dataset])
+    # Plain text columns, as read from the CSV (no unused categories in counts)
+    for col in df.columns[df.dtypes == "category"]:
+        df[col] = df[col].astype(df[col].cat.categories.dtype)
+    return df
+
+
+@functools.lru_cache(maxsize=None)
+def data_digest(dataset, source="auto"):
+    from .columnar import ColumnarTable
+    kind, path = data_source(dataset, source)
+    return file_digest(path) if kind == "csv" else ColumnarTable(path).digest()
+
+
+@functools.lru_cache(maxsize=None)
+def summaries(dataset, source="auto"):
+    """The plots' aggregates of `dataset`; the data is read only on a cache miss."""
+    from .plot_summaries import SummaryCache
+    return SummaryCache(os.path.join(SUMMARY_DIR, dataset), data_digest(dataset, source),
+                        functools.partial(load, dataset, source))
+
+
+def _render_one(dataset, plot_name, source="auto"):
+    """Draw one figure (runs in a worker process with --jobs > 1).
+
+    Everything it needs comes in as arguments, so it works under any
+    start method (spawned workers do not inherit state set in main()).
+    Returns (seconds, number of summaries that had to be computed).
+    """
+    t0 = time.perf_counter()
+    _plotting()
+    s = summaries(dataset, source)
+    misses = s.misses
+    globals()[plot_name](s)
+    return time.perf_counter() - t0, s.misses - misses
+
+
+# â”€â”€ Change detection â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
+#   A figure's key combines its source data, its own plot function and all
+#   shared module code (style, helpers, constants); editing one plot_*
+#   function therefore only re-renders that figure.
+def plot_keys(datasets, source="auto"):
+    with open(__file__, encoding="utf-8") as f:
+        source = f.read()
+    tree  = ast.parse(source)
+    funcs = {n.name: ast.get_source_segment(source, n) for n in tree.body
+             if isinstance(n, ast.FunctionDef) and n.name.startswith("plot_")}
+    shared = source
+    for code in funcs.values():
+        shared = shared.replace(code, "")
+    shared += matplotlib.__version__ + sns.__version__
+
+    keys = {}
+    for dataset in datasets:
+        for plot in DATASETS[dataset][2]:
+            h = hashlib.blake2b(digest_size=16)
+            for part in (shared, funcs[plot.__name__], data_digest(dataset, source)):
+                h.update(part.encode())
+            keys[png_name(plot)] = h.hexdigest()
+    return keys
+
+
+def load_state():
+    if not os.path.exists(STATE_FILE):
+        return {}
+    with open(STATE_FILE) as f:
+        return json.load(f)
+
+
+def save_state(state):
+    os.makedirs(os.path.dirname(STATE_FILE), exist_ok=True)
+    with open(STATE_FILE, "w") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+
+
+def render(datasets, jobs=1, changed_only=False, source="auto", prof=None):
+    _plotting()
+    os.makedirs(PLOTS_DIR, exist_ok=True)
+    keys  = plot_keys(datasets, source)
+    state = load_state()
+    tasks = []
+    for dataset in datasets:
+        label, _, plots = DATASETS[dataset]
+        print(f"\nâ”€â”€ {label} Dataset visualisations â”€â”€")
+        for plot in plots:
+            name = png_name(plot)
+            if (changed_only and state.get(name) == keys[name]
+                    and os.path.exists(os.path.join(PLOTS_DIR, name))):
+                print(f"  Skipped  {name:34s} (data and code unchanged)")
+            else:
+                tasks.append((dataset, plot))
+
+    def finished(plot, result):
+        seconds, computed = result
+        name = png_name(plot)
+        state[name] = keys[name]
+        print(f"  Saved  â†’  {os.path.join(PLOTS_DIR, name)}  ({seconds:.2f} s)")
+        if prof is not None:
+            tag, rest = name[:-len(".png")].split("_", 1)
+            prof.mark(tag, rest, render_s=round(seconds, 6), summaries_computed=computed)
+
+    t0 = time.perf_counter()
+    if jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {pool.submit(_render_one, d, p.__name__, source): p for d, p in tasks}
+            for fut in as_completed(futures):
+                finished(futures[fut], fut.result())
+    else:
+        for dataset, plot in tasks:
+            finished(plot, _render_one(dataset, plot.__name__, source))
+    save_state(state)
+    print(f"\nRendered {len(tasks)} plot(s) in {time.perf_counter() - t0:.2f} s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Post-cleaning visualisations")
+    parser.add_argument("--dataset", nargs="+", choices=list(DATASETS),
+                        default=list(DATASETS), help="datasets to plot (default: all)")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="render plots in N worker processes (default: 1)")
+    parser.add_argument("--changed-only", action="store_true",
+                        help="skip plots whose source data and plot code are unchanged")
+    parser.add_argument("--source", choices=["auto", "csv", "columnar"], default="auto",
+                        help="read the cleaned CSVs or the columnar tables "
+                             "(default: whichever was written last)")
+    args = parser.parse_args(argv)
+
+    # pipeline.py runs one process per dataset; keep their traces apart
+    trace_name = "04_visualization"
+    if set(args.dataset) != set(DATASETS):
+        trace_name += "_" + "_".join(args.dataset)
+    render(args.dataset, jobs=args.jobs, changed_only=args.changed_only,
+           source=args.source, prof=StageProfiler(trace_name))
+
+    print(f"\nAll plots saved to: {PLOTS_DIR}")
+    print("Done.")
 
-print(f"\nAll plots saved to: {PLOTS_DIR}")
-print("Done.")
 
+if __name__ == "__main__":
+    main()
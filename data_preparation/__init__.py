@@ -0,0 +1,59 @@
+"""
+CRISP-DM: Data Preparation — package and command line
+The numbered scripts and their helper modules as one importable package,
+with a single entry point (see __main__.py):
+
+    python -m data_preparation --help
+    python -m data_preparation medical --format both
+    python -m data_preparation plots --dataset icu --changed-only
+
+Modules import their siblings relative to the package (`from .winsorizer
+import Winsorizer`), so none of their generic names (ingest, profiling,
+serving, ...) is put on sys.path or can clash with an installed module.
+Helpers with a command line of their own run as package modules:
+
+    python -m data_preparation.outofcore_fit icu --input icu_extract.csv
+
+Nothing heavy is imported here: a stage's module is loaded when it runs,
+and the scripts import pandas, scikit-learn or matplotlib only after
+parsing their arguments.  Helpers are attributes loaded on first access:
+
+    import data_preparation as dp
+    dp.run("icu", ["--jobs", "0"])
+    folds = dp.cv_folds.PatientFolds.from_outputs()
+"""
+
+import importlib
+import os
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+#   subcommand → (module, one-line description)
+STAGES = {
+    "hospital": ("01_hospital_cleaning", "clean the hospital prescriptions (script 1)"),
+    "medical":  ("02_medical_cleaning", "clean and scale the cardiac dataset (script 2)"),
+    "icu":      ("03_icu_cleaning", "impute, cap and scale the ICU dataset (script 3)"),
+    "plots":    ("04_visualization", "render the post-cleaning plots (script 4)"),
+    "pipeline": ("pipeline", "run the stages incrementally, in parallel"),
+}
+
+
+def _sibling(name):
+    return importlib.import_module(f".{name}", __name__)
+
+
+def load_stage(name):
+    """The module of stage `name`, imported on first use."""
+    return _sibling(STAGES[name][0])
+
+
+def run(name, argv=None):
+    """Run stage `name` with command-line arguments `argv`; returns its exit code."""
+    return load_stage(name).main(argv)
+
+
+def __getattr__(name):
+    # data_preparation.<helper> → the sibling module, imported on first access
+    if not name.startswith("_") and os.path.exists(os.path.join(PACKAGE_DIR, name + ".py")):
+        return _sibling(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,31 @@
+"""
+python -m data_preparation STAGE [OPTIONS] — run one stage.
+
+Only the chosen stage's module is imported; its heavy libraries load after
+its options are parsed, so `--help` at either level returns at once.
+"""
+
+import argparse
+import sys
+
+from . import STAGES, run
+
+
+def main(argv=None):
+    prog = "python -m data_preparation"
+    parser = argparse.ArgumentParser(
+        prog=prog, description="CRISP-DM data preparation: run one stage",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="stages:\n" + "".join(f"  {name:10s}{desc}\n"
+                                     for name, (_, desc) in STAGES.items())
+               + f"\n`{prog} STAGE --help` lists the options of a stage.")
+    parser.add_argument("stage", choices=list(STAGES), metavar="STAGE")
+    parser.add_argument("options", nargs=argparse.REMAINDER, help="passed on to the stage")
+    args = parser.parse_args(argv)
+    # The stage's own parser names itself after argv[0] in usage and errors
+    sys.argv[0] = f"{prog} {args.stage}"
+    return run(args.stage, args.options)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
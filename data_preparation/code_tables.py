@@ -0,0 +1,89 @@
+"""
+CRISP-DM: Data Preparation — code tables for dictionary-encoded text
+Keeps, per text column, the normalised vocabulary (code → value) and every
+raw spelling seen so far (raw string → code).  Codes are append-only: a
+value keeps its code across runs and new values get the next free code, so
+the table written by one run can be loaded by the next run, by the
+streaming mode or by any other job, and a raw string maps to its integer
+code with a single dictionary lookup.
+
+File format (JSON):  {"<column>": {"values": [...], "raw": {"<raw>": code}}}
+Values the normalisation leaves missing have no code (-1 in the categorical).
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+
+class CodeTables:
+    def __init__(self, tables=None):
+        self.tables = tables or {}
+
+    # ── Persistence ─────────────────────────────────────────────────────────
+    @classmethod
+    def load(cls, path):
+        """Tables from `path`, or empty tables if it does not exist yet."""
+        if not os.path.exists(path):
+            return cls()
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def save(self, path):
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.tables, f, indent=1, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    # ── Lookups ─────────────────────────────────────────────────────────────
+    def _table(self, col):
+        return self.tables.setdefault(col, {"values": [], "raw": {}})
+
+    def values(self, col):
+        return self._table(col)["values"]
+
+    def dtype(self, col):
+        return pd.CategoricalDtype(self.values(col))
+
+    def code(self, col, value):
+        """Code of a normalised `value`, adding it to the vocabulary if new."""
+        table = self._table(col)
+        try:
+            return table["values"].index(value)
+        except ValueError:
+            table["values"].append(value)
+            return len(table["values"]) - 1
+
+    def raw_code(self, col, raw):
+        """Code of a raw string, or None if that spelling was never seen."""
+        return self._table(col)["raw"].get(str(raw))
+
+    # ── Encoding ────────────────────────────────────────────────────────────
+    def encode(self, s, normalise):
+        """Dictionary-encode Series `s` with `normalise` applied per distinct value.
+
+        `normalise` maps an Index of distinct raw values to normalised
+        strings; it runs once per distinct value, not once per row.
+        Returns a Categorical Series whose categories are this column's
+        vocabulary, so its codes are the table codes.
+        """
+        table = self._table(s.name)
+        inverse, uniques = pd.factorize(s.to_numpy(dtype=object), use_na_sentinel=False)
+        normalised = normalise(pd.Index(uniques, dtype=object))
+        position = {v: i for i, v in enumerate(table["values"])}
+        lookup = np.empty(len(uniques), dtype=np.int32)
+        for i, (raw, value) in enumerate(zip(uniques, normalised)):
+            if pd.isna(value):          # missing stays missing (code -1)
+                lookup[i] = -1
+                continue
+            code = position.get(value)
+            if code is None:
+                code = position[value] = len(table["values"])
+                table["values"].append(value)
+            lookup[i] = code
+            table["raw"][str(raw)] = int(code)
+        codes = lookup[inverse]
+        cat = pd.Categorical.from_codes(codes, dtype=self.dtype(s.name))
+        return pd.Series(cat, index=s.index, name=s.name)
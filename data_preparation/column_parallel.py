@@ -0,0 +1,211 @@
+"""
+CRISP-DM: Data Preparation — column-parallel ICU continuous-column stages
+Steps 6–9 of 03_icu_cleaning.py (within-patient ffill+bfill, median
+imputation, winsorisation, scaling) treat every continuous column on its
+own.  ColumnRunner packs those columns into one column-major float matrix
+and runs each step as a map over blocks of columns:
+
+  jobs = 1   the blocks are processed in this process, one after another
+  jobs > 1   the matrix (and the patient-start flags) live in a POSIX
+             shared-memory segment; a pool of forked workers attaches to it
+             and every task updates its columns in place, so only block
+             bounds and per-column statistics cross process boundaries
+
+Both modes run the same kernels on the same memory layout, and every
+statistic is computed per column, so the result does not depend on the
+number of jobs or on how the columns are split into blocks.  Workers are
+forked (nothing is re-imported and the matrix is already shared); where
+fork is unavailable the runner falls back to jobs = 1.
+"""
+
+import multiprocessing as mp
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+from .imputation import ffill_bfill_sorted, group_starts
+from .winsorizer import Winsorizer
+
+# Matrix and patient-start flags of the current runner (set in each worker)
+_shared = {}
+
+
+# ── Kernels: one block of columns, updated in place ─────────────────────────
+def _fill(values, starts):
+    values[...] = ffill_bfill_sorted(values, starts)
+    return int(np.isnan(values).sum())
+
+
+def _median_fill(values, starts):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)      # all-NaN columns
+        medians = np.nanmedian(values, axis=0)
+    np.copyto(values, medians.astype(values.dtype), where=np.isnan(values))
+    return medians, int(np.isnan(values).sum())
+
+
+def _winsorise(values, starts, lower_pct, upper_pct):
+    wide = values.astype(float)
+    quantile = np.nanquantile if np.isnan(wide).any() else np.quantile
+    lo, hi = quantile(wide, [lower_pct, upper_pct], axis=0)
+    n_capped = ((wide < lo) | (wide > hi)).sum(axis=0)
+    np.clip(values, lo, hi, out=values)
+    return lo, hi, n_capped
+
+
+def _scale(values, starts):
+    scaler = StandardScaler().fit(values)
+    values -= scaler.mean_
+    values /= scaler.scale_
+    return scaler
+
+
+KERNELS = {"fill": _fill, "median": _median_fill, "winsorise": _winsorise, "scale": _scale}
+
+
+def _attach(name, shape, dtype):
+    shm = shared_memory.SharedMemory(name=name)
+    matrix_bytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+    _shared["shm"]    = shm
+    _shared["matrix"] = np.ndarray(shape, dtype=dtype, buffer=shm.buf, order="F")
+    _shared["starts"] = np.ndarray(shape[0], dtype=bool, buffer=shm.buf, offset=matrix_bytes)
+
+
+def _run_block(kernel, start, stop, args):
+    t0 = time.perf_counter()
+    out = KERNELS[kernel](_shared["matrix"][:, start:stop], _shared["starts"], *args)
+    return out, time.perf_counter() - t0
+
+
+# ── Runner ──────────────────────────────────────────────────────────────────
+class ColumnRunner:
+    """Continuous columns of a group-sorted frame, processed in column blocks."""
+
+    def __init__(self, df, group_col, cols, jobs=1, block_size=64):
+        self.cols = list(cols)
+        if jobs > 1 and "fork" not in mp.get_all_start_methods():
+            print("    (no fork start method on this platform: running serially)")
+            jobs = 1
+        self.jobs = jobs
+        # Several blocks per worker so uneven columns still balance out
+        if jobs > 1:
+            block_size = max(1, min(block_size, -(-len(self.cols) // (4 * jobs))))
+        self.blocks = [(i, min(i + block_size, len(self.cols)))
+                       for i in range(0, len(self.cols), block_size)]
+        self.busy = 0.0                       # summed kernel time over all blocks
+
+        dtype = np.result_type(*df[self.cols].dtypes) if self.cols else np.float64
+        dtype = dtype if dtype.kind == "f" else np.dtype(np.float64)
+        shape = (len(df), len(self.cols))
+        starts = group_starts(df[group_col].to_numpy())
+        self._shm = self._pool = None
+        if jobs > 1:
+            matrix_bytes = int(np.prod(shape)) * dtype.itemsize
+            self._shm = shared_memory.SharedMemory(create=True, size=max(1, matrix_bytes + len(df)))
+            self.matrix = np.ndarray(shape, dtype=dtype, buffer=self._shm.buf, order="F")
+            self.starts = np.ndarray(len(df), dtype=bool, buffer=self._shm.buf,
+                                     offset=matrix_bytes)
+            self.starts[:] = starts
+        else:
+            self.matrix = np.empty(shape, dtype=dtype, order="F")
+            self.starts = starts
+        for start, stop in self.blocks:
+            self.matrix[:, start:stop] = df[self.cols[start:stop]].to_numpy(dtype=dtype)
+        # The matrix is now the only copy; write_back() puts the columns back
+        self.order = list(df.columns)
+        df.drop(columns=self.cols, inplace=True)
+        if jobs > 1:
+            self._pool = ProcessPoolExecutor(
+                max_workers=jobs, mp_context=mp.get_context("fork"),
+                initializer=_attach, initargs=(self._shm.name, shape, dtype))
+
+    def map(self, kernel, *args):
+        """Run `kernel` over every block; per-block results in column order."""
+        if self._pool is None:
+            results = []
+            for start, stop in self.blocks:
+                t0 = time.perf_counter()
+                results.append(KERNELS[kernel](self.matrix[:, start:stop], self.starts, *args))
+                self.busy += time.perf_counter() - t0
+            return results
+        futures = [self._pool.submit(_run_block, kernel, start, stop, args)
+                   for start, stop in self.blocks]
+        results = []
+        for future in futures:
+            out, seconds = future.result()
+            results.append(out)
+            self.busy += seconds
+        return results
+
+    # ── Steps 6–9 ───────────────────────────────────────────────────────────
+    def ffill_bfill(self):
+        """[6] Within-group ffill + bfill; returns (missing left, rows/sec)."""
+        t0 = time.perf_counter()
+        missing = sum(self.map("fill"))
+        elapsed = time.perf_counter() - t0
+        return missing, len(self.matrix) / elapsed if elapsed > 0 else float("inf")
+
+    def median_fill(self):
+        """[7] Column medians (pd.Series) fill what is still missing; + missing left."""
+        medians, missing = zip(*self.map("median"))
+        return pd.Series(np.concatenate(medians), index=self.cols), sum(missing)
+
+    def winsorise(self, lower_pct=0.01, upper_pct=0.99):
+        """[8] Fit and apply percentile caps; returns (Winsorizer, n_capped)."""
+        results = self.map("winsorise", lower_pct, upper_pct)
+        lo, hi, n_capped = (np.concatenate(parts) for parts in zip(*results))
+        capper = Winsorizer(lower_pct=lower_pct, upper_pct=upper_pct)
+        capper.lower_ = pd.Series(lo, index=self.cols)
+        capper.upper_ = pd.Series(hi, index=self.cols)
+        return capper, pd.Series(n_capped, index=self.cols, dtype=int)
+
+    def scale(self):
+        """[9] Standard-scale in place; returns one StandardScaler for all columns.
+
+        The per-block scalers are merged into the first one; the merged
+        statistics are those of a single fit on all columns.
+        """
+        parts  = self.map("scale")
+        scaler = parts[0]
+        for attr in ("mean_", "var_", "scale_"):
+            setattr(scaler, attr, np.concatenate([getattr(p, attr) for p in parts]))
+        seen = np.concatenate([np.broadcast_to(p.n_samples_seen_, p.n_features_in_)
+                               for p in parts])
+        scaler.n_samples_seen_   = seen if (seen != seen[0]).any() else int(seen[0])
+        scaler.n_features_in_    = len(self.cols)
+        scaler.feature_names_in_ = np.asarray(self.cols, dtype=object)
+        return scaler
+
+    # ── Results ─────────────────────────────────────────────────────────────
+    def write_back(self, df):
+        """`df` with the processed columns back in their original positions."""
+        values = self.matrix if self._shm is None else np.array(self.matrix, order="F")
+        # Column-major, so the frame takes the matrix as one block without a copy
+        cols = pd.DataFrame(values, index=df.index, columns=self.cols, copy=False)
+        return pd.concat([df, cols], axis=1)[self.order]
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        if self._shm is not None:
+            del self.matrix, self.starts
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def default_jobs():
+    return len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
@@ -0,0 +1,237 @@
+"""
+CRISP-DM: Data Preparation — compressed, partitioned columnar outputs
+Alternative to the cleaned CSVs for readers that need only some columns or
+some rows (04_visualization.py reads ~15 of the 231 ICU columns).  A table
+is a directory:
+
+    <name>/meta.json       rows, column names + dtypes, partition column,
+                           per-partition row counts, file digests and
+                           per-column statistics (nulls, min / max, distinct)
+    <name>/part-000.npz …  one zlib-compressed .npz per partition, one member
+                           per column; text columns as int32 codes
+    <name>/dicts.npz       the categories of every text column, shared by
+                           all partitions
+
+Members of an .npz are decompressed on access, so read() touches only the
+requested columns of the requested partitions.  The partition column
+itself is not stored — its value is in meta.json, null for the last
+partition holding rows whose key is missing — and each partition keeps the
+original row numbers, so a read returns rows in the order they were written.
+Nothing is pickled; numpy is the only dependency.
+
+    write_table(df, "cleaned/icu_cleaned_full", partition_by="WINDOW")
+    t = ColumnarTable("cleaned/icu_cleaned_full")
+    t.read(columns=["ICU", "AGE_PERCENTIL"], partitions=["0-2"])
+    t.stats()                                   # per partition × column
+"""
+
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from .digests import file_digest
+
+FORMAT_VERSION = 1
+ROW_KEY = "_row"
+
+
+def _is_dict(s):
+    return not (isinstance(s.dtype, np.dtype) and s.dtype.kind in "biufcmM")
+
+
+def _encode(s):
+    """(codes int32, categories array) for a text / categorical column."""
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        codes, cats = s.cat.codes.to_numpy(), s.cat.categories
+    else:
+        codes, cats = pd.factorize(s, use_na_sentinel=True)
+        cats = pd.Index(cats)
+    cats = cats.to_numpy()
+    return codes.astype(np.int32), (cats.astype(str) if cats.dtype == object else cats)
+
+
+def _stats(values, is_codes=False):
+    if is_codes:
+        present = values[values >= 0]
+        return {"nulls": int(len(values) - len(present)),
+                "distinct": int(len(np.unique(present)))}
+    present = values[~pd.isna(values)] if values.dtype.kind in "fmM" else values
+    out = {"nulls": int(len(values) - len(present))}
+    if len(present) and values.dtype.kind in "biuf":
+        out["min"], out["max"] = present.min().item(), present.max().item()
+    elif len(present):
+        out["min"], out["max"] = str(present.min()), str(present.max())
+    return out
+
+
+def _dtype_info(s):
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return {"dtype": "category", "ordered": bool(s.dtype.ordered)}
+    return {"dtype": str(s.dtype)}
+
+
+def _native(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+# ── Writing ─────────────────────────────────────────────────────────────────
+def write_table(df, path, partition_by=None, columns=None):
+    """Write `df` (or its `columns`) as a columnar table directory at `path`."""
+    columns = list(columns) if columns is not None else list(df.columns)
+    stored  = [c for c in columns if c != partition_by]
+    if partition_by is None:
+        groups, part_info = [(None, np.arange(len(df)))], None
+    else:
+        key = df[partition_by]
+        values = (list(key.cat.categories) if isinstance(key.dtype, pd.CategoricalDtype)
+                  else sorted(pd.unique(key.dropna())))
+        groups = [(v, np.flatnonzero((key == v).to_numpy())) for v in values]
+        groups.append((None, np.flatnonzero(key.isna().to_numpy())))   # null keys, last
+        groups = [(_native(v), rows) for v, rows in groups if len(rows)]
+        part_info = dict(_dtype_info(key), values=[_native(v) for v in values])
+        if sum(len(rows) for _, rows in groups) != len(df):
+            raise ValueError(f"partitions of {partition_by!r} do not cover all {len(df)} rows")
+
+    tmp_dir = path.rstrip("/\\") + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    # Text columns: one dictionary per column, codes shared by all partitions
+    full, dicts = {}, {}
+    for j, col in enumerate(stored):
+        name = f"c{j:03d}"
+        if _is_dict(df[col]):
+            full[col], dicts[name] = _encode(df[col])
+        else:
+            full[col] = df[col].to_numpy()
+    with open(os.path.join(tmp_dir, "dicts.npz"), "wb") as f:
+        np.savez_compressed(f, **dicts)
+
+    parts = []
+    for i, (value, rows) in enumerate(groups):
+        arrays, stats = {ROW_KEY: rows.astype(np.int64)}, {}
+        for j, col in enumerate(stored):
+            arrays[f"c{j:03d}"] = values = full[col][rows]
+            stats[col] = _stats(values, is_codes=f"c{j:03d}" in dicts)
+        file = f"part-{i:03d}.npz"
+        with open(os.path.join(tmp_dir, file), "wb") as f:
+            np.savez_compressed(f, **arrays)
+        parts.append({"value": value, "file": file, "rows": len(rows),
+                      "digest": file_digest(os.path.join(tmp_dir, file)), "stats": stats})
+
+    meta = {"version": FORMAT_VERSION, "rows": len(df), "partition_by": partition_by,
+            "partition_dtype": part_info, "columns": columns,
+            "dicts_digest": file_digest(os.path.join(tmp_dir, "dicts.npz")),
+            "stored": [dict(name=c, file=f"c{j:03d}",
+                            kind="dict" if f"c{j:03d}" in dicts else "array",
+                            **_dtype_info(df[c])) for j, c in enumerate(stored)],
+            "partitions": parts}
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=1, ensure_ascii=False)
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_dir, path)
+    return meta
+
+
+# ── Reading ─────────────────────────────────────────────────────────────────
+def _restore(values, info, cats=None):
+    """Column values in their written dtype; `values` are codes if `cats` is given."""
+    if cats is not None:
+        cat = pd.Categorical.from_codes(values, pd.Index(cats), validate=False)
+        if info["dtype"] == "category":
+            return cat.as_ordered() if info["ordered"] else cat
+        return pd.Series(cat).astype(info["dtype"]).array
+    return values
+
+
+class ColumnarTable:
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self._stored = {c["name"]: c for c in self.meta["stored"]}
+
+    @property
+    def columns(self):
+        return list(self.meta["columns"])
+
+    @property
+    def partitions(self):
+        return [p["value"] for p in self.meta["partitions"]]
+
+    @property
+    def rows(self):
+        return self.meta["rows"]
+
+    def digest(self):
+        """Content digest of the whole table (changes whenever any part does)."""
+        h = hashlib.blake2b(digest_size=16)
+        h.update(json.dumps(self.meta, sort_keys=True).encode())
+        return h.hexdigest()
+
+    def stats(self):
+        """Per-column statistics, one row per (partition, column)."""
+        records = [dict(partition=p["value"], column=col, rows=p["rows"], **st)
+                   for p in self.meta["partitions"] for col, st in p["stats"].items()]
+        return pd.DataFrame(records).set_index(["partition", "column"])
+
+    def read(self, columns=None, partitions=None, keep_order=True):
+        """DataFrame of `columns` (default all) from `partitions` (default all).
+
+        Only the requested column members of the requested partition files
+        are decompressed.  With `keep_order` rows come back in the order
+        they were written (RangeIndex); otherwise partition by partition,
+        indexed by their original row numbers.
+        """
+        columns = self.columns if columns is None else list(columns)
+        unknown = set(columns) - set(self.columns)
+        if unknown:
+            raise KeyError(f"unknown column(s): {sorted(unknown)}")
+        parts = self.meta["partitions"]
+        if partitions is not None:
+            wanted = [partitions] if isinstance(partitions, str) else list(partitions)
+            names  = {str(v) for v in wanted if v is not None}
+            parts  = [p for p in parts if (None in wanted if p["value"] is None
+                                           else str(p["value"]) in names)]
+
+        key = self.meta["partition_by"]
+        chunks, row_ids = {c: [] for c in columns}, []
+        for p in parts:
+            with np.load(os.path.join(self.path, p["file"])) as npz:
+                row_ids.append(npz[ROW_KEY])
+                for col in columns:
+                    if col == key:
+                        chunks[col].append(np.full(p["rows"], p["value"],
+                                                   dtype=None if p["value"] is not None else object))
+                    else:
+                        chunks[col].append(npz[self._stored[col]["file"]])
+        rows  = np.concatenate(row_ids) if row_ids else np.empty(0, dtype=np.int64)
+        order = np.argsort(rows, kind="stable") if keep_order and len(parts) > 1 else None
+
+        dicts = None
+        data  = {}
+        for col in columns:
+            values = np.concatenate(chunks[col]) if chunks[col] else np.empty(0)
+            values = values[order] if order is not None else values
+            if col == key:
+                info = self.meta["partition_dtype"]
+                values = (pd.Categorical(values, categories=info["values"])
+                          if info["dtype"] == "category"
+                          else pd.Series(values).astype(info["dtype"]).array)
+            elif self._stored[col]["kind"] == "dict":
+                if dicts is None:
+                    dicts = np.load(os.path.join(self.path, "dicts.npz"))
+                values = _restore(values, self._stored[col], dicts[self._stored[col]["file"]])
+            data[col] = values
+        if dicts is not None:
+            dicts.close()
+        index = pd.RangeIndex(len(rows)) if keep_order else rows
+        return pd.DataFrame(data, index=index, columns=columns)
+
+
+def read_table(path, columns=None, partitions=None):
+    return ColumnarTable(path).read(columns=columns, partitions=partitions)
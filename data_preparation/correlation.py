@@ -0,0 +1,326 @@
+"""
+CRISP-DM: Data Preparation — blockwise correlation matrices
+Pearson / Spearman correlation over hundreds or thousands of columns, for
+feature screening and the correlation heatmaps of 04_visualization.py.
+
+  Pearson    accumulated chunk by chunk over rows: each chunk is shifted by
+             the first chunk's column means, cast to float32 and multiplied
+             block by block of `block_size` columns (BLAS sgemm); the
+             per-chunk products are summed in float64.  Chunks may come
+             from a DataFrame, a CSV read in chunks, the partitions of a
+             columnar table or any iterable of frames.
+  Spearman   Pearson of the average ranks (NaN kept missing).  Ranks need
+             whole columns, so the columns are read and ranked one block at
+             a time into a float32 rank matrix (memory-mapped when
+             `out_dir` is given), which is then accumulated as above.
+
+Missing values are handled like DataFrame.corr: every pair of columns uses
+the rows where both are present.  Until a chunk contains a NaN only the
+column sums and one Gram matrix are kept; after that, pairwise counts and
+sums as well.  (For Spearman each column is ranked over its own present
+rows, whereas DataFrame.corr re-ranks every pair; with no NaN the two
+agree.)
+
+Layout:  <out_dir>/
+             matrix.npy     (p, p) float32 correlations, NaN where undefined
+             meta.json      columns, method, rows
+
+    m = correlation_matrix("cleaned/icu_cleaned_full.csv", out_dir="cleaned/icu_corr")
+    m = CorrelationMatrix.load("cleaned/icu_corr")      # memory-mapped
+    m.frame(["AGE_ABOVE65", "HTN", "ICU"])              # DataFrame of a subset
+    m.top_pairs(20)                                     # most correlated pairs
+"""
+
+import argparse
+import json
+import os
+import shutil
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from .columnar import ColumnarTable
+
+FORMAT_VERSION = 1
+CHUNK_CELLS = 4_000_000          # default rows per chunk: ~32 MB of float64
+BLOCK_SIZE  = 256
+
+
+class CorrelationAccumulator:
+    """Pearson correlation of a fixed column set, accumulated over row chunks."""
+
+    def __init__(self, columns, block_size=BLOCK_SIZE):
+        self.columns    = list(columns)
+        self.block_size = block_size
+        p = len(self.columns)
+        self.rows  = 0
+        self.shift = None                     # first chunk's column means
+        self.n     = 0                        # complete-data mode: rows,
+        self.sums  = np.zeros(p)              #   column sums,
+        self.gram  = np.zeros((p, p))         #   Σ x xᵀ (shifted)
+        self.pairwise = None                  # after a NaN: per-pair N, Σx, Σx²
+
+    def _blocks(self):
+        p = len(self.columns)
+        return [slice(i, min(i + self.block_size, p)) for i in range(0, p, self.block_size)]
+
+    def _to_pairwise(self):
+        p = len(self.columns)
+        sq = np.diag(self.gram).copy()
+        self.pairwise = {"n":  np.full((p, p), float(self.n)),
+                         "s":  np.repeat(self.sums[:, None], p, axis=1),
+                         "sq": np.repeat(sq[:, None], p, axis=1)}
+
+    def update(self, chunk):
+        """Add the rows of `chunk` (DataFrame with the columns, or 2-D array)."""
+        if isinstance(chunk, pd.DataFrame):
+            chunk = chunk[self.columns].to_numpy(dtype=np.float64)
+        x = np.asarray(chunk, dtype=np.float64)
+        if not len(x):
+            return self
+        if self.shift is None:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", RuntimeWarning)      # all-NaN columns
+                self.shift = np.nan_to_num(np.nanmean(x, axis=0))
+        x32 = (x - self.shift).astype(np.float32)
+        missing = np.isnan(x32)
+        self.rows += len(x32)
+        blocks = self._blocks()
+
+        if not missing.any() and self.pairwise is None:
+            self.n    += len(x32)
+            self.sums += x32.sum(axis=0, dtype=np.float64)
+            for i, bi in enumerate(blocks):
+                for bj in blocks[i:]:
+                    g = x32[:, bi].T @ x32[:, bj]
+                    self.gram[bi, bj] += g
+                    if bi != bj:
+                        self.gram[bj, bi] += g.T
+            return self
+
+        if self.pairwise is None:
+            self._to_pairwise()
+        present = (~missing).astype(np.float32)
+        x32[missing] = 0
+        sq32 = x32 * x32
+        pw = self.pairwise
+        for bi in blocks:
+            pw["n"][bi]  += present[:, bi].T @ present
+            pw["s"][bi]  += x32[:, bi].T @ present
+            pw["sq"][bi] += sq32[:, bi].T @ present
+            self.gram[bi] += x32[:, bi].T @ x32
+        return self
+
+    def _rows_of(self, rows):
+        """Correlations of the rows `rows` (a slice) against every column."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            if self.pairwise is None:
+                n = np.full((rows.stop - rows.start, len(self.columns)), float(self.n))
+                cov = self.gram[rows] - np.outer(self.sums[rows], self.sums) / self.n
+                var = np.diag(self.gram) - self.sums ** 2 / self.n
+                var_i, var_j = var[rows][:, None], var[None, :]
+            else:
+                pw = self.pairwise
+                n  = pw["n"][rows]
+                s_ij, s_ji = pw["s"][rows], pw["s"][:, rows].T
+                cov   = self.gram[rows] - s_ij * s_ji / n
+                var_i = pw["sq"][rows] - s_ij ** 2 / n
+                var_j = pw["sq"][:, rows].T - s_ji ** 2 / n
+            corr = cov / np.sqrt(var_i * var_j)
+        corr[(n < 2) | ~(var_i > 0) | ~(var_j > 0)] = np.nan
+        return np.clip(corr, -1, 1)
+
+    def matrix(self, out=None):
+        """(p, p) correlation matrix, written block of rows by block into `out`."""
+        p = len(self.columns)
+        out = np.empty((p, p), dtype=np.float32) if out is None else out
+        for rows in self._blocks():
+            block = self._rows_of(rows)
+            diag = np.arange(rows.start, rows.stop)
+            ok = ~np.isnan(block[diag - rows.start, diag])
+            block[(diag - rows.start)[ok], diag[ok]] = 1.0
+            out[rows] = block
+        return out
+
+
+# ── Artifact ────────────────────────────────────────────────────────────────
+class CorrelationMatrix:
+    def __init__(self, values, meta):
+        self.values  = values
+        self.meta    = meta
+        self.columns = meta["columns"]
+        self._pos = {c: i for i, c in enumerate(self.columns)}
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["version"] != FORMAT_VERSION:
+            raise ValueError(f"correlation format v{meta['version']}, "
+                             f"expected v{FORMAT_VERSION}")
+        return cls(np.load(os.path.join(path, "matrix.npy"),
+                           mmap_mode="r" if mmap else None), meta)
+
+    def frame(self, columns=None):
+        """DataFrame of the correlations among `columns` (default all; float64)."""
+        columns = self.columns if columns is None else list(columns)
+        pos = [self._pos[c] for c in columns]
+        return pd.DataFrame(self.values[np.ix_(pos, pos)].astype(np.float64),
+                            index=pd.Index(columns), columns=pd.Index(columns))
+
+    def top_pairs(self, k=20):
+        """The `k` column pairs with the largest |correlation|, strongest first."""
+        rows = []
+        for start in range(0, len(self.columns), BLOCK_SIZE):
+            block = np.abs(np.asarray(self.values[start:start + BLOCK_SIZE], dtype=np.float64))
+            i, j = np.nonzero(np.triu(np.ones_like(block, dtype=bool), k=start + 1))
+            v = np.nan_to_num(block[i, j], nan=-1)
+            keep = np.argsort(v)[::-1][:k]
+            rows += [(self.columns[start + a], self.columns[b], self.values[start + a, b])
+                     for a, b in zip(i[keep], j[keep])]
+        out = pd.DataFrame(rows, columns=["column_a", "column_b", "corr"])
+        return (out.assign(abs_corr=out["corr"].abs())
+                   .sort_values("abs_corr", ascending=False, kind="stable")
+                   .head(k).drop(columns="abs_corr").reset_index(drop=True))
+
+
+def _save(acc, out_dir, method):
+    tmp_dir = out_dir.rstrip("/\\") + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    p = len(acc.columns)
+    values = np.lib.format.open_memmap(os.path.join(tmp_dir, "matrix.npy"), mode="w+",
+                                       dtype=np.float32, shape=(p, p))
+    acc.matrix(out=values)
+    values.flush()
+    del values
+    meta = {"version": FORMAT_VERSION, "method": method, "rows": acc.rows,
+            "columns": acc.columns, "dtype": "float32"}
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=1, ensure_ascii=False)
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp_dir, out_dir)
+    return CorrelationMatrix.load(out_dir)
+
+
+# ── Sources ─────────────────────────────────────────────────────────────────
+def _numeric_columns(data):
+    if isinstance(data, pd.DataFrame):
+        return list(data.select_dtypes("number").columns)
+    if isinstance(data, ColumnarTable):
+        return [c["name"] for c in data.meta["stored"]
+                if c["kind"] == "array" and np.dtype(c["dtype"]).kind in "biuf"]
+    head = pd.read_csv(data, nrows=1000)
+    return list(head.select_dtypes("number").columns)
+
+
+def _row_chunks(data, columns, chunksize):
+    """Row chunks (DataFrames of `columns`) of a frame, table, CSV path or iterable."""
+    if isinstance(data, pd.DataFrame):
+        for start in range(0, len(data), chunksize):
+            yield data.iloc[start:start + chunksize][columns]
+    elif isinstance(data, ColumnarTable):
+        for part in data.partitions:
+            yield data.read(columns=columns, partitions=[part], keep_order=False)
+    elif isinstance(data, str):
+        yield from pd.read_csv(data, usecols=columns, chunksize=chunksize)
+    else:
+        yield from data
+
+
+def _read_columns(data, columns):
+    """All rows of `columns` (one column block at a time, for ranking)."""
+    if isinstance(data, pd.DataFrame):
+        return data[columns]
+    if isinstance(data, ColumnarTable):
+        return data.read(columns=columns, keep_order=False)
+    if isinstance(data, str):
+        return pd.read_csv(data, usecols=columns)[columns]
+    raise TypeError("spearman needs a DataFrame, a ColumnarTable or a CSV path")
+
+
+def _ranks(data, columns, block_size, out_dir):
+    """(rows, p) float32 average ranks of `columns`.
+
+    Columns are read one block at a time and ranked one column at a time,
+    so only one block of raw values is in memory besides the ranks.
+    """
+    ranks = None
+    for start in range(0, len(columns), block_size):
+        block = _read_columns(data, columns[start:start + block_size])
+        if ranks is None:
+            shape = (len(block), len(columns))
+            if out_dir is None:
+                ranks = np.empty(shape, dtype=np.float32)
+            else:
+                os.makedirs(os.path.dirname(os.path.abspath(out_dir)), exist_ok=True)
+                ranks = np.lib.format.open_memmap(out_dir.rstrip("/\\") + ".ranks.npy",
+                                                  mode="w+", dtype=np.float32, shape=shape)
+        for j, col in enumerate(block.columns):
+            ranks[:, start + j] = block[col].rank().to_numpy(dtype=np.float32)
+    return ranks
+
+
+def correlation_matrix(data, columns=None, method="pearson", out_dir=None,
+                       chunksize=None, block_size=BLOCK_SIZE):
+    """Correlation matrix of `columns` (default: every numeric column) of `data`.
+
+    `data` is a DataFrame, a ColumnarTable, a CSV path or (Pearson only) an
+    iterable of DataFrame chunks.  `chunksize` rows are accumulated at a
+    time (default: CHUNK_CELLS / number of columns).  With `out_dir` the
+    matrix is written there and returned memory-mapped; otherwise it is
+    kept in memory.  Average ranks are exact in float32 up to 2**23 rows.
+    """
+    if columns is None:
+        if not isinstance(data, (pd.DataFrame, ColumnarTable, str)):
+            raise ValueError("pass `columns` when `data` is an iterable of chunks")
+        columns = _numeric_columns(data)
+    columns = list(columns)
+    chunksize = chunksize or max(1024, CHUNK_CELLS // max(len(columns), 1))
+    acc = CorrelationAccumulator(columns, block_size)
+    if method == "pearson":
+        for chunk in _row_chunks(data, columns, chunksize):
+            acc.update(chunk)
+    elif method == "spearman":
+        ranks = _ranks(data, columns, block_size, out_dir)
+        for start in range(0, len(ranks), chunksize):
+            acc.update(ranks[start:start + chunksize])
+        if out_dir is not None:
+            filename = ranks.filename
+            del ranks
+            os.remove(filename)
+    else:
+        raise ValueError(f"unknown method {method!r}: use 'pearson' or 'spearman'")
+
+    if out_dir is not None:
+        return _save(acc, out_dir, method)
+    meta = {"version": FORMAT_VERSION, "method": method, "rows": acc.rows,
+            "columns": columns, "dtype": "float32"}
+    return CorrelationMatrix(acc.matrix(), meta)
+
+
+# ── Command line: screen a cleaned dataset ──────────────────────────────────
+def main():
+    ap = argparse.ArgumentParser(description="Blockwise correlation matrix of a cleaned "
+                                             "CSV or columnar table")
+    ap.add_argument("source", help="CSV file or columnar table directory")
+    ap.add_argument("--out", required=True, help="output directory (matrix.npy + meta.json)")
+    ap.add_argument("--method", choices=["pearson", "spearman"], default="pearson")
+    ap.add_argument("--chunksize", type=int, default=None,
+                    help="rows per chunk (default: ~4M cells per chunk)")
+    ap.add_argument("--block-size", type=int, default=BLOCK_SIZE)
+    ap.add_argument("--top", type=int, default=20, help="print the N most correlated pairs")
+    args = ap.parse_args()
+
+    data = ColumnarTable(args.source) if os.path.isdir(args.source) else args.source
+    m = correlation_matrix(data, method=args.method, out_dir=args.out,
+                           chunksize=args.chunksize, block_size=args.block_size)
+    print(f"{args.method} correlation of {len(m.columns)} columns over "
+          f"{m.meta['rows']:,} rows  →  {args.out}")
+    if args.top:
+        print(m.top_pairs(args.top).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""
+CRISP-DM: Data Preparation — patient-grouped cross-validation folds
+Leakage-free folds over the ICU output of 03_icu_cleaning.py: every
+patient's windows fall in one fold, and each fold's cap bounds and
+StandardScaler are fit on its training patients only.
+
+Refitting both for every fold of every repeat would re-sort and re-scan the
+training rows each time.  Instead, patients are dealt once into `n_groups`
+patient groups (round-robin, stratified by ICU outcome), and per group and
+lab / vital column we keep:
+
+    count, Σ(x − c), Σ(x − c)²      c = the column's mean over all rows
+    the values beyond the guards    exact; guards = the all-row quantiles at
+                                    2 × lower_pct and 1 − 2 × (1 − upper_pct)
+    a KLL sketch of the rest        (quantile_sketch.py)
+
+A fold is a set of whole groups, so its training statistics are sums over
+the other groups plus the union of their tail values and sketch items.
+Cap bounds are quantiles of that union; the scaler's mean and variance are
+those of the capped values, i.e. the uncapped sums with every value beyond
+a bound swapped for the bound.  A fold's bounds lie inside the guards
+unless its training patients differ sharply from the rest, so both come
+from exact values and match a direct refit up to rounding; only a bound
+beyond a guard falls back to the sketch (~1.7 / sketch_k rank error).
+Repeats reshuffle which groups form each fold.
+
+Fold arrays come from the tensor store (cleaned/icu_tensor/, written by
+03 --tensor), with 03's scaling undone using icu_scaler.pkl — no source data
+is read.  Those values were already capped at the all-patient bounds and
+imputed with all-patient medians by 03, so a fold bound outside the global
+one has no effect and imputation is not refit per fold.
+
+    folds = PatientFolds.from_outputs()
+    for fold in folds.split(k=5, repeats=3):
+        X_tr, y_tr, X_va, y_va = fold.arrays(window="0-2")
+        fold.capper, fold.scaler        # fit on fold.train_patients only
+"""
+
+import argparse
+import os
+import pickle
+import time
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+from .icu_tensor import TENSOR_DIR, WINDOWS, IcuTensor
+from .quantile_sketch import KllSketch, weighted_quantiles
+from .winsorizer import Winsorizer
+
+BASE_DIR    = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCALER_FILE = os.path.join(BASE_DIR, "cleaned", "icu_scaler.pkl")
+TAIL_FACTOR = 2         # tails kept exactly: lower_pct × 2 and (1 − upper_pct) × 2
+
+FoldArrays = namedtuple("FoldArrays", "X_train y_train X_val y_val")
+
+
+class Fold:
+    """One train / validation split of a PatientFolds, fit on its training groups."""
+
+    def __init__(self, folds, repeat, index, val_groups):
+        self.repeat       = repeat
+        self.index        = index
+        self.val_groups   = np.sort(val_groups)
+        self.train_groups = np.setdiff1d(np.arange(folds.n_groups), self.val_groups)
+        self._folds = folds
+        self.capper, self.scaler = folds.fit(self.train_groups)
+
+    @property
+    def train_patients(self):
+        return self._folds.patients_of(self.train_groups)
+
+    @property
+    def val_patients(self):
+        return self._folds.patients_of(self.val_groups)
+
+    def arrays(self, window=None, dtype=None):
+        """FoldArrays of capped, scaled rows (one per present patient window).
+
+        `window` keeps the rows of one window (name or index) only; features
+        are in tensor order and `dtype` defaults to the tensor's.
+        """
+        f = self._folds
+        X_train, y_train = f.transform(f.rows_of(self.train_groups, window),
+                                       self.capper, self.scaler, dtype)
+        X_val, y_val = f.transform(f.rows_of(self.val_groups, window),
+                                   self.capper, self.scaler, dtype)
+        return FoldArrays(X_train, y_train, X_val, y_val)
+
+
+class PatientFolds:
+    """Per-patient-group statistics of the ICU rows, computed once.
+
+    values     : (P, W, F) features, NaN where `present` is False
+    present    : (P, W) bool;  icu : (P, W) labels, -1 if absent
+    continuous : slice of the lab / vital features to cap and scale
+    scaler     : StandardScaler already applied to those features (undone)
+    """
+
+    def __init__(self, values, present, icu, patients, features, continuous,
+                 scaler=None, n_groups=20, lower_pct=0.01, upper_pct=0.99,
+                 sketch_k=1000, seed=0, dtype=None):
+        if not 2 <= n_groups <= len(patients):
+            raise ValueError(f"n_groups must be between 2 and {len(patients)} patients")
+        self.patients   = np.asarray(patients)
+        self.features   = list(features)
+        self.continuous = continuous
+        self.cont_names = self.features[continuous]
+        self.n_groups   = n_groups
+        self.lower_pct  = lower_pct
+        self.upper_pct  = upper_pct
+        self.sketch_k   = sketch_k
+        self.dtype      = np.dtype(dtype or values.dtype)
+
+        # Deal patients round-robin, negatives then positives (random order
+        # within each), so every group gets the same share of ICU patients
+        icu = np.asarray(icu)
+        rng = np.random.default_rng(seed)
+        order = np.lexsort((rng.random(len(patients)), (icu == 1).any(axis=1)))
+        self.group = np.empty(len(patients), dtype=np.intp)
+        self.group[order] = np.arange(len(patients)) % n_groups
+
+        # One row per present (patient, window), in patient order
+        self.row_patient, self.row_window = np.nonzero(present)
+        self.row_label = icu[self.row_patient, self.row_window]
+        self.rows = np.asarray(values[self.row_patient, self.row_window], dtype=np.float64)
+        if scaler is not None:
+            self.rows[:, continuous] *= scaler.scale_
+            self.rows[:, continuous] += scaler.mean_
+        self._group_stats()
+
+    @classmethod
+    def from_outputs(cls, tensor_dir=TENSOR_DIR, scaler_file=SCALER_FILE, **kwargs):
+        """Folds over the tensor store and scaler written by 03_icu_cleaning.py."""
+        t = IcuTensor.load(tensor_dir)
+        with open(scaler_file, "rb") as f:
+            scaler = pickle.load(f)
+        cont = t.group("continuous")
+        if list(scaler.feature_names_in_) != t.features[cont]:
+            raise ValueError(f"{scaler_file} does not match the tensor's lab / vital features")
+        return cls(t.values, t.present, t.icu, t.patients, t.features, cont,
+                   scaler=scaler, **kwargs)
+
+    # ── Sufficient statistics ───────────────────────────────────────────────
+    def _group_stats(self):
+        cont = self.rows[:, self.continuous]
+        with np.errstate(invalid="ignore"):
+            self.shift = np.nan_to_num(np.nanmean(cont, axis=0))
+        # Values beyond these are kept exactly: a fold's bounds fall inside them
+        guard_lo, guard_hi = np.nanquantile(cont, [self.lower_pct * TAIL_FACTOR,
+                                                   1 - (1 - self.upper_pct) * TAIL_FACTOR],
+                                            axis=0)
+        shape = (self.n_groups, cont.shape[1])
+        self.count, self.s1, self.s2 = np.zeros(shape), np.zeros(shape), np.zeros(shape)
+        self._items = []
+        row_group = self.group[self.row_patient]
+        order  = np.argsort(row_group, kind="stable")
+        bounds = np.searchsorted(row_group[order], np.arange(self.n_groups + 1))
+        for g in range(self.n_groups):
+            x = cont[order[bounds[g]:bounds[g + 1]]]
+            d = np.nan_to_num(x - self.shift)
+            self.count[g] = (~np.isnan(x)).sum(axis=0)
+            self.s1[g] = d.sum(axis=0)
+            self.s2[g] = (d * d).sum(axis=0)
+            items = []
+            for c in range(x.shape[1]):
+                col  = x[:, c]
+                tail = (col < guard_lo[c]) | (col > guard_hi[c])
+                sketch = KllSketch(self.sketch_k, seed=g).update(col[~tail])
+                values, weights = sketch.items()
+                items.append((np.concatenate([values, col[tail]]),
+                              np.concatenate([weights, np.ones(tail.sum(), dtype=np.int64)])))
+            self._items.append(items)
+
+    def fit(self, groups):
+        """(Winsorizer, StandardScaler) of the capped features of `groups`."""
+        groups = np.asarray(groups)
+        n  = self.count[groups].sum(axis=0)
+        s1 = self.s1[groups].sum(axis=0)
+        s2 = self.s2[groups].sum(axis=0)
+        qs = [self.lower_pct, self.upper_pct]
+        lower, upper = np.empty(len(n)), np.empty(len(n))
+        for c, shift in enumerate(self.shift):
+            items   = [self._items[g][c] for g in groups]
+            values  = np.concatenate([v for v, _ in items])
+            weights = np.concatenate([w for _, w in items])
+            lower[c], upper[c] = weighted_quantiles(values, weights, qs)
+            # Swap the values beyond each bound for the bound in both sums
+            for bound, tail in ((lower[c], values < lower[c]), (upper[c], values > upper[c])):
+                w, d, b = weights[tail], values[tail] - shift, bound - shift
+                s1[c] -= w @ (d - b)
+                s2[c] -= w @ (d * d - b * b)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = s1 / n
+            var  = np.maximum(s2 / n - mean * mean, 0.0)
+        mean += self.shift
+
+        capper = Winsorizer(lower_pct=self.lower_pct, upper_pct=self.upper_pct)
+        capper.lower_ = pd.Series(lower, index=self.cont_names)
+        capper.upper_ = pd.Series(upper, index=self.cont_names)
+        scaler = StandardScaler()
+        scaler.mean_, scaler.var_ = mean, var
+        # Near-zero variances count as constant, as StandardScaler decides it
+        eps = np.finfo(np.float64).eps
+        constant = var <= n * eps * var + (n * mean * eps) ** 2
+        scaler.scale_ = np.where(constant, 1.0, np.sqrt(var))
+        n = n.astype(np.int64)
+        scaler.n_samples_seen_   = n if (n != n[0]).any() else int(n[0])
+        scaler.n_features_in_    = len(self.cont_names)
+        scaler.feature_names_in_ = np.asarray(self.cont_names, dtype=object)
+        return capper, scaler
+
+    # ── Folds ───────────────────────────────────────────────────────────────
+    def split(self, k=5, repeats=1, seed=0):
+        """Yield k folds per repeat; each repeat shuffles the groups anew."""
+        if not 2 <= k <= self.n_groups:
+            raise ValueError(f"k must be between 2 and n_groups={self.n_groups}")
+        for r in range(repeats):
+            perm = np.random.default_rng([seed, r]).permutation(self.n_groups)
+            for i, val_groups in enumerate(np.array_split(perm, k)):
+                yield Fold(self, r, i, val_groups)
+
+    def patients_of(self, groups):
+        return self.patients[np.isin(self.group, groups)]
+
+    def rows_of(self, groups, window=None):
+        """Boolean row mask of the patients in `groups` (one window only if given)."""
+        mask = np.isin(self.group[self.row_patient], groups)
+        if window is not None:
+            w = window if isinstance(window, (int, np.integer)) else WINDOWS.index(window)
+            mask &= self.row_window == w
+        return mask
+
+    def transform(self, mask, capper, scaler, dtype=None):
+        """(X, y) of the masked rows, capped and scaled with a fold's parameters."""
+        X = self.rows[mask]
+        cont = X[:, self.continuous]
+        np.clip(cont, capper.lower_.to_numpy(), capper.upper_.to_numpy(), out=cont)
+        cont -= scaler.mean_
+        cont /= scaler.scale_
+        return X.astype(dtype or self.dtype, copy=False), self.row_label[mask]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Patient-grouped CV folds over the ICU tensor")
+    ap.add_argument("--tensor", default=TENSOR_DIR)
+    ap.add_argument("--scaler", default=SCALER_FILE)
+    ap.add_argument("--k", type=int, default=5)
+    ap.add_argument("--repeats", type=int, default=1)
+    ap.add_argument("--groups", type=int, default=20, help="patient groups (>= k)")
+    ap.add_argument("--sketch-k", type=int, default=1000)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    folds = PatientFolds.from_outputs(args.tensor, args.scaler, n_groups=args.groups,
+                                      sketch_k=args.sketch_k, seed=args.seed)
+    print(f"Group statistics: {len(folds.patients):,} patients, {len(folds.rows):,} rows, "
+          f"{args.groups} groups in {time.perf_counter() - t0:.2f} s")
+    print(f"  {'repeat':>6s} {'fold':>4s}  {'train pts':>9s}  {'val pts':>7s}  "
+          f"{'val rows':>8s}  {'val ICU':>7s}  {'fit ms':>6s}")
+    t0 = time.perf_counter()
+    for fold in folds.split(args.k, args.repeats, args.seed):
+        # The fold's parameters are merged when the generator yields it
+        ms = (time.perf_counter() - t0) * 1e3
+        val = folds.rows_of(fold.val_groups)
+        print(f"  {fold.repeat:6d} {fold.index:4d}  {len(fold.train_patients):9,d}  "
+              f"{len(fold.val_patients):7,d}  {val.sum():8,d}  "
+              f"{(folds.row_label[val] == 1).mean():7.1%}  {ms:6.1f}")
+        t0 = time.perf_counter()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+CRISP-DM: Data Preparation — entry-date parsing
+Parses the hospital "Date of Data Entry" strings for steps 4 and 5 of
+01_hospital_cleaning.py (and each chunk of hospital_stream.py):
+
+  1. detect  the explicit format(s) that cover a sample of distinct values,
+             from day-first CANDIDATE_FORMATS (done once per parser)
+  2. parse   each distinct string once, format by format: zero-padded,
+             fixed-width strings are decoded with numpy digit arithmetic,
+             the rest with pd.to_datetime(format=...); strings no detected
+             format matches go through pandas' per-element parser
+             (dayfirst), also once per distinct value
+  3. map     the parsed values back to the rows through the factorize codes
+
+Strings that still do not parse become NaT and are counted in `n_failed`.
+entry_features() derives year / month / day-of-week / hour with numpy
+datetime64 arithmetic instead of the pandas calendar accessors.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Day-first, most specific first
+CANDIDATE_FORMATS = [
+    "%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M", "%d/%m/%Y",
+    "%d-%m-%Y %H:%M:%S", "%d-%m-%Y %H:%M", "%d-%m-%Y",
+    "%d.%m.%Y %H:%M:%S", "%d.%m.%Y %H:%M", "%d.%m.%Y",
+    "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d",
+    "%d/%m/%y %H:%M:%S", "%d/%m/%y %H:%M", "%d/%m/%y",
+]
+
+
+_FIELD_WIDTH = {"%d": 2, "%m": 2, "%Y": 4, "%y": 2, "%H": 2, "%M": 2, "%S": 2}
+_LIMITS = {"%d": (1, 31), "%m": (1, 12), "%H": (0, 23), "%M": (0, 59), "%S": (0, 59)}
+
+
+def _try_format(values, fmt):
+    return pd.to_datetime(values, format=fmt, errors="coerce")
+
+
+def _fixed_layout(fmt):
+    """([(directive, start, width)], [(position, literal)], width) or None."""
+    fields, literals, pos, i = [], [], 0, 0
+    while i < len(fmt):
+        if fmt[i] == "%":
+            directive = fmt[i:i + 2]
+            if directive not in _FIELD_WIDTH:
+                return None
+            fields.append((directive, pos, _FIELD_WIDTH[directive]))
+            pos += _FIELD_WIDTH[directive]
+            i += 2
+        else:
+            literals.append((pos, ord(fmt[i])))
+            pos += 1
+            i += 1
+    return fields, literals, pos
+
+
+def _parse_fixed(values, fmt):
+    """Vectorised parse of zero-padded strings in `fmt`.
+
+    Returns a datetime64[us] array with NaT wherever a value is not exactly
+    in that layout (wrong length, non-digit, out-of-range field, day past
+    the end of the month), or None if `fmt` has no fixed width.
+    """
+    layout = _fixed_layout(fmt)
+    if layout is None:
+        return None
+    fields, literals, width = layout
+    out = np.full(len(values), np.datetime64("NaT"), dtype="datetime64[us]")
+    rows = np.flatnonzero(np.fromiter((isinstance(v, str) and len(v) == width for v in values),
+                                      dtype=bool, count=len(values)))
+    # One UCS-4 code point per column; non-ASCII characters fail the checks below
+    text  = np.asarray(pd.Index(values)[rows], dtype=f"U{width}")
+    chars = text.view(np.uint32).reshape(len(rows), width)
+
+    ok = np.ones(len(rows), dtype=bool)
+    for pos, literal in literals:
+        ok &= chars[:, pos] == literal
+    parts = {}
+    for directive, start, w in fields:
+        digits = chars[:, start:start + w].astype(np.int64) - ord("0")
+        ok &= ((digits >= 0) & (digits <= 9)).all(axis=1)
+        value = np.zeros(len(rows), dtype=np.int64)
+        for k in range(w):
+            value = value * 10 + digits[:, k]
+        if directive in _LIMITS:
+            lo, hi = _LIMITS[directive]
+            ok &= (value >= lo) & (value <= hi)
+        parts[directive] = value
+
+    if "%y" in parts:                        # strptime: 69–99 → 19xx, 00–68 → 20xx
+        parts["%Y"] = np.where(parts["%y"] < 69, 2000, 1900) + parts["%y"]
+    year  = parts.get("%Y", np.full(len(rows), 1900))
+    month = parts.get("%m", np.ones(len(rows), dtype=np.int64))
+    day   = parts.get("%d", np.ones(len(rows), dtype=np.int64))
+    months = (year - 1970) * 12 + month - 1
+    date = months.astype("datetime64[M]").astype("datetime64[D]") + (day - 1)
+    ok &= date.astype("datetime64[M]").astype(np.int64) == months   # e.g. 31/02
+    zero = np.zeros(len(rows), dtype=np.int64)
+    seconds = (parts.get("%H", zero) * 60 + parts.get("%M", zero)) * 60 + parts.get("%S", zero)
+    parsed = date.astype("datetime64[us]") + (seconds * 1_000_000).astype("timedelta64[us]")
+    out[rows[ok]] = parsed[ok]
+    return out
+
+
+def detect_formats(sample, candidates=CANDIDATE_FORMATS, min_share=0.01):
+    """Formats that together parse `sample`, most common first.
+
+    Greedy: take the candidate that parses most of the still-unparsed
+    values, repeat until nothing is left or no candidate parses at least
+    `min_share` of the sample.
+    """
+    remaining = pd.Index(sample, dtype=object).dropna()
+    formats = []
+    need = max(1, int(min_share * len(remaining)))
+    while len(remaining):
+        hits = {fmt: _try_format(remaining, fmt).notna() for fmt in candidates
+                if fmt not in formats}
+        best = max(hits, key=lambda fmt: hits[fmt].sum(), default=None)
+        if best is None or hits[best].sum() < need:
+            break
+        formats.append(best)
+        remaining = remaining[~hits[best]]
+    return formats
+
+
+class DateParser:
+    def __init__(self, formats=None, sample_size=1000, dayfirst=True, seed=0):
+        self.formats     = formats           # None → detected on first parse() with dates
+        self.sample_size = sample_size
+        self.dayfirst    = dayfirst
+        self.seed        = seed
+        self.n_values = self.n_unique = self.n_failed = self.n_fallback = 0
+        self.n_calls  = 0                    # n_unique is summed over calls (chunks)
+
+    def parse(self, values):
+        """datetime64 Series for the strings in `values` (same index)."""
+        if isinstance(values, pd.Series) and pd.api.types.is_datetime64_any_dtype(values):
+            return values                    # already parsed by the reader (e.g. xlsx)
+        codes, uniques = pd.factorize(pd.Series(values, copy=False))
+        uniques = pd.Index(uniques, dtype=object)
+        if self.formats is None:
+            sample = uniques
+            if len(uniques) > self.sample_size:
+                rng = np.random.default_rng(self.seed)
+                sample = uniques[rng.choice(len(uniques), self.sample_size, replace=False)]
+            # None again if nothing parsed (e.g. an all-blank chunk): retry next call
+            self.formats = detect_formats(sample) or None
+
+        # One extra NaT slot at the end: missing values (code -1) index it
+        parsed = np.full(len(uniques) + 1, np.datetime64("NaT"), dtype="datetime64[us]")
+        todo = np.arange(len(uniques))               # positions not parsed yet
+        for fmt in self.formats or ():
+            if len(todo):
+                fast = _parse_fixed(uniques[todo], fmt)
+                if fast is not None:
+                    ok = ~np.isnat(fast)
+                    parsed[todo[ok]] = fast[ok]
+                    todo = todo[~ok]
+            if len(todo):
+                hit = _try_format(uniques[todo], fmt)
+                ok = hit.notna()
+                parsed[todo[ok]] = hit[ok].to_numpy().astype("datetime64[us]")
+                todo = todo[~ok]
+        if len(todo):
+            self.n_fallback += len(todo)
+            rest = pd.to_datetime(uniques[todo], dayfirst=self.dayfirst, format="mixed",
+                                  errors="coerce")
+            parsed[todo] = rest.to_numpy().astype("datetime64[us]")
+
+        out = parsed[codes]
+        present = codes >= 0
+        self.n_values += int(present.sum())
+        self.n_unique += len(uniques)
+        self.n_calls  += 1
+        self.n_failed += int(np.isnat(out[present]).sum())
+        index = values.index if isinstance(values, pd.Series) else None
+        return pd.Series(out, index=index)
+
+    def summary(self):
+        formats = ", ".join(self.formats or []) or "none"
+        distinct = "distinct" if self.n_calls <= 1 else f"distinct per chunk ({self.n_calls} chunks)"
+        return (f"formats [{formats}]  |  {self.n_unique:,} {distinct} of {self.n_values:,}"
+                f"  |  unparseable: {self.n_failed:,}")
+
+
+def entry_features(dates):
+    """{year, month, day_of_week, hour} arrays from a datetime64 Series.
+
+    Same values and dtypes as the .dt accessors: int32, or float64 with
+    NaN where the date is NaT.
+    """
+    values = dates.to_numpy()
+    nat = np.isnat(values)
+    days = values.astype("datetime64[D]")
+    months = values.astype("datetime64[M]").astype(np.int64)
+    features = {
+        "year":        months // 12 + 1970,
+        "month":       months % 12 + 1,
+        "day_of_week": (days.astype(np.int64) + 3) % 7,      # 1970-01-01 was a Thursday
+        "hour":        (values - days).astype("timedelta64[h]").astype(np.int64),
+    }
+    for name, arr in features.items():
+        features[name] = np.where(nat, np.nan, arr) if nat.any() else arr.astype(np.int32)
+    return features
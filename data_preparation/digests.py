@@ -0,0 +1,26 @@
+"""
+CRISP-DM: Data Preparation — content digests
+blake2b hashes of files: the keys of the ingest cache, the part digests of
+columnar tables, the pipeline's change detection and the plot state.
+Standard library only, so the pipeline runner and script 4 can hash their
+inputs without importing pandas.
+"""
+
+import hashlib
+import os
+
+#   (path, size, mtime) → digest: a file hashed for the ingest cache key is not
+#   read again when the same run needs its digest (e.g. incremental.py)
+_seen = {}
+
+
+def file_digest(path, chunk_size=1 << 20):
+    st  = os.stat(path)
+    key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    if key not in _seen:
+        h = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(chunk_size), b""):
+                h.update(block)
+        _seen[key] = h.hexdigest()
+    return _seen[key]
@@ -0,0 +1,107 @@
+"""
+CRISP-DM: Data Preparation — hospital row-level cleaning steps
+Steps 2 and 4–8 of 01_hospital_cleaning.py as functions, so the in-memory
+script and the chunked streaming mode (hospital_stream.py) apply exactly
+the same transformations.  All of them work row by row and are safe to
+run on one chunk at a time.
+
+Text columns are dictionary-encoded from step 6 on: they are normalised
+once per distinct value and held as categoricals whose codes come from a
+shared CodeTables (code_tables.py), so chunks and runs agree on codes.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .code_tables import CodeTables
+from .date_parsing import DateParser, entry_features
+
+# Sentinel values that identify header rows embedded in the raw export
+HEADER_SENTINELS = {
+    "Gender":    ["Sex", "Gender"],
+    "Route":     ["Route"],
+    "Frequency": ["Freq", "Frequency"],
+}
+NUMERIC_COLS = ["Age", "Dosage (gram)", "Duration (days)"]
+DATE_COL     = "Date of Data Entry"
+TEXT_COLS    = ["Gender", "Diagnosis", "Name of Drug", "Route", "Frequency", "Indication"]
+CAP_COLS     = NUMERIC_COLS
+GENDER_MAP   = {"male": 1, "female": 0}
+
+
+def header_mask(df):
+    """[2] True for rows that are repeated header lines, not data."""
+    mask = pd.Series(False, index=df.index)
+    for col, sentinels in HEADER_SENTINELS.items():
+        mask |= df[col].isin(sentinels)
+    return mask
+
+
+def fix_dtypes(df, parser=None):
+    """[4] Numeric columns → numbers, entry date → datetime (in place).
+
+    Dates go through `parser` (a DateParser, which keeps the detected
+    formats and running counts across chunks); returns the number of
+    entry dates that could not be parsed.
+    """
+    for col in NUMERIC_COLS:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    parser = parser if parser is not None else DateParser()
+    failed = parser.n_failed
+    df[DATE_COL] = parser.parse(df[DATE_COL])
+    return parser.n_failed - failed
+
+
+def add_entry_features(df):
+    """[5] Replace the entry date with year / month / day-of-week / hour."""
+    features = entry_features(df[DATE_COL])
+    df["entry_year"]        = features["year"]
+    df["entry_month"]       = features["month"]
+    df["entry_day_of_week"] = features["day_of_week"]   # 0=Monday
+    df["entry_hour"]        = features["hour"]
+    return df.drop(columns=[DATE_COL])
+
+
+def _strip_lower(values):
+    return values.astype(str).str.strip().str.lower()
+
+
+def standardise_text(df, codes=None):
+    """[6] Strip + lowercase the free-text columns (in place).
+
+    Each column comes out categorical with the codes of `codes`, which is
+    extended with any value it has not seen.
+    """
+    codes = codes if codes is not None else CodeTables()
+    for col in TEXT_COLS:
+        df[col] = codes.encode(df[col], _strip_lower)
+
+
+def fill_missing_indication(df, codes=None):
+    """[7] Missing Indication → 'unknown'; returns the number filled."""
+    s = df["Indication"]
+    is_missing = s.isna() | (s == "nan")
+    missing = is_missing.sum()
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        if codes is not None:
+            codes.code("Indication", "unknown")
+            s = s.cat.set_categories(codes.values("Indication"))
+        elif "unknown" not in s.cat.categories:
+            s = s.cat.add_categories("unknown")
+    df["Indication"] = s.where(~is_missing, "unknown")
+    return missing
+
+
+def encode_gender(df):
+    """[8] male=1 / female=0; returns the number of rows left unmapped."""
+    gender = df["Gender"]
+    if isinstance(gender.dtype, pd.CategoricalDtype):
+        # One lookup per category; code -1 (missing) hits the trailing NaN
+        table = np.array([GENDER_MAP.get(c, np.nan) for c in gender.cat.categories] + [np.nan])
+        values = table[gender.cat.codes.to_numpy()]
+        if not np.isnan(values).any():
+            values = values.astype(np.int64)
+        df["Gender"] = values
+    else:
+        df["Gender"] = gender.map(GENDER_MAP)
+    return df["Gender"].isna().sum()
@@ -0,0 +1,165 @@
+"""
+CRISP-DM: Data Preparation — Script 1, streaming mode
+Chunked, bounded-memory version of 01_hospital_cleaning.py for exports that
+do not fit in RAM (`01_hospital_cleaning.py --stream`).
+
+Pass 1  reads the CSV in fixed-size chunks, drops embedded header rows,
+        de-duplicates across chunk boundaries with a compact set of 64-bit
+        row hashes, applies steps 4–8 and spools each cleaned chunk to a
+        temporary file while the Winsorizer accumulates value counts.
+Pass 2  resolves the 1st–99th percentile bounds (exactly, from the counts),
+        caps every spooled chunk and appends it to the output CSV.
+
+Memory stays flat in the number of rows apart from the hash set
+(8 bytes per distinct row) and the per-column value counts.
+"""
+
+import os
+import pickle
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from .code_tables import CodeTables
+from .date_parsing import DateParser
+from .hospital_steps import (CAP_COLS, add_entry_features, encode_gender,
+                             fill_missing_indication, fix_dtypes, header_mask,
+                             standardise_text)
+from .winsorizer import Winsorizer
+
+
+class RowHashSet:
+    """Set of uint64 row hashes kept as a few sorted numpy runs.
+
+    New hashes are appended as a sorted run; runs are merged whenever there
+    are more than `max_runs`, so lookups stay a handful of binary searches.
+    """
+
+    def __init__(self, max_runs=8):
+        self.max_runs = max_runs
+        self._runs = []
+
+    def __len__(self):
+        return sum(len(r) for r in self._runs)
+
+    def to_array(self):
+        """All hashes as one sorted array (for saving)."""
+        self._runs = [np.sort(np.concatenate(self._runs))] if self._runs else []
+        return self._runs[0] if self._runs else np.empty(0, dtype=np.uint64)
+
+    @classmethod
+    def from_array(cls, hashes, max_runs=8):
+        s = cls(max_runs)
+        if len(hashes):
+            s._runs = [np.sort(np.asarray(hashes, dtype=np.uint64))]
+        return s
+
+    def add_new(self, hashes):
+        """Insert `hashes`; return a mask of the ones not seen before.
+
+        Repeats inside `hashes` count as seen after their first occurrence.
+        """
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        _, first = np.unique(hashes, return_index=True)
+        is_new = np.zeros(len(hashes), dtype=bool)
+        is_new[first] = True
+        for run in self._runs:
+            pos = np.searchsorted(run, hashes).clip(max=len(run) - 1)
+            is_new &= run[pos] != hashes
+        if is_new.any():
+            self._runs.append(np.sort(hashes[is_new]))
+            if len(self._runs) > self.max_runs:
+                self._runs = [np.sort(np.concatenate(self._runs))]
+        return is_new
+
+
+def stream_clean(input_file, output_file, caps_file, chunksize=100_000,
+                 lower_pct=0.01, upper_pct=0.99, codes_file=None, prof=None):
+    capper = Winsorizer(lower_pct=lower_pct, upper_pct=upper_pct)
+    # One set of code tables for every chunk, so text codes agree across chunks
+    codes  = CodeTables.load(codes_file) if codes_file else CodeTables()
+    dates  = DateParser()        # formats detected on the first chunk, reused after
+    seen   = RowHashSet()
+    float_cols = set()           # numeric columns that came out float in any chunk
+    n_in = n_headers = n_dupes = n_missing_ind = n_unmapped = n_chunks = n_spooled = 0
+
+    # ── Pass 1: clean + de-duplicate, spool chunks, accumulate counts ─────
+    print(f"[1] Streaming  →  {input_file}  ({chunksize:,} rows / chunk)")
+    spool = tempfile.NamedTemporaryFile(
+        prefix="hospital_", suffix=".spool", dir=os.path.dirname(output_file), delete=False)
+    try:
+        with spool:
+            # dtype=str keeps raw text identical across chunks, so row hashes
+            # are comparable no matter what pandas would infer per chunk.
+            try:
+                reader = pd.read_csv(input_file, dtype=str, chunksize=chunksize)
+            except pd.errors.EmptyDataError:          # zero-byte file
+                reader = []
+            for chunk in reader:
+                n_in += len(chunk)
+                is_header = header_mask(chunk)
+                n_headers += int(is_header.sum())
+                chunk = chunk[~is_header]
+
+                hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+                is_new = seen.add_new(hashes)
+                n_dupes += int((~is_new).sum())
+                chunk = chunk[is_new].reset_index(drop=True)
+                if chunk.empty:
+                    continue
+
+                fix_dtypes(chunk, dates)
+                chunk = add_entry_features(chunk)
+                standardise_text(chunk, codes)
+                n_missing_ind += fill_missing_indication(chunk, codes)
+                n_unmapped += encode_gender(chunk)
+
+                float_cols.update(c for c in chunk.columns if chunk[c].dtype.kind == "f")
+                capper.partial_fit(chunk, CAP_COLS)
+                pickle.dump(chunk, spool, protocol=pickle.HIGHEST_PROTOCOL)
+                n_chunks += 1
+                n_spooled += len(chunk)
+
+        print(f"[2] Removed {n_headers} embedded header rows")
+        print(f"[3] Dropped {n_dupes} duplicate rows (across chunks, "
+              f"{len(seen):,} row hashes kept)")
+        print(f"[4-8] Cleaned {n_chunks} chunk(s)  |  Indication filled: {n_missing_ind}"
+              f"  |  Gender unmapped: {n_unmapped}")
+        print(f"      Dates: {dates.summary()}")
+        if prof is not None:
+            prof.mark("1-8", "clean + de-duplicate chunks", rows=n_spooled, rows_in=n_in)
+        if not n_chunks:
+            # Nothing to fit the caps on; leave the previous outputs untouched
+            raise ValueError(f"{input_file}: no data rows (the file is empty or holds "
+                             "only header and duplicate rows)")
+
+        # ── Pass 2: cap each spooled chunk and append to the output ────────
+        total_capped = pd.Series(0, index=CAP_COLS)
+        n_out = 0
+        with open(spool.name, "rb") as f, open(output_file, "w", newline="") as out:
+            for i in range(n_chunks):
+                chunk = pickle.load(f)
+                # Same dtype per column in every chunk, as the in-memory run
+                # would infer over the whole file (float wins over int).
+                for col in float_cols & set(chunk.columns):
+                    chunk[col] = chunk[col].astype(float)
+                total_capped += capper.transform(chunk)
+                chunk.to_csv(out, index=False, header=(i == 0))
+                n_out += len(chunk)
+    finally:
+        os.remove(spool.name)
+
+    for col in CAP_COLS:
+        lo, hi = capper.lower_[col], capper.upper_[col]
+        print(f"[9] Winsorised '{col}'  →  clipped {total_capped[col]} values "
+              f"to [{lo:.2f}, {hi:.2f}]")
+    capper.save(caps_file)
+    print(f"    Cap bounds saved  →  {caps_file}")
+    if codes_file:
+        codes.save(codes_file)
+        print(f"    Code tables saved  →  {codes_file}")
+    print(f"\n[10] Rows in: {n_in:,}  →  rows out: {n_out:,}")
+    print(f"[11] Saved  →  {output_file}")
+    if prof is not None:
+        prof.mark("9-11", "cap + write chunks", rows=n_out)
@@ -0,0 +1,27 @@
+"""
+CRISP-DM: Data Preparation — ICU dataset schema
+Column groups and encodings of the Sirio-Libanes ICU dataset, shared by
+03_icu_cleaning.py and the modules that consume its outputs.
+"""
+
+# Time windows in chronological order
+WINDOW_ORDER = {"0-2": 0, "2-4": 1, "4-6": 2, "6-12": 3, "ABOVE_12": 4}
+
+# Ordinal encoding of AGE_PERCENTIL (10th=1 … Above 90th=10)
+AGE_MAP = {
+    "10th": 1, "20th": 2, "30th": 3, "40th": 4, "50th": 5,
+    "60th": 6, "70th": 7, "80th": 8, "90th": 9, "Above 90th": 10
+}
+
+ID_COLS    = ["PATIENT_VISIT_IDENTIFIER", "WINDOW", "WINDOW_ORDER"]
+TARGET_COL = "ICU"
+# Columns that are fully present (demographic / disease flags)
+DEMO_COLS  = ["AGE_ABOVE65", "AGE_PERCENTIL", "GENDER",
+              "DISEASE GROUPING 1", "DISEASE GROUPING 2", "DISEASE GROUPING 3",
+              "DISEASE GROUPING 4", "DISEASE GROUPING 5", "DISEASE GROUPING 6",
+              "HTN", "IMMUNOCOMPROMISED", "OTHER"]
+
+
+def continuous_cols(columns):
+    """All remaining columns (lab / vital statistics per window)."""
+    return [c for c in columns if c not in ID_COLS + [TARGET_COL] + DEMO_COLS]
@@ -0,0 +1,154 @@
+"""
+CRISP-DM: Data Preparation — ICU patient × window × feature tensor
+Stores the cleaned ICU frame as one dense array of shape
+(patients, 5 windows, features) so sequence models and early-admission
+models can memory-map it instead of parsing and re-pivoting the long CSV.
+
+Layout:  cleaned/icu_tensor/
+             values.npy     (P, 5, F) features, windows in WINDOW_ORDER
+             present.npy    (P, 5) bool, False where a window has no row
+             icu.npy        (P, 5) int8 ICU label per window, -1 if absent
+             icu_any.npy    (P,) int8, 1 if the patient reached the ICU
+             patients.npy   (P,) PATIENT_VISIT_IDENTIFIER, ascending
+             meta.json      feature names, windows, feature groups, dtype
+
+Features are stored demographics / flags first, then lab / vital statistics,
+so either group is a contiguous range.  Any window, prefix of windows and
+feature range is a zero-copy view of the memory map:
+
+    t = IcuTensor.load()
+    t.window("0-2")                        # (P, F)    first window only
+    t.prefix("4-6")                        # (P, 3, F) windows 0-2, 2-4, 4-6
+    t.select(windows="0-2", features=t.group("continuous"))
+"""
+
+import json
+import os
+import shutil
+
+import numpy as np
+
+from .icu_schema import DEMO_COLS, TARGET_COL, WINDOW_ORDER, continuous_cols
+
+BASE_DIR   = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TENSOR_DIR = os.path.join(BASE_DIR, "cleaned", "icu_tensor")
+FORMAT_VERSION = 1
+WINDOWS = list(WINDOW_ORDER)
+
+
+def write_tensor(df, out_dir=TENSOR_DIR, dtype=None, block_size=64):
+    """Write `df` (cleaned ICU frame with WINDOW_ORDER) as a tensor store.
+
+    `dtype` defaults to the common dtype of the lab / vital columns.  Columns
+    are copied `block_size` at a time straight into the memory-mapped file.
+    Returns the tensor shape.
+    """
+    cont = continuous_cols(df.columns)
+    features = DEMO_COLS + cont
+    if dtype is None:
+        dtype = np.result_type(*df[cont].dtypes) if cont else np.float64
+
+    ids = df["PATIENT_VISIT_IDENTIFIER"].to_numpy()
+    patients, p_idx = np.unique(ids, return_inverse=True)
+    w_idx = df["WINDOW_ORDER"].to_numpy().astype(np.intp)
+    shape = (len(patients), len(WINDOWS), len(features))
+
+    present = np.zeros(shape[:2], dtype=bool)
+    present[p_idx, w_idx] = True
+    if present.sum() != len(df):
+        raise ValueError("more than one row for some (patient, window) pair")
+    icu = np.full(shape[:2], -1, dtype=np.int8)
+    icu[p_idx, w_idx] = df[TARGET_COL].to_numpy()
+
+    tmp_dir = out_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    values = np.lib.format.open_memmap(os.path.join(tmp_dir, "values.npy"), mode="w+",
+                                       dtype=dtype, shape=shape)
+    if not present.all():
+        values[~present] = np.nan
+    for start in range(0, len(features), block_size):
+        block = features[start:start + block_size]
+        values[p_idx, w_idx, start:start + len(block)] = df[block].to_numpy(dtype=dtype)
+    values.flush()
+    del values
+
+    np.save(os.path.join(tmp_dir, "present.npy"), present)
+    np.save(os.path.join(tmp_dir, "icu.npy"), icu)
+    np.save(os.path.join(tmp_dir, "icu_any.npy"), (icu == 1).any(axis=1).astype(np.int8))
+    np.save(os.path.join(tmp_dir, "patients.npy"), patients)
+    meta = {"version": FORMAT_VERSION, "shape": list(shape), "dtype": np.dtype(dtype).name,
+            "windows": WINDOWS, "features": features,
+            "groups": {"demo": [0, len(DEMO_COLS)],
+                       "continuous": [len(DEMO_COLS), len(features)]}}
+    with open(os.path.join(tmp_dir, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=1)
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp_dir, out_dir)
+    return shape
+
+
+class IcuTensor:
+    def __init__(self, values, present, icu, icu_any, patients, meta):
+        self.values   = values
+        self.present  = present
+        self.icu      = icu
+        self.icu_any  = icu_any
+        self.patients = patients
+        self.meta     = meta
+        self.windows  = meta["windows"]
+        self.features = meta["features"]
+        self._feature_pos = {f: i for i, f in enumerate(self.features)}
+
+    @classmethod
+    def load(cls, path=TENSOR_DIR, mmap=True):
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        if meta["version"] != FORMAT_VERSION:
+            raise ValueError(f"tensor format v{meta['version']}, expected v{FORMAT_VERSION}")
+        arrays = [np.load(os.path.join(path, name + ".npy"), mmap_mode="r" if mmap else None)
+                  for name in ("values", "present", "icu", "icu_any", "patients")]
+        return cls(*arrays, meta)
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    # ── Slicing (all views, no copies) ──────────────────────────────────────
+    def window_index(self, window):
+        return window if isinstance(window, int) else self.windows.index(window)
+
+    def window(self, window):
+        """(P, F) values of one window."""
+        return self.values[:, self.window_index(window), :]
+
+    def prefix(self, last_window):
+        """(P, k, F) values of every window up to and including `last_window`."""
+        return self.values[:, :self.window_index(last_window) + 1, :]
+
+    def group(self, name):
+        """Feature slice of a group: "demo" or "continuous"."""
+        start, stop = self.meta["groups"][name]
+        return slice(start, stop)
+
+    def feature_slice(self, names):
+        """Slice covering `names`; they must be adjacent and in stored order."""
+        pos = [self._feature_pos[n] for n in names]
+        if pos != list(range(pos[0], pos[0] + len(pos))):
+            raise ValueError("features are not a contiguous range; index "
+                             "values[..., [positions]] instead (makes a copy)")
+        return slice(pos[0], pos[-1] + 1)
+
+    def select(self, windows=None, features=None):
+        """View of `values`.
+
+        windows  : None (all), a window name / index, or a slice
+        features : None (all), a slice, or a list of adjacent feature names
+        """
+        w = slice(None) if windows is None else windows
+        if isinstance(w, (str, int)):
+            w = self.window_index(w)
+        f = slice(None) if features is None else features
+        if isinstance(f, (list, tuple)):
+            f = self.feature_slice(f)
+        return self.values[:, w, f]
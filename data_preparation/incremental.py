@@ -0,0 +1,348 @@
+"""
+CRISP-DM: Data Preparation — incremental runs over append-only sources
+`--incremental` mode of 01_hospital_cleaning.py and 02_medical_cleaning.py,
+for source CSVs that grow by new rows appended at the end.  A store per
+dataset under .cache/incremental/<dataset>/ keeps
+
+  state.json    bytes of the source already processed, digests of their
+                first and last 64 KiB and a chained digest of all of them
+                (H(previous digest ‖ appended bytes), so it is extended
+                without re-reading history), size of the cleaned CSV
+                written, output float columns, running mean / variance of
+                the capped columns
+  hashes.npy    64-bit fingerprints of every raw hospital row seen so far
+  counts.npz    exact value counts of the capped columns (pre-capping)
+
+A run first checks, in bounded time, that the source still starts with the
+processed bytes (same size or larger, same first and last 64 KiB of the
+processed prefix) and that the cleaned CSV is the one it wrote.  If so,
+only the bytes after that prefix are parsed and cleaned with the saved
+cap bounds / scaler / code tables, then appended to the cleaned CSV.  Like
+their full runs, 01 drops rows already seen (by fingerprint, taken on the
+raw text during the full run's own read) and 02 keeps repeated rows; 02
+turns malformed numbers into NaN, as pandas would for an empty cell.
+
+Before appending, the parameters a refit on every row would give are
+compared with the saved ones: the cap bounds from the merged value counts
+(shift relative to the cap range) and, for the scaler, mean and standard
+deviation from the merged moments (shift relative to the fitted standard
+deviation).  Past `threshold` — or with no usable state — the script does
+its normal full run, which refits everything and re-seeds the store.
+"""
+
+import hashlib
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from .code_tables import CodeTables
+from .date_parsing import DateParser
+from .digests import file_digest
+from .hospital_steps import (CAP_COLS, add_entry_features, encode_gender,
+                             fill_missing_indication, fix_dtypes, header_mask,
+                             standardise_text)
+from .hospital_stream import RowHashSet
+from .medical_schema import NUMERIC_COLS, RESULT_MAP, TARGET_COL
+from .winsorizer import Winsorizer
+
+BASE_DIR  = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATE_DIR = os.path.join(BASE_DIR, ".cache", "incremental")
+FORMAT_VERSION = 2
+WINDOW = 1 << 16                # bytes compared at each end of the processed prefix
+
+
+def row_hashes(raw):
+    """uint64 fingerprint per row of a dtype=str frame (same as --stream)."""
+    return pd.util.hash_pandas_object(raw, index=False).to_numpy()
+
+
+def _window_digests(path, offset):
+    """Digests of the first and the last WINDOW bytes of the first `offset` bytes."""
+    out = []
+    with open(path, "rb") as f:
+        for start in (0, max(0, offset - WINDOW)):
+            f.seek(start)
+            out.append(hashlib.blake2b(f.read(min(WINDOW, offset)), digest_size=16).hexdigest())
+    return out
+
+
+def _prefix_digest(path, size, chunk_size=1 << 20):
+    """file_digest of the first `size` bytes of `path`."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        while size > 0:
+            block = f.read(min(chunk_size, size))
+            if not block:
+                break
+            h.update(block)
+            size -= len(block)
+    return h.hexdigest()
+
+
+def _chain(digest, data):
+    return hashlib.blake2b(digest.encode() + data, digest_size=16).hexdigest()
+
+
+def _merge_moments(a, b):
+    """Chan et al. merge of two (n, mean, M2) triples."""
+    (na, ma, m2a), (nb, mb, m2b) = a, b
+    n = na + nb
+    if n == 0:
+        return 0, 0.0, 0.0
+    delta = mb - ma
+    return n, ma + delta * nb / n, m2a + m2b + delta ** 2 * na * nb / n
+
+
+class DeltaStore:
+    """Fingerprints, processed-prefix marker and drift statistics of one dataset."""
+
+    def __init__(self, name, source, output, lower_pct=0.01, upper_pct=0.99,
+                 state_dir=STATE_DIR):
+        self.dir    = os.path.join(state_dir, name)
+        self.source = source
+        self.output = output
+        self.size   = os.path.getsize(source)    # bytes covered by this run
+        self.lower_pct, self.upper_pct = lower_pct, upper_pct
+        self.state  = self._load_state()
+        self.reason = self._check()
+        self.can_append = self.reason is None
+        if self.can_append:
+            self.seen   = RowHashSet.from_array(np.load(self._path("hashes.npy")))
+            self.counts = Winsorizer.load_counts(self._path("counts.npz"), lower_pct, upper_pct)
+            self.moments = {c: tuple(m) for c, m in self.state["moments"].items()}
+            self.extra   = dict(self.state["extra"])
+        else:
+            self.reset()
+
+    def _path(self, name):
+        return os.path.join(self.dir, name)
+
+    def _load_state(self):
+        try:
+            with open(self._path("state.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _check(self):
+        """None if the saved state applies to this run, else why not."""
+        s = self.state
+        if s is None or s.get("version") != FORMAT_VERSION:
+            return "no incremental state yet"
+        if s["source"] != os.path.abspath(self.source):
+            return "different source file"
+        if self.size < s["offset"] or _window_digests(self.source, s["offset"]) != s["windows"]:
+            return "source changed before the end of the last run"
+        if not os.path.exists(self.output) or os.path.getsize(self.output) != s["output_size"]:
+            return "cleaned output missing or modified"
+        if not all(os.path.exists(self._path(n)) for n in ("hashes.npy", "counts.npz")):
+            return "incremental state incomplete"
+        return None
+
+    def reset(self):
+        """Fresh accumulators for a full run."""
+        self.can_append = False
+        self.seen    = RowHashSet()
+        self.counts  = Winsorizer(self.lower_pct, self.upper_pct)
+        self.moments = {}
+        self.extra   = {}
+
+    def get(self, key, default=None):
+        return (self.state or {}).get("extra", {}).get(key, default)
+
+    # ── Reading the delta ───────────────────────────────────────────────────
+    def read_delta(self):
+        """Rows appended since the last run, as a dtype=str frame."""
+        with open(self.source, "rb") as f:
+            header = f.readline()
+            f.seek(self.state["offset"])
+            tail = f.read(self.size - self.state["offset"])
+        self._digest = _chain(self.state["digest"], tail)
+        # Sources often end without a newline; an append then starts with one
+        tail = tail.lstrip(b"\r\n")
+        if not header.endswith(b"\n"):
+            header += b"\n"
+        if not tail.strip():
+            return pd.read_csv(io.BytesIO(header), dtype=str)
+        return pd.read_csv(io.BytesIO(header + tail), dtype=str)
+
+    def add_new(self, raw):
+        """Mask of rows of `raw` (a dtype=str frame) whose fingerprint was not seen before."""
+        return self.seen.add_new(row_hashes(raw))
+
+    # ── Drift statistics ────────────────────────────────────────────────────
+    def observe_raw(self, df, cols):
+        """Accumulate value counts of `cols` before capping."""
+        self.counts.partial_fit(df, cols)
+
+    def observe_capped(self, df, cols):
+        """Accumulate mean / variance of `cols` after capping (scaler inputs)."""
+        for col in cols:
+            values = df[col].to_numpy(dtype=float)
+            values = values[~np.isnan(values)]
+            if not len(values):
+                continue
+            mean = float(values.mean())
+            new  = (len(values), mean, float(((values - mean) ** 2).sum()))
+            self.moments[col] = _merge_moments(self.moments.get(col, (0, 0.0, 0.0)), new)
+
+    def drift(self, capper, scaler=None):
+        """Largest relative parameter change per column a full refit would give."""
+        lower, upper = self.counts.bounds()
+        cols  = capper.columns
+        span  = capper.upper_[cols] - capper.lower_[cols]
+        span  = span.where(span > 0, 1.0)
+        drift = np.maximum((lower[cols] - capper.lower_[cols]).abs(),
+                           (upper[cols] - capper.upper_[cols]).abs()) / span
+        if scaler is not None:
+            for col, mean, scale in zip(scaler.feature_names_in_, scaler.mean_, scaler.scale_):
+                n, m, m2 = self.moments[col]
+                std = np.sqrt(m2 / n) if n else scale
+                shift = max(abs(m - mean) / scale, abs(std / scale - 1))
+                drift[col] = max(drift.get(col, 0.0), shift)
+        return drift.fillna(0.0)
+
+    # ── Writing ─────────────────────────────────────────────────────────────
+    def append(self, df, **extra):
+        """Append cleaned delta rows to the output and save the state."""
+        if len(df):                  # an empty delta lacks the derived columns
+            for col in self.state["float_cols"]:
+                if df[col].dtype.kind != "f":
+                    df[col] = df[col].astype(float)
+            with open(self.output, "a", newline="") as f:
+                df.to_csv(f, index=False, header=False)
+        self.extra.update(extra)
+        self._save(self.state["float_cols"], self.state["rows"] + len(df), self._digest)
+
+    def commit(self, df, **extra):
+        """After a full run: save the state.
+
+        Rows to de-duplicate against were fingerprinted with add_new() when
+        the full run read them; the source digest is the one the ingest
+        cache computed (digests.py keeps it), unless the file grew since.
+        """
+        self.extra = extra
+        digest = (file_digest(self.source) if os.path.getsize(self.source) == self.size
+                  else _prefix_digest(self.source, self.size))
+        self._save([c for c in df.columns if df[c].dtype.kind == "f"], len(df), digest)
+
+    def _save(self, float_cols, rows, digest):
+        os.makedirs(self.dir, exist_ok=True)
+        np.save(self._path("hashes.npy"), self.seen.to_array())
+        self.counts.save_counts(self._path("counts.npz"))
+        state = {"version": FORMAT_VERSION, "source": os.path.abspath(self.source),
+                 "offset": self.size, "windows": _window_digests(self.source, self.size),
+                 "digest": digest,
+                 "output_size": os.path.getsize(self.output), "rows": rows,
+                 "float_cols": float_cols, "moments": self.moments, "extra": self.extra}
+        tmp = self._path("state.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(state, f, indent=1, default=float)
+        os.replace(tmp, self._path("state.json"))
+        self.state = state
+
+
+def _report_drift(drift, threshold):
+    """Print the largest drift; True if it calls for a full refit."""
+    worst = drift.idxmax()
+    print(f"    Parameter drift: max {drift[worst]:.4f} ({worst})  |  "
+          f"refit threshold {threshold}")
+    return drift[worst] > threshold
+
+
+# ── Hospital (01) ───────────────────────────────────────────────────────────
+def hospital_delta(store, caps_file, codes_file, threshold=0.05, prof=None):
+    """Clean and append the new hospital rows; False if a full refit is due.
+
+    Without `codes_file` the code tables start empty and are not saved.
+    """
+    raw = store.read_delta()
+    n_in = len(raw)
+    print(f"[1] Incremental  →  {n_in:,} row(s) appended since the last run "
+          f"({store.state['rows']:,} cleaned rows so far)")
+    is_header = header_mask(raw)
+    raw = raw[~is_header]
+    is_new = store.add_new(raw)
+    df = raw[is_new].reset_index(drop=True)
+    print(f"[2] Removed {int(is_header.sum())} embedded header rows")
+    print(f"[3] Dropped {int((~is_new).sum())} rows already seen "
+          f"({len(store.seen):,} row fingerprints kept)")
+    if prof is not None:
+        prof.mark("1-3", "read + de-duplicate delta", df, rows_in=n_in)
+
+    capper = Winsorizer.load(caps_file)
+    codes  = CodeTables.load(codes_file) if codes_file else CodeTables()
+    dates  = DateParser(formats=store.get("date_formats"))
+    if not df.empty:
+        fix_dtypes(df, dates)
+        df = add_entry_features(df)
+        standardise_text(df, codes)
+        n_missing_ind = fill_missing_indication(df, codes)
+        n_unmapped = encode_gender(df)
+        print(f"[4-8] Cleaned {len(df):,} new row(s)  |  Indication filled: {n_missing_ind}"
+              f"  |  Gender unmapped: {n_unmapped}")
+        print(f"      Dates: {dates.summary()}")
+        store.observe_raw(df, CAP_COLS)
+    if _report_drift(store.drift(capper), threshold):
+        store.reason = "cap bounds drifted past the threshold"
+        store.reset()
+        return False
+    if prof is not None:
+        prof.mark("4-8", "clean delta", df)
+
+    n_capped = capper.transform(df) if not df.empty else pd.Series(0, index=CAP_COLS)
+    print(f"[9] Capped with the saved bounds  →  {n_capped.to_dict()}")
+    store.append(df, date_formats=dates.formats)
+    if codes_file:
+        codes.save(codes_file)
+    print(f"[10] Appended {len(df):,} row(s)  →  {store.output}  "
+          f"({store.state['rows']:,} rows)")
+    if prof is not None:
+        prof.mark("9-10", "cap + append", df)
+    return True
+
+
+# ── Cardiac (02) ────────────────────────────────────────────────────────────
+def medical_delta(store, caps_file, scaler, threshold=0.05, prof=None):
+    """Clean, scale and append the new cardiac rows; False if a full refit is due.
+
+    Repeated rows are kept, as in the full run of 02.
+    """
+    df = store.read_delta()
+    print(f"[1] Incremental  →  {len(df):,} row(s) appended since the last run "
+          f"({store.state['rows']:,} cleaned rows so far)")
+    if prof is not None:
+        prof.mark("1", "read delta", df)
+
+    capper = Winsorizer.load(caps_file)
+    cols   = list(scaler.feature_names_in_)
+    n_capped = pd.Series(0, index=NUMERIC_COLS)
+    if not df.empty:
+        df[TARGET_COL] = df[TARGET_COL].str.strip().str.lower().map(RESULT_MAP)
+        n_bad = 0
+        for col in df.columns.drop(TARGET_COL):
+            values = pd.to_numeric(df[col], errors="coerce")
+            n_bad += int((values.isna() & df[col].notna()).sum())
+            df[col] = values
+        if n_bad:
+            print(f"    {n_bad} malformed numeric value(s) set to NaN")
+        store.observe_raw(df, NUMERIC_COLS)
+        n_capped = capper.transform(df)
+        store.observe_capped(df, cols)
+    if _report_drift(store.drift(capper, scaler), threshold):
+        store.reason = "cap bounds / scaler drifted past the threshold"
+        store.reset()
+        return False
+    print(f"[5] Capped with the saved bounds  →  {int(n_capped.sum())} value(s)")
+    if not df.empty:
+        df[cols] = scaler.transform(df[cols])
+        print(f"[6] Scaled with the saved StandardScaler: {cols}")
+    store.append(df)
+    print(f"[8] Appended {len(df):,} row(s)  →  {store.output}  "
+          f"({store.state['rows']:,} rows)")
+    if prof is not None:
+        prof.mark("2-8", "encode + cap + scale + append", df)
+    return True
@@ -0,0 +1,123 @@
+"""
+CRISP-DM: Data Preparation — cached raw-data ingest
+Parses a raw source file (xlsx / csv) once and stores it as a typed,
+columnar cache of memory-mappable `.npy` files under `.cache/ingest/`,
+keyed by a content hash of the source.  Later loads read the cache
+directly and only re-parse when the source file changes.
+
+Layout:  .cache/ingest/<source stem>-<path hash>/<content hash>/
+             meta.json          column names, dtypes and storage kind
+             c000.npy …         one array per column
+             c000.cats.npy      categories for dictionary-encoded columns
+"""
+
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from .digests import file_digest
+
+BASE_DIR  = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(BASE_DIR, ".cache", "ingest")
+FORMAT_VERSION = 1
+
+READERS = {
+    ".xlsx": pd.read_excel,
+    ".xls":  pd.read_excel,
+    ".csv":  pd.read_csv,
+}
+
+
+def _source_dir(path):
+    # One directory per source file: files that share a stem (icu.csv and
+    # icu.xlsx, or two Medicaldataset.csv in different folders) must not evict
+    # each other's entries.
+    path = os.path.abspath(path)
+    h = hashlib.blake2b(path.encode(), digest_size=8).hexdigest()
+    return os.path.join(CACHE_DIR, f"{os.path.splitext(os.path.basename(path))[0]}-{h}")
+
+
+def _cache_key(path, read_kwargs):
+    h = hashlib.blake2b(digest_size=16)
+    h.update(file_digest(path).encode())
+    h.update(json.dumps(read_kwargs, sort_keys=True, default=str).encode())
+    h.update(f"v{FORMAT_VERSION}/pandas-{pd.__version__}".encode())
+    return h.hexdigest()
+
+
+# ── Write / read one cache entry ────────────────────────────────────────────
+def _write_cache(df, entry_dir):
+    tmp_dir = entry_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    columns = []
+    for i, col in enumerate(df.columns):
+        s    = df[col]
+        name = f"c{i:03d}"
+        if isinstance(s.dtype, np.dtype) and s.dtype.kind in "biufcmM":
+            np.save(os.path.join(tmp_dir, name + ".npy"), s.to_numpy())
+            kind = "array"
+        else:
+            # Text / mixed columns: dictionary-encode (codes + categories)
+            codes, cats = pd.factorize(s, use_na_sentinel=True)
+            np.save(os.path.join(tmp_dir, name + ".npy"), codes.astype(np.int32))
+            np.save(os.path.join(tmp_dir, name + ".cats.npy"),
+                    np.asarray(cats, dtype=object), allow_pickle=True)
+            kind = "dict"
+        columns.append({"name": col, "file": name, "kind": kind, "dtype": str(s.dtype)})
+    meta = {"version": FORMAT_VERSION, "rows": len(df), "columns": columns}
+    with open(os.path.join(tmp_dir, "meta.json"), "w") as f:
+        json.dump(meta, f)
+    shutil.rmtree(entry_dir, ignore_errors=True)
+    os.replace(tmp_dir, entry_dir)
+
+
+def _read_cache(entry_dir, mmap=True):
+    with open(os.path.join(entry_dir, "meta.json")) as f:
+        meta = json.load(f)
+    data = {}
+    for c in meta["columns"]:
+        arr = np.load(os.path.join(entry_dir, c["file"] + ".npy"),
+                      mmap_mode="r" if mmap else None)
+        if c["kind"] == "dict":
+            cats = np.load(os.path.join(entry_dir, c["file"] + ".cats.npy"),
+                           allow_pickle=True)
+            cat  = pd.Categorical.from_codes(arr, pd.Index(cats, dtype=object))
+            data[c["name"]] = pd.Series(cat).astype(c["dtype"])
+        else:
+            data[c["name"]] = arr
+    return pd.DataFrame(data, columns=[c["name"] for c in meta["columns"]])
+
+
+# ── Public API ──────────────────────────────────────────────────────────────
+def load_table(path, use_cache=True, **read_kwargs):
+    """Load a raw source file, going through the columnar cache.
+
+    Returns (df, from_cache).  Extra keyword arguments go to the pandas
+    reader and are part of the cache key.
+    """
+    reader = READERS.get(os.path.splitext(path)[1].lower())
+    if reader is None:
+        raise ValueError(f"no reader registered for {path!r}")
+    if not use_cache:
+        return reader(path, **read_kwargs), False
+
+    source_dir = _source_dir(path)
+    entry_dir  = os.path.join(source_dir, _cache_key(path, read_kwargs))
+    if os.path.exists(os.path.join(entry_dir, "meta.json")):
+        return _read_cache(entry_dir), True
+
+    df = reader(path, **read_kwargs)
+    # Drop stale entries for this source before writing the new one
+    shutil.rmtree(source_dir, ignore_errors=True)
+    os.makedirs(source_dir, exist_ok=True)
+    _write_cache(df, entry_dir)
+    return df, False
+
+
+def clear_cache():
+    shutil.rmtree(CACHE_DIR, ignore_errors=True)
@@ -0,0 +1,12 @@
+"""
+CRISP-DM: Data Preparation — cardiac dataset schema
+Column groups and encodings of Medicaldataset.csv, shared by
+02_medical_cleaning.py and the modules that refit or apply its preprocessing.
+"""
+
+TARGET_COL = "Result"
+RESULT_MAP = {"positive": 1, "negative": 0}
+
+# Age + 6 vitals / labs: capped at the 1st–99th percentile, then scaled
+NUMERIC_COLS = ["Age", "Heart rate", "Systolic blood pressure",
+                "Diastolic blood pressure", "Blood sugar", "CK-MB", "Troponin"]
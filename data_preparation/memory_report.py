@@ -0,0 +1,53 @@
+"""
+CRISP-DM: Data Preparation — memory measurements
+Current RSS, peak RSS and the in-memory size of a frame, as used by the
+per-stage report of profiling.py.  Uses only the standard library (/proc on
+Linux, `resource` elsewhere on POSIX); values that cannot be measured on
+the platform are None.
+"""
+
+import os
+
+MB = 1024 ** 2
+
+
+def current_rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / MB
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss_mb():
+    # VmHWM starts afresh at exec; ru_maxrss would include the parent's peak
+    # when the script is launched from a large process (e.g. a benchmark).
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return peak / MB if os.uname().sysname == "Darwin" else peak / 1024
+
+
+def reset_peak_rss():
+    """Restart the peak RSS counter (Linux ≥ 4.0); return False if unsupported."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def frame_mb(df):
+    return df.memory_usage(deep=True).sum() / MB
@@ -0,0 +1,192 @@
+"""
+CRISP-DM: Data Preparation — out-of-core fitting
+Fits the preprocessing artifacts of 02_medical_cleaning.py and
+03_icu_cleaning.py from a CSV streamed in chunks, for extracts that do not
+fit in memory:
+
+  cardiac : pass 1  percentile sketches
+            pass 2  exact counts around the sketched percentiles → cap bounds
+            pass 3  capped chunks → incremental mean / variance
+  ICU     : pass 1  patient-aligned chunks, within-patient ffill+bfill,
+                    spooled to disk; median sketches
+            pass 2  exact counts around the sketched medians → column medians
+            pass 3  median fill → percentile sketches
+            pass 4  exact counts around the sketched percentiles → cap bounds
+            pass 5  capped chunks → incremental mean / variance
+
+Means and variances are accumulated with StandardScaler.partial_fit, so the
+scaler artifact is a regular StandardScaler and the cap / median files use
+the same formats as the in-memory scripts — serving.py and any other
+consumer of cleaned/*.pkl can load them unchanged.  Percentiles are located
+with mergeable KLL sketches and then resolved exactly by the following pass
+(quantile_sketch.QuantileBand), so caps and medians equal those of the
+in-memory scripts and the scaler matches theirs up to rounding; see
+tests/test_outofcore_fit.py and benchmarks/bench_outofcore_fit.py.
+
+    python -m data_preparation.outofcore_fit medical --input cardiac_extract.csv
+    python -m data_preparation.outofcore_fit icu --input icu_extract.csv --chunksize 50000
+"""
+
+import argparse
+import os
+import pickle
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+from .icu_schema import AGE_MAP, WINDOW_ORDER, continuous_cols
+from .imputation import grouped_ffill_bfill
+from .medical_schema import NUMERIC_COLS, RESULT_MAP
+from .quantile_sketch import KllSketch, QuantileBand
+from .winsorizer import Winsorizer
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OUT_DIR  = os.path.join(BASE_DIR, "cleaned", "outofcore")
+
+
+def _save_pickle(obj, path):
+    with open(path, "wb") as f:
+        pickle.dump(obj, f)
+
+
+# ── Cardiac ─────────────────────────────────────────────────────────────────
+def prepare_medical_chunk(chunk):
+    chunk["Result"] = chunk["Result"].str.strip().str.lower().map(RESULT_MAP)
+    return chunk
+
+
+def fit_medical(input_file, chunksize=100_000, sketch_k=1000):
+    """Three streamed passes; returns (capper, scaler, rows)."""
+    capper = Winsorizer(lower_pct=0.01, upper_pct=0.99, sketch_k=sketch_k)
+    rows = 0
+    for chunk in pd.read_csv(input_file, chunksize=chunksize):
+        capper.partial_fit(prepare_medical_chunk(chunk), NUMERIC_COLS)
+        rows += len(chunk)
+    for chunk in pd.read_csv(input_file, chunksize=chunksize):
+        capper.partial_refine(prepare_medical_chunk(chunk))
+
+    scaler = StandardScaler()
+    for chunk in pd.read_csv(input_file, chunksize=chunksize):
+        chunk = prepare_medical_chunk(chunk)
+        capper.transform(chunk)
+        scaler.partial_fit(chunk[NUMERIC_COLS])
+    return capper, scaler, rows
+
+
+# ── ICU ─────────────────────────────────────────────────────────────────────
+def prepare_icu_chunk(df, cols):
+    """Steps 2, 3 and 6 of 03_icu_cleaning.py on a set of whole patients."""
+    order = np.lexsort((df["WINDOW"].map(WINDOW_ORDER).to_numpy(),
+                        df["PATIENT_VISIT_IDENTIFIER"].to_numpy()))
+    df = df.iloc[order].reset_index(drop=True)
+    df["AGE_PERCENTIL"] = df["AGE_PERCENTIL"].map(AGE_MAP)
+    grouped_ffill_bfill(df, "PATIENT_VISIT_IDENTIFIER", cols)
+    return df
+
+
+def iter_patient_chunks(input_file, chunksize):
+    """Yield chunks that each hold every row of the patients they contain.
+
+    The input must list each patient's rows together (the Kaggle export
+    does); rows of the last patient in a chunk are carried into the next.
+    """
+    done  = set()
+    carry = None
+    for chunk in pd.read_csv(input_file, chunksize=chunksize):
+        if carry is not None:
+            chunk = pd.concat([carry, chunk], ignore_index=True)
+        ids  = chunk["PATIENT_VISIT_IDENTIFIER"]
+        last = ids.iloc[-1]
+        carry = chunk[ids == last]
+        chunk = chunk[ids != last]
+        if ids[ids != last].isin(done).any():
+            raise ValueError("input rows are not grouped by PATIENT_VISIT_IDENTIFIER")
+        done.update(chunk["PATIENT_VISIT_IDENTIFIER"].unique())
+        if len(chunk):
+            yield chunk
+    if carry is not None and len(carry):
+        if carry["PATIENT_VISIT_IDENTIFIER"].iloc[0] in done:
+            raise ValueError("input rows are not grouped by PATIENT_VISIT_IDENTIFIER")
+        yield carry
+
+
+def fit_icu(input_file, chunksize=100_000, sketch_k=1000):
+    """Five streamed passes (four over the spool); returns (medians, capper, scaler, rows)."""
+    cols = continuous_cols(pd.read_csv(input_file, nrows=0).columns)
+    median_sketches = {col: KllSketch(sketch_k) for col in cols}
+    rows = n_chunks = 0
+
+    spool = tempfile.NamedTemporaryFile(prefix="icu_", suffix=".spool", delete=False)
+    try:
+        with spool:
+            for chunk in iter_patient_chunks(input_file, chunksize):
+                chunk = prepare_icu_chunk(chunk, cols)
+                for col in cols:
+                    median_sketches[col].update(chunk[col].to_numpy(dtype=float))
+                pickle.dump(chunk[cols], spool, protocol=pickle.HIGHEST_PROTOCOL)
+                rows += len(chunk)
+                n_chunks += 1
+
+        def spooled(fill=True):
+            with open(spool.name, "rb") as f:
+                for _ in range(n_chunks):
+                    chunk = pickle.load(f)
+                    if fill:
+                        for i in range(0, len(cols), 64):
+                            block = cols[i:i + 64]
+                            chunk[block] = chunk[block].fillna(medians[block])
+                    yield chunk
+
+        median_bands = {col: QuantileBand(median_sketches[col], [0.5]) for col in cols}
+        for chunk in spooled(fill=False):
+            for col in cols:
+                median_bands[col].update(chunk[col].to_numpy(dtype=float))
+        medians = pd.Series({col: median_bands[col].quantile()[0] for col in cols})
+
+        capper = Winsorizer(lower_pct=0.01, upper_pct=0.99, sketch_k=sketch_k)
+        for chunk in spooled():
+            capper.partial_fit(chunk, cols)
+        for chunk in spooled():
+            capper.partial_refine(chunk)
+
+        scaler = StandardScaler()
+        for chunk in spooled():
+            capper.transform(chunk)
+            scaler.partial_fit(chunk)
+    finally:
+        os.remove(spool.name)
+    return medians.to_dict(), capper, scaler, rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fit scaler / caps / medians out of core")
+    parser.add_argument("dataset", choices=["medical", "icu"])
+    parser.add_argument("--input", required=True, help="CSV extract to stream")
+    parser.add_argument("--chunksize", type=int, default=100_000)
+    parser.add_argument("--sketch-k", type=int, default=1000,
+                        help="KLL sketch size (rank error ~1.7/k)")
+    parser.add_argument("--out-dir", default=OUT_DIR,
+                        help="where to write the .pkl artifacts (default: cleaned/outofcore/)")
+    args = parser.parse_args(argv)
+    os.makedirs(args.out_dir, exist_ok=True)
+
+    t0 = time.perf_counter()
+    if args.dataset == "medical":
+        capper, scaler, rows = fit_medical(args.input, args.chunksize, args.sketch_k)
+    else:
+        medians, capper, scaler, rows = fit_icu(args.input, args.chunksize, args.sketch_k)
+        _save_pickle(medians, os.path.join(args.out_dir, "icu_medians.pkl"))
+    capper.save(os.path.join(args.out_dir, f"{args.dataset}_caps.pkl"))
+    _save_pickle(scaler, os.path.join(args.out_dir, f"{args.dataset}_scaler.pkl"))
+    elapsed = time.perf_counter() - t0
+
+    print(f"Fitted {args.dataset} on {rows:,} rows × {len(capper.columns)} columns "
+          f"in {elapsed:.2f} s  ({rows / elapsed:,.0f} rows/sec)")
+    print(f"Artifacts  →  {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
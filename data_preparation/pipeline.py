@@ -0,0 +1,255 @@
+"""
+CRISP-DM: Data Preparation — pipeline runner
+Runs the numbered scripts as a DAG of stages with declared inputs and
+outputs.  A stage is skipped when the content hashes of its inputs, its
+outputs and its code (the script plus every local module it imports) match
+the last successful run.  Independent stages run in parallel worker
+processes, so the hospital, cardiac and ICU branches proceed side by side
+and each plot group starts as soon as its cleaned CSV is ready.
+
+    python -m data_preparation pipeline                 # incremental run
+    python -m data_preparation pipeline --force         # full refresh
+    python -m data_preparation pipeline icu plots_icu   # selected stages only
+    python -m data_preparation pipeline --dry-run       # show what would run
+"""
+
+import argparse
+import ast
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from .digests import file_digest
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR   = os.path.dirname(SCRIPT_DIR)
+STATE_DIR  = os.path.join(BASE_DIR, ".cache", "pipeline")
+STATE_FILE = os.path.join(STATE_DIR, "state.json")
+LOG_DIR    = os.path.join(STATE_DIR, "logs")
+
+# Paths are relative to the project root
+Stage = namedtuple("Stage", "name script args inputs outputs")
+
+
+def _plots(*names):
+    return [f"cleaned/plots/{n}.png" for n in names]
+
+
+def _cleaned(name):
+    # 04 reads the columnar table instead of the CSV when the table is newer
+    # (written with --format columnar/both); its meta.json holds every part's digest
+    return [f"cleaned/{name}.csv", f"cleaned/{name}/meta.json"]
+
+
+STAGES = [
+    Stage("hospital", "01_hospital_cleaning.py", [],
+          ["Hopsital Dataset.csv"],
+          ["cleaned/hospital_cleaned.csv", "cleaned/hospital_caps.pkl",
+           "cleaned/hospital_codes.json"]),
+    Stage("medical", "02_medical_cleaning.py", [],
+          ["Medicaldataset.csv"],
+          ["cleaned/medical_cleaned.csv", "cleaned/medical_scaler.pkl",
+           "cleaned/medical_caps.pkl"]),
+    Stage("icu", "03_icu_cleaning.py", ["--tensor", "--correlation"],
+          ["Kaggle_Sirio_Libanes_ICU_Prediction.xlsx"],
+          ["cleaned/icu_cleaned_full.csv", "cleaned/icu_cleaned_window0_2.csv",
+           "cleaned/icu_scaler.pkl", "cleaned/icu_caps.pkl", "cleaned/icu_medians.pkl",
+           "cleaned/icu_tensor/meta.json", "cleaned/icu_tensor/values.npy",
+           "cleaned/icu_corr/meta.json", "cleaned/icu_corr/matrix.npy"]),
+    Stage("plots_hospital", "04_visualization.py", ["--dataset", "hospital", "--changed-only"],
+          _cleaned("hospital_cleaned"),
+          _plots("H1_age_distribution", "H2_gender_balance", "H3_top_drugs",
+                 "H4_route_pie", "H5_dosage_by_route", "H6_duration_distribution",
+                 "H7_entries_by_month")),
+    Stage("plots_medical", "04_visualization.py", ["--dataset", "medical", "--changed-only"],
+          _cleaned("medical_cleaned"),
+          _plots("M1_class_balance", "M2_correlation_heatmap", "M3_vitals_by_result",
+                 "M4_cardiac_markers", "M5_gender_vs_result")),
+    Stage("plots_icu", "04_visualization.py", ["--dataset", "icu", "--changed-only"],
+          _cleaned("icu_cleaned_full"),
+          _plots("I1_icu_rate_by_window", "I2_icu_class_balance",
+                 "I3_age_percentile_vs_icu", "I4_disease_grouping_vs_icu",
+                 "I5_demo_correlation_heatmap", "I6_window_distribution")),
+]
+
+
+def dependencies(stage, stages):
+    """Stages that produce one of `stage`'s inputs."""
+    return {s.name for s in stages if set(s.outputs) & set(stage.inputs)}
+
+
+# ── Change detection ────────────────────────────────────────────────────────
+def _local_modules(path, seen=None):
+    """`path` plus every data_preparation module it imports, transitively."""
+    seen = set() if seen is None else seen
+    if path in seen:
+        return seen
+    seen.add(path)
+    with open(path, encoding="utf-8-sig") as f:
+        tree = ast.parse(f.read())
+    for node in ast.walk(tree):
+        # Siblings are imported relative to the package: from .x import y / from . import x
+        if not isinstance(node, ast.ImportFrom) or node.level != 1:
+            continue
+        names = [node.module] if node.module else [a.name for a in node.names]
+        for name in names:
+            candidate = os.path.join(SCRIPT_DIR, name.split(".")[0] + ".py")
+            if os.path.exists(candidate):
+                _local_modules(candidate, seen)
+    return seen
+
+
+def code_digest(stage):
+    h = hashlib.blake2b(digest_size=16)
+    for path in sorted(_local_modules(os.path.join(SCRIPT_DIR, stage.script))):
+        h.update(os.path.basename(path).encode())
+        h.update(file_digest(path).encode())
+    h.update(json.dumps(stage.args).encode())
+    return h.hexdigest()
+
+
+def _digests(paths):
+    out = {}
+    for p in paths:
+        full = os.path.join(BASE_DIR, p)
+        out[p] = file_digest(full) if os.path.exists(full) else None
+    return out
+
+
+def fingerprint(stage):
+    return {"code": code_digest(stage),
+            "inputs": _digests(stage.inputs),
+            "outputs": _digests(stage.outputs)}
+
+
+def is_up_to_date(stage, state):
+    last = state.get(stage.name)
+    if last is None:
+        return False
+    now = fingerprint(stage)
+    return now == last and None not in now["outputs"].values()
+
+
+def load_state():
+    if not os.path.exists(STATE_FILE):
+        return {}
+    with open(STATE_FILE) as f:
+        return json.load(f)
+
+
+def save_state(state):
+    os.makedirs(STATE_DIR, exist_ok=True)
+    tmp = STATE_FILE + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp, STATE_FILE)
+
+
+# ── Execution ───────────────────────────────────────────────────────────────
+def run_stage(stage):
+    """Run one stage in its own Python process; returns (returncode, seconds)."""
+    os.makedirs(LOG_DIR, exist_ok=True)
+    env = dict(os.environ, MPLBACKEND="Agg", PYTHONUNBUFFERED="1")
+    module = f"{__package__}.{os.path.splitext(stage.script)[0]}"
+    cmd = [sys.executable, "-m", module, *stage.args]
+    t0 = time.perf_counter()
+    with open(os.path.join(LOG_DIR, stage.name + ".log"), "w") as log:
+        rc = subprocess.run(cmd, cwd=BASE_DIR, env=env,
+                            stdout=log, stderr=subprocess.STDOUT).returncode
+    return rc, time.perf_counter() - t0
+
+
+def _log_tail(stage, n=15):
+    with open(os.path.join(LOG_DIR, stage.name + ".log")) as f:
+        return "".join(f.readlines()[-n:])
+
+
+def run_pipeline(stages, force=False, jobs=None, dry_run=False):
+    state   = load_state()
+    deps    = {s.name: dependencies(s, stages) for s in stages}
+    pending = list(stages)
+    done, failed, running = set(), set(), {}
+    would_run = set()                 # --dry-run: stages reported as [run]
+    stage_times = {}
+    t_start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=jobs or len(stages)) as pool:
+        while pending or running:
+            for stage in list(pending):
+                if deps[stage.name] & failed:
+                    pending.remove(stage)
+                    failed.add(stage.name)
+                    print(f"  [blocked] {stage.name:15s} upstream stage failed")
+                elif deps[stage.name] <= done:
+                    pending.remove(stage)
+                    upstream = deps[stage.name] & would_run
+                    if not force and not upstream and is_up_to_date(stage, state):
+                        done.add(stage.name)
+                        print(f"  [skip]    {stage.name:15s} inputs and code unchanged")
+                    elif dry_run:
+                        done.add(stage.name)
+                        would_run.add(stage.name)
+                        print(f"  [run]     {stage.name:15s} (dry run"
+                              + (", upstream stage runs)" if upstream else ")"))
+                    else:
+                        print(f"  [start]   {stage.name}")
+                        running[pool.submit(run_stage, stage)] = stage
+            if not running:
+                if pending:
+                    raise RuntimeError("unsatisfiable stage dependencies: "
+                                       + ", ".join(s.name for s in pending))
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage = running.pop(future)
+                rc, seconds = future.result()
+                stage_times[stage.name] = seconds
+                if rc == 0:
+                    done.add(stage.name)
+                    state[stage.name] = fingerprint(stage)
+                    save_state(state)
+                    print(f"  [done]    {stage.name:15s} {seconds:7.2f} s")
+                else:
+                    failed.add(stage.name)
+                    state.pop(stage.name, None)
+                    save_state(state)
+                    print(f"  [FAILED]  {stage.name:15s} exit code {rc}  "
+                          f"(log: {os.path.join(LOG_DIR, stage.name + '.log')})")
+                    print(_log_tail(stage))
+
+    wall = time.perf_counter() - t_start
+    print(f"\nWall time {wall:.2f} s  |  sum of stage times "
+          f"{sum(stage_times.values()):.2f} s  |  ran {len(stage_times)}, "
+          f"failed {len(failed)}")
+    return not failed
+
+
+def main(argv=None):
+    names = [s.name for s in STAGES]
+    parser = argparse.ArgumentParser(description="Incremental data-preparation pipeline")
+    parser.add_argument("stages", nargs="*", metavar="STAGE",
+                        help=f"stages to consider (default: all) — {', '.join(names)}")
+    parser.add_argument("--force", action="store_true",
+                        help="re-run stages even if nothing changed")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="max stages running at once (default: one per stage)")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="only report which stages would run")
+    args = parser.parse_args(argv)
+    unknown = set(args.stages) - set(names)
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(sorted(unknown))}")
+
+    selected = [s for s in STAGES if not args.stages or s.name in args.stages]
+    ok = run_pipeline(selected, force=args.force, jobs=args.jobs, dry_run=args.dry_run)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,236 @@
+"""
+CRISP-DM: Data Preparation — plot summaries
+The figures of 04_visualization.py need small aggregates, not the raw rows:
+histogram counts and bin edges, box-plot statistics, value counts, group
+rates, a crosstab or a correlation matrix.  This module computes each of
+them in one vectorised pass over the columns involved:
+
+  histogram    np.histogram over the non-missing values (bins as plt.hist)
+  box stats    one stable (radix) sort of the group codes, then a sort of
+               each group's values; quartiles and whiskers come from the
+               sorted values, fliers from one mask over the group in row
+               order — the same numbers as plt.boxplot computes
+  counts       value counts, group means / sizes, crosstabs
+  correlations blockwise float32 Pearson (correlation.py)
+
+Box-plot fliers are capped at `max_fliers` per box (an evenly spaced sample
+of the sorted fliers that keeps both extremes), so a summary stays small
+however many rows there are.  SummaryCache stores every summary as a JSON
+file (correlation matrices as memory-mapped .npy) keyed by the digest of
+the data it was computed from; once all of a figure's summaries are
+cached, drawing it does not read the data at all.
+
+    s = SummaryCache(".cache/plots/summaries/hospital", digest, load)
+    counts, edges = s.histogram("Age", bins=20)
+    ax.bxp(s.box("Dosage (gram)", by="Route"), patch_artist=True)
+"""
+
+import functools
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from .correlation import CorrelationMatrix, correlation_matrix
+
+SUMMARY_VERSION = 1
+MAX_FLIERS = 2000
+
+
+def _native(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _values(values):
+    values = np.asarray(values, dtype=float)
+    return values[~np.isnan(values)]
+
+
+# ── Histograms ──────────────────────────────────────────────────────────────
+def histogram(values, bins=10):
+    """(counts, edges) of the non-missing `values`, binned as plt.hist bins them."""
+    counts, edges = np.histogram(_values(values), bins=bins)
+    return counts, edges
+
+
+# ── Box plots ───────────────────────────────────────────────────────────────
+def _flier_sample(fliers, max_fliers):
+    if len(fliers) <= max_fliers:
+        return fliers
+    return np.sort(fliers)[np.unique(np.linspace(0, len(fliers) - 1, max_fliers).round()
+                                     .astype(np.int64))]
+
+
+def _box(values, whis=1.5, max_fliers=MAX_FLIERS):
+    """matplotlib.cbook.boxplot_stats of one array in row order (no NaN)."""
+    x = np.sort(values)
+    n = len(x)
+    if n == 0:
+        stats = dict.fromkeys(["mean", "med", "q1", "q3", "iqr", "cilo", "cihi",
+                               "whislo", "whishi"], np.nan)
+        return dict(stats, fliers=np.empty(0), n=0, n_fliers=0)
+    q1, med, q3 = np.percentile(x, [25, 50, 75])
+    iqr = q3 - q1
+    # Largest value <= the upper fence and smallest >= the lower one
+    hi = np.searchsorted(x, q3 + whis * iqr, side="right")
+    lo = np.searchsorted(x, q1 - whis * iqr, side="left")
+    whishi = q3 if hi == 0 or x[hi - 1] < q3 else x[hi - 1]
+    whislo = q1 if lo == n or x[lo] > q1 else x[lo]
+    # Low ones first, each in row order, as boxplot_stats returns them
+    fliers = np.concatenate([values[values < whislo], values[values > whishi]])
+    notch = 1.57 * iqr / np.sqrt(n)
+    return {"mean": np.mean(values), "med": med, "q1": q1, "q3": q3, "iqr": iqr,
+            "cilo": med - notch, "cihi": med + notch, "whislo": whislo, "whishi": whishi,
+            "fliers": _flier_sample(fliers, max_fliers), "n": n, "n_fliers": len(fliers)}
+
+
+def box_stats(values, whis=1.5, max_fliers=MAX_FLIERS):
+    """Box-plot statistics of the non-missing `values` (a dict for Axes.bxp)."""
+    return _box(_values(values), whis, max_fliers)
+
+
+def grouped_box_stats(keys, values, whis=1.5, max_fliers=MAX_FLIERS):
+    """[(group, box stats)] for every group of `keys`, groups in sorted order."""
+    codes, groups = pd.factorize(pd.Series(keys), sort=True)
+    values = np.asarray(values, dtype=float)
+    keep   = (codes >= 0) & ~np.isnan(values)
+    codes  = codes[keep].astype(np.min_scalar_type(max(len(groups), 1)))
+    # Stable, so every group keeps its row order; radix sort for small codes
+    order  = np.argsort(codes, kind="stable")
+    values = values[keep][order]
+    bounds = np.searchsorted(codes[order], np.arange(len(groups) + 1))
+    return [(_native(g), _box(values[a:b], whis, max_fliers))
+            for g, a, b in zip(groups, bounds[:-1], bounds[1:])]
+
+
+# ── Serialisation ───────────────────────────────────────────────────────────
+def _to_json(obj):
+    if isinstance(obj, pd.DataFrame):
+        return {"frame": obj.to_numpy().tolist(), "index": obj.index.tolist(),
+                "columns": obj.columns.tolist(), "index_name": obj.index.name,
+                "columns_name": obj.columns.name}
+    if isinstance(obj, pd.Series):
+        return {"series": obj.tolist(), "index": obj.index.tolist(),
+                "index_name": obj.index.name, "name": obj.name}
+    if isinstance(obj, np.ndarray):
+        return {"array": obj.tolist(), "dtype": str(obj.dtype)}
+    if isinstance(obj, dict):
+        return {k: _to_json(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_to_json(v) for v in obj]
+    return _native(obj)
+
+
+def _from_json(obj):
+    if isinstance(obj, dict):
+        if "frame" in obj:
+            out = pd.DataFrame(obj["frame"], index=obj["index"], columns=obj["columns"])
+            out.index.name, out.columns.name = obj["index_name"], obj["columns_name"]
+            return out
+        if "series" in obj:
+            out = pd.Series(obj["series"], index=obj["index"], name=obj["name"],
+                            dtype=None if obj["series"] else float)
+            out.index.name = obj["index_name"]
+            return out
+        if "array" in obj:
+            return np.asarray(obj["array"], dtype=obj["dtype"])
+        return {k: _from_json(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_from_json(v) for v in obj]
+    return obj
+
+
+# ── Cache ───────────────────────────────────────────────────────────────────
+class SummaryCache:
+    """Summaries of one version of a dataset, computed on first use.
+
+    `root` holds one directory per data digest; directories of other
+    digests are removed, since their summaries describe data that no
+    longer exists.  `load` returns the DataFrame and is only called when
+    a summary is not cached yet.
+    """
+
+    def __init__(self, root, digest, load):
+        self.dir   = os.path.join(root, digest)
+        self._load = load
+        self.hits = self.misses = 0
+        if os.path.isdir(root):
+            for name in os.listdir(root):
+                if name != digest:
+                    shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+    @functools.cached_property
+    def frame(self):
+        return self._load()
+
+    def _path(self, kind, **spec):
+        key = json.dumps([SUMMARY_VERSION, kind, spec], sort_keys=True)
+        return os.path.join(self.dir, f"{kind}-"
+                            f"{hashlib.blake2b(key.encode(), digest_size=8).hexdigest()}")
+
+    def _get(self, kind, compute, **spec):
+        path = self._path(kind, **spec) + ".json"
+        if os.path.exists(path):
+            self.hits += 1
+            with open(path, encoding="utf-8") as f:
+                return _from_json(json.load(f))
+        self.misses += 1
+        out = compute(self.frame)
+        os.makedirs(self.dir, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(_to_json(out), f, ensure_ascii=False)
+        os.replace(tmp, path)
+        return out
+
+    # ── Summaries ───────────────────────────────────────────────────────────
+    @property
+    def columns(self):
+        return self._get("columns", lambda df: list(df.columns))
+
+    def histogram(self, col, bins=10, by=None):
+        """(counts, edges), or {group: (counts, edges)} with `by` (bins per group)."""
+        if by is None:
+            return tuple(self._get("hist", lambda df: list(histogram(df[col], bins)),
+                                   col=col, bins=bins))
+        out = self._get("hist", lambda df: [[_native(g), list(histogram(v, bins))]
+                                            for g, v in df.groupby(by)[col]],
+                        col=col, bins=bins, by=by)
+        return {g: tuple(h) for g, h in out}
+
+    def box(self, col, by=None, whis=1.5, max_fliers=MAX_FLIERS):
+        """Box-plot statistics for Axes.bxp: one box, or one per group labelled by it."""
+        def compute(df):
+            if by is None:
+                return [box_stats(df[col], whis, max_fliers)]
+            return [dict(stats, label=g)
+                    for g, stats in grouped_box_stats(df[by], df[col], whis, max_fliers)]
+        return self._get("box", compute, col=col, by=by, whis=whis, max_fliers=max_fliers)
+
+    def value_counts(self, col):
+        return self._get("counts", lambda df: df[col].value_counts(), col=col)
+
+    def rates(self, col, by):
+        """Mean of `col` per group of `by` (e.g. a 0/1 target → admission rate)."""
+        return self._get("rates", lambda df: df.groupby(by)[col].mean(), col=col, by=by)
+
+    def crosstab(self, row, col):
+        return self._get("crosstab", lambda df: df.groupby([row, col]).size()
+                         .unstack(fill_value=0), row=row, col=col)
+
+    def corr(self, columns=None):
+        """Pearson correlations of `columns` (default: every numeric column).
+
+        Computed blockwise in float32 by correlation.py and kept as its
+        memory-mapped matrix rather than as JSON.
+        """
+        path = self._path("corr", columns=columns)
+        if os.path.exists(os.path.join(path, "meta.json")):
+            self.hits += 1
+            return CorrelationMatrix.load(path).frame()
+        self.misses += 1
+        os.makedirs(self.dir, exist_ok=True)
+        return correlation_matrix(self.frame, columns, out_dir=path).frame()
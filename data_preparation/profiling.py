@@ -0,0 +1,183 @@
+"""
+CRISP-DM: Data Preparation — per-stage profiling
+Each script calls `prof.mark(stage, name, df)` at the end of every numbered
+stage.  A mark closes the span that began at the previous one and records
+wall time, CPU time, RSS, the stage's own peak RSS and rows in / out:
+
+    DATA_PREP_TRACE=traces python -m data_preparation pipeline
+    python -m data_preparation.profiling summary traces
+    python -m data_preparation.profiling merge traces --out traces/all.trace.json
+
+With DATA_PREP_TRACE set, every stage is appended as one JSON line to
+<dir>/<script>.jsonl as soon as it ends, and the whole run is written as a
+Chrome trace-event file, <dir>/<script>.trace.json, on exit.  Open it in
+chrome://tracing or ui.perfetto.dev.  Timestamps are wall-clock
+microseconds, so traces of scripts that ran in parallel line up once they
+are merged.
+
+When tracing is off, mark() returns at once and measures nothing, unless
+the script asks for the memory table (memory_table=True, script 3).
+"""
+
+import argparse
+import atexit
+import glob
+import json
+import os
+import time
+
+from .memory_report import current_rss_mb, frame_mb, peak_rss_mb, reset_peak_rss
+
+TRACE_ENV = "DATA_PREP_TRACE"
+
+
+class StageProfiler:
+    def __init__(self, script, trace_dir=None, memory_table=False):
+        self.script = script
+        self.trace_dir = trace_dir or os.environ.get(TRACE_ENV) or None
+        self.memory_table = memory_table
+        self.enabled = bool(self.trace_dir) or memory_table
+        self.stages = []
+        if not self.enabled:
+            return
+        self.pid    = os.getpid()
+        self.run_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{self.pid}"
+        self._epoch = time.time() - time.perf_counter()   # perf_counter → wall clock
+        self._last  = (time.perf_counter(), time.process_time())
+        self._rows  = None
+        self._peak_so_far = 0.0
+        self._peak_resets = reset_peak_rss()
+        if self.trace_dir:
+            os.makedirs(self.trace_dir, exist_ok=True)
+            atexit.register(self.write_trace)
+
+    def mark(self, stage, name, df=None, rows=None, rows_in=None, **extra):
+        """Close stage `stage`; `df` (or `rows`) is what it produced."""
+        if not self.enabled:
+            return
+        wall, cpu = time.perf_counter(), time.process_time()
+        rss, peak = current_rss_mb(), peak_rss_mb()
+        if rss is not None and peak is not None:
+            peak = max(peak, rss)      # the two counters are sampled differently
+            self._peak_so_far = max(self._peak_so_far, peak)
+        if self._peak_resets:
+            reset_peak_rss()           # the next stage's peak starts from here
+
+        rows_out = len(df) if df is not None else rows
+        seconds  = wall - self._last[0]
+        record = {
+            "run": self.run_id, "script": self.script, "stage": str(stage), "name": name,
+            "start": round(self._epoch + self._last[0], 6),
+            "wall_s": round(seconds, 6),
+            "cpu_s": round(cpu - self._last[1], 6),
+            "rss_mb": _round(rss),
+            "peak_rss_mb": _round(peak),
+            "peak_rss_so_far_mb": _round(self._peak_so_far) if peak is not None else None,
+            "rows_in": self._rows if rows_in is None else rows_in,
+            "rows_out": rows_out,
+            "rows_per_s": round(rows_out / seconds) if rows_out and seconds > 0 else None,
+            **extra,
+        }
+        if self.memory_table:
+            record["frame_mb"] = _round(frame_mb(df)) if df is not None else None
+        self.stages.append(record)
+        if self.trace_dir:
+            with open(os.path.join(self.trace_dir, f"{self.script}.jsonl"), "a") as f:
+                f.write(json.dumps(record) + "\n")
+        self._last = (time.perf_counter(), time.process_time())
+        if rows_out is not None:
+            self._rows = rows_out
+
+    def write_trace(self):
+        path = os.path.join(self.trace_dir, f"{self.script}.trace.json")
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self.trace_events(), "displayTimeUnit": "ms"}, f)
+        return path
+
+    def trace_events(self):
+        """The recorded stages as Chrome trace events (complete spans + RSS counter)."""
+        events = [{"name": "process_name", "ph": "M", "pid": self.pid, "tid": 0,
+                   "args": {"name": self.script}}]
+        skip = {"run", "script", "stage", "name", "start", "wall_s"}
+        for rec in self.stages:
+            ts, dur = int(rec["start"] * 1e6), int(rec["wall_s"] * 1e6)
+            events.append({"name": f"[{rec['stage']}] {rec['name']}", "cat": self.script,
+                           "ph": "X", "ts": ts, "dur": dur, "pid": self.pid, "tid": 0,
+                           "args": {k: v for k, v in rec.items() if k not in skip}})
+            if rec["rss_mb"] is not None:
+                events.append({"name": "RSS MB", "ph": "C", "ts": ts + dur, "pid": self.pid,
+                               "args": {"rss": rec["rss_mb"], "peak": rec["peak_rss_mb"]}})
+        return events
+
+    def print_memory(self):
+        def fmt(v):
+            return f"{v:10,.1f}" if v is not None else f"{'n/a':>10s}"
+        print(f"    {'stage':38s} {'RSS MB':>10s} {'peak MB':>10s} {'frame MB':>10s}")
+        for rec in self.stages:
+            label = f"[{rec['stage']}] {rec['name']}"
+            print(f"    {label:38s} {fmt(rec['rss_mb'])} {fmt(rec['peak_rss_so_far_mb'])} "
+                  f"{fmt(rec.get('frame_mb'))}")
+
+
+def _round(v):
+    return None if v is None else round(v, 1)
+
+
+# ── Reading traces ──────────────────────────────────────────────────────────
+def last_runs(trace_dir):
+    """{script: [stage records of its most recent run]} from <dir>/*.jsonl."""
+    runs = {}
+    for path in sorted(glob.glob(os.path.join(trace_dir, "*.jsonl"))):
+        with open(path) as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        if records:
+            last = records[-1]["run"]
+            runs[records[-1]["script"]] = [r for r in records if r["run"] == last]
+    return runs
+
+
+def summary(trace_dir):
+    def fmt(v, spec):
+        return format(v, spec) if v is not None else "n/a"
+    for script, records in last_runs(trace_dir).items():
+        total = sum(r["wall_s"] for r in records)
+        print(f"\n{script}  (run {records[0]['run']}, {total:.2f} s)")
+        print(f"    {'stage':34s} {'wall s':>8s} {'cpu s':>8s} {'peak MB':>9s} "
+              f"{'rows in':>10s} {'rows out':>10s} {'rows/s':>11s}")
+        for r in records:
+            label = f"[{r['stage']}] {r['name']}"[:34]
+            print(f"    {label:34s} {r['wall_s']:8.3f} {r['cpu_s']:8.3f} "
+                  f"{fmt(r['peak_rss_mb'], ',.1f'):>9s} {fmt(r['rows_in'], ','):>10s} "
+                  f"{fmt(r['rows_out'], ','):>10s} {fmt(r['rows_per_s'], ','):>11s}")
+
+
+def merge(trace_dir, out):
+    events = []
+    for path in sorted(glob.glob(os.path.join(trace_dir, "*.trace.json"))):
+        if os.path.abspath(path) == os.path.abspath(out):
+            continue
+        with open(path) as f:
+            events.extend(json.load(f)["traceEvents"])
+    with open(out, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    print(f"Merged {len(events)} events  →  {out}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect per-stage traces")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("summary", help="table of the latest run of every script")
+    p.add_argument("trace_dir")
+    p = sub.add_parser("merge", help="combine Chrome traces of all scripts into one file")
+    p.add_argument("trace_dir")
+    p.add_argument("--out", help="default: <trace_dir>/all.trace.json")
+    args = parser.parse_args(argv)
+
+    if args.command == "summary":
+        summary(args.trace_dir)
+    else:
+        merge(args.trace_dir, args.out or os.path.join(args.trace_dir, "all.trace.json"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+CRISP-DM: Data Preparation — mergeable quantile sketch
+KLL sketch (Karnin, Lang & Liberty) for percentile bounds and medians of
+inputs that are streamed in chunks.  Memory is O(k log(n / k)) items per
+column however many rows are seen; sketches of separate chunks or workers
+can be merged.  Until the first compaction the sketch holds every value, and
+quantiles are then exactly those of np.quantile (linear interpolation).
+
+Rank error is roughly 1.7 / k of n with high probability (k=400 → ~0.4%).
+At the 1% / 99% caps of a long-tailed column that rank error can move the
+bound far in value, so `QuantileBand` makes sketched quantiles exact with
+one more pass over the same data: it counts the values below a band of
+±`margin` in rank around each estimate and keeps exact counts inside it.
+"""
+
+import numpy as np
+
+
+def _ranks(n, q):
+    """(prev, next, t): the ranks np.quantile interpolates between at `q`."""
+    virtual = (n - 1) * q
+    prev = int(np.floor(virtual))
+    return prev, min(prev + 1, n - 1), virtual - prev
+
+
+def _lerp(a, b, t):
+    # Same two-sided lerp as numpy's quantile implementation
+    return b - (b - a) * (1 - t) if t >= 0.5 else a + (b - a) * t
+
+
+def weighted_quantiles(values, weights, qs):
+    """Linear-interpolated quantiles of `values`, each repeated `weights` times.
+
+    Matches np.quantile(np.repeat(values, weights), qs) bit for bit.
+    """
+    order  = np.argsort(values, kind="stable")
+    values = np.asarray(values, dtype=float)[order]
+    cum    = np.cumsum(np.asarray(weights, dtype=np.int64)[order])
+    n = int(cum[-1]) if len(cum) else 0
+    if n == 0:
+        return [np.nan] * len(qs)
+    out = []
+    for q in qs:
+        prev, nxt, t = _ranks(n, q)
+        a = values[np.searchsorted(cum, prev, side="right")]
+        b = values[np.searchsorted(cum, nxt, side="right")]
+        out.append(_lerp(a, b, t))
+    return out
+
+
+class KllSketch:
+    """Streaming quantile sketch over one column of floats (NaNs ignored)."""
+
+    def __init__(self, k=400, seed=0):
+        self.k = k
+        self.n = 0
+        self._levels = [np.empty(0)]        # level h holds items of weight 2**h
+        self._rng = np.random.default_rng(seed)
+
+    def __len__(self):
+        return self.n
+
+    @property
+    def size(self):
+        """Number of items retained."""
+        return sum(len(level) for level in self._levels)
+
+    def _capacity(self, h):
+        depth = len(self._levels) - 1 - h
+        return max(8, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        if len(values):
+            self.n += len(values)
+            self._levels[0] = np.concatenate([self._levels[0], values])
+            self._compress()
+        return self
+
+    def merge(self, other):
+        """Fold `other` into this sketch (both must use the same k)."""
+        if other.k != self.k:
+            raise ValueError("cannot merge KLL sketches with different k")
+        while len(self._levels) < len(other._levels):
+            self._levels.append(np.empty(0))
+        for h, level in enumerate(other._levels):
+            self._levels[h] = np.concatenate([self._levels[h], level])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def _compress(self):
+        h = 0
+        while h < len(self._levels):
+            level = self._levels[h]
+            if len(level) > self._capacity(h):
+                if h + 1 == len(self._levels):
+                    self._levels.append(np.empty(0))
+                level = np.sort(level)
+                # An odd item stays behind so the total weight is conserved
+                odd = len(level) % 2
+                promoted = level[odd + self._rng.integers(2)::2]
+                self._levels[h] = level[:odd]
+                self._levels[h + 1] = np.concatenate([self._levels[h + 1], promoted])
+            h += 1
+
+    def items(self):
+        """(values, weights) retained; the weights sum to n.
+
+        Items of several sketches concatenated describe their union without
+        the compaction error a merge() would add.
+        """
+        values  = np.concatenate(self._levels)
+        weights = np.concatenate([np.full(len(level), 2 ** h, dtype=np.int64)
+                                  for h, level in enumerate(self._levels)])
+        return values, weights
+
+    def quantile(self, qs):
+        return weighted_quantiles(*self.items(), qs)
+
+
+class QuantileBand:
+    """Exact quantiles from a second pass over the data a sketch has seen.
+
+    For each q the sketch gives the values at ranks q ± `margin` (default
+    twice the expected rank error, 3.4 / k); `update` counts the values
+    below that band and keeps the distinct values inside it with their
+    counts.  Memory is bounded by the distinct values within the bands,
+    roughly 2 × margin × n per quantile.  If the sketch missed
+    by more than the margin, that quantile falls back to the sketch estimate
+    and `exact` reports it.
+    """
+
+    def __init__(self, sketch, qs, margin=None):
+        margin = 3.4 / sketch.k if margin is None else margin
+        self.sketch = sketch
+        self.qs = list(qs)
+        self.n  = 0
+        self._bands = [sketch.quantile([max(q - margin, 0.0), min(q + margin, 1.0)])
+                       for q in self.qs]
+        self._below = [0] * len(self.qs)
+        self._counts = [(np.empty(0), np.empty(0, dtype=np.int64)) for _ in self.qs]
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        self.n += len(values)
+        for i, (lo, hi) in enumerate(self._bands):
+            self._below[i] += int((values < lo).sum())
+            inside = values[(values >= lo) & (values <= hi)]
+            if len(inside):
+                kept, counts = self._counts[i]
+                kept, idx = np.unique(np.concatenate([kept, inside]), return_inverse=True)
+                self._counts[i] = (kept, np.bincount(
+                    idx, weights=np.concatenate([counts, np.ones(len(inside), np.int64)]),
+                    minlength=len(kept)).astype(np.int64))
+        return self
+
+    def _quantile(self, i):
+        if self.n != self.sketch.n:
+            raise ValueError(f"refined over {self.n:,} values, the sketch saw {self.sketch.n:,}")
+        if self.n == 0:
+            return np.nan, True
+        prev, nxt, t = _ranks(self.n, self.qs[i])
+        kept, counts = self._counts[i]
+        cum = self._below[i] + np.cumsum(counts)
+        if len(kept) == 0 or prev < self._below[i] or nxt >= cum[-1]:
+            return self.sketch.quantile([self.qs[i]])[0], False
+        a = kept[np.searchsorted(cum, prev, side="right")]
+        b = kept[np.searchsorted(cum, nxt, side="right")]
+        return _lerp(a, b, t), True
+
+    @property
+    def exact(self):
+        """One flag per q: False where the sketch estimate had to be used."""
+        return [self._quantile(i)[1] for i in range(len(self.qs))]
+
+    def quantile(self):
+        return [self._quantile(i)[0] for i in range(len(self.qs))]
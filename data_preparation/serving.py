@@ -0,0 +1,335 @@
+"""
+CRISP-DM: Data Preparation — online preprocessing service
+Applies the fitted batch preprocessing of 02_medical_cleaning.py and
+03_icu_cleaning.py to individual records at request time:
+
+  cardiac : Result encoding → percentile caps → StandardScaler
+  ICU     : AGE_PERCENTIL ordinal map → within-patient ffill+bfill
+            → column medians → percentile caps → StandardScaler
+
+The fitted artifacts in cleaned/ (scalers, cap bounds, ICU medians) are
+loaded once.  Concurrent requests are micro-batched into one vectorised
+NumPy transform, and per-request latency percentiles are tracked.
+
+    python -m data_preparation.serving serve --port 8000   # local HTTP
+    python -m data_preparation.serving verify              # parity + latency
+
+HTTP:  POST /medical  {record} | [records]
+       POST /icu      [all window records of one patient visit]
+       GET  /stats    p50 / p99 latency per endpoint
+"""
+
+import argparse
+import json
+import os
+import pickle
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from .icu_schema import AGE_MAP, WINDOW_ORDER
+from .imputation import ffill_bfill_sorted, group_starts
+from .winsorizer import Winsorizer
+
+BASE_DIR  = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLEAN_DIR = os.path.join(BASE_DIR, "cleaned")
+
+
+def _load_pickle(path):
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def _to_float(value):
+    return np.nan if value is None or value == "" else float(value)
+
+
+def _jsonable(value):
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+class _ScaledFeatures:
+    """Percentile caps followed by the StandardScaler, on a float matrix."""
+
+    def __init__(self, scaler_file, caps_file):
+        scaler = _load_pickle(scaler_file)
+        caps   = Winsorizer.load(caps_file)
+        self.cols  = list(scaler.feature_names_in_)
+        self.lo    = caps.lower_[self.cols].to_numpy()
+        self.hi    = caps.upper_[self.cols].to_numpy()
+        self.mean  = np.asarray(scaler.mean_, dtype=float)
+        self.scale = np.asarray(scaler.scale_, dtype=float)
+
+    def apply(self, X):
+        # Same element-wise operations (and order) as DataFrame.clip followed
+        # by StandardScaler.transform, so results match the batch bit for bit.
+        np.clip(X, self.lo, self.hi, out=X)
+        X -= self.mean
+        X /= self.scale
+        return X
+
+
+class MedicalPreprocessor:
+    name = "medical"
+
+    def __init__(self, clean_dir=CLEAN_DIR):
+        self.features = _ScaledFeatures(os.path.join(clean_dir, "medical_scaler.pkl"),
+                                        os.path.join(clean_dir, "medical_caps.pkl"))
+
+    def transform_batch(self, requests):
+        """`requests` is a list of record lists; returns them preprocessed."""
+        records = [r for req in requests for r in req]
+        cols = self.features.cols
+        X = np.array([[_to_float(r[c]) for c in cols] for r in records], dtype=float)
+        X = self.features.apply(X).tolist()
+
+        out = []
+        for rec, row in zip(records, X):
+            rec = dict(rec)
+            rec.update(zip(cols, row))
+            if "Result" in rec and isinstance(rec["Result"], str):
+                rec["Result"] = {"positive": 1, "negative": 0}.get(rec["Result"].strip().lower())
+            out.append({k: _jsonable(v) for k, v in rec.items()})
+        return _split(out, requests)
+
+
+class IcuPreprocessor:
+    name = "icu"
+
+    def __init__(self, clean_dir=CLEAN_DIR):
+        self.features = _ScaledFeatures(os.path.join(clean_dir, "icu_scaler.pkl"),
+                                        os.path.join(clean_dir, "icu_caps.pkl"))
+        medians = _load_pickle(os.path.join(clean_dir, "icu_medians.pkl"))
+        self.medians = np.array([medians[c] for c in self.features.cols], dtype=float)
+
+    def transform_batch(self, requests):
+        """Each request holds window records of one or more patient visits.
+
+        Fill runs within (request, patient), so concurrent requests never
+        leak values into each other.
+        """
+        records = [r for req in requests for r in req]
+        req_idx = np.repeat(np.arange(len(requests)), [len(req) for req in requests])
+        pid     = np.array([r["PATIENT_VISIT_IDENTIFIER"] for r in records])
+        window  = np.array([WINDOW_ORDER[r["WINDOW"]] for r in records])
+        order   = np.lexsort((window, pid, req_idx))
+
+        records = [records[i] for i in order]
+        keys    = req_idx[order].astype(np.int64) << 32 | pid[order].astype(np.int64)
+        cols    = self.features.cols
+        X = np.array([[_to_float(r.get(c)) for c in cols] for r in records], dtype=float)
+        X = ffill_bfill_sorted(X, group_starts(keys))
+        missing = np.isnan(X)
+        if missing.any():
+            X[missing] = np.broadcast_to(self.medians, X.shape)[missing]
+        X = self.features.apply(X).tolist()
+
+        out = []
+        for rec, row in zip(records, X):
+            rec = dict(rec)
+            rec["AGE_PERCENTIL"] = AGE_MAP.get(rec.get("AGE_PERCENTIL"), rec.get("AGE_PERCENTIL"))
+            rec.update(zip(cols, row))
+            out.append({k: _jsonable(v) for k, v in rec.items()})
+        sizes = np.bincount(req_idx, minlength=len(requests))
+        return _split(out, sizes)
+
+
+def _split(flat, requests):
+    out, i = [], 0
+    for req in requests:
+        n = req if isinstance(req, (int, np.integer)) else len(req)
+        out.append(flat[i:i + n])
+        i += n
+    return out
+
+
+# ── Micro-batching ──────────────────────────────────────────────────────────
+class MicroBatcher:
+    """Collects concurrent requests and runs them through one transform.
+
+    A batch is flushed when it holds `max_batch` requests or `max_wait_ms`
+    has passed since its first request arrived.  If the batch transform
+    fails, its requests are retried one by one, so a malformed request
+    fails alone instead of failing everything batched with it.
+    """
+
+    def __init__(self, preprocessor, max_batch=256, max_wait_ms=0.5, history=100_000):
+        self.pre = preprocessor
+        self.max_batch = max_batch
+        self.max_wait  = max_wait_ms / 1000
+        self.latencies = deque(maxlen=history)   # seconds per request
+        self.records   = 0
+        self._queue = queue.Queue()
+        threading.Thread(target=self._loop, daemon=True).start()
+
+    def submit(self, records):
+        fut = Future()
+        self._queue.put((time.perf_counter(), records, fut))
+        return fut
+
+    def __call__(self, records):
+        return self.submit(records).result()
+
+    def _loop(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.perf_counter()
+                try:
+                    batch.append(self._queue.get(timeout=timeout) if timeout > 0
+                                 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                results = self.pre.transform_batch([b[1] for b in batch])
+            except Exception:
+                results = [self._transform_one(b[1]) for b in batch]
+            done = time.perf_counter()
+            for (t0, records, fut), res in zip(batch, results):
+                if isinstance(res, Exception):
+                    fut.set_exception(res)
+                    continue
+                self.latencies.append(done - t0)
+                self.records += len(records)
+                fut.set_result(res)
+
+    def _transform_one(self, records):
+        # Requests are transformed independently (the ICU fill never crosses
+        # requests), so the result equals the one the batch would have given.
+        try:
+            return self.pre.transform_batch([records])[0]
+        except Exception as exc:
+            return exc
+
+    def latency_report(self):
+        lat = np.array(self.latencies) * 1000
+        if not len(lat):
+            return {"requests": 0}
+        return {"requests": len(lat), "records": self.records,
+                "p50_ms": round(float(np.percentile(lat, 50)), 4),
+                "p99_ms": round(float(np.percentile(lat, 99)), 4)}
+
+
+# ── HTTP front end ──────────────────────────────────────────────────────────
+def make_handler(batchers):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, code, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/stats":
+                self._send(200, {n: b.latency_report() for n, b in batchers.items()})
+            else:
+                self._send(404, {"error": "unknown path"})
+
+        def do_POST(self):
+            batcher = batchers.get(self.path.strip("/"))
+            if batcher is None:
+                return self._send(404, {"error": "unknown path"})
+            try:
+                payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                records = payload if isinstance(payload, list) else [payload]
+                self._send(200, batcher(records))
+            except (KeyError, TypeError, ValueError) as exc:
+                self._send(400, {"error": f"{type(exc).__name__}: {exc}"})
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def serve(host, port, clean_dir=CLEAN_DIR):
+    batchers = {"medical": MicroBatcher(MedicalPreprocessor(clean_dir)),
+                "icu":     MicroBatcher(IcuPreprocessor(clean_dir))}
+    server = ThreadingHTTPServer((host, port), make_handler(batchers))
+    print(f"Serving on http://{host}:{port}  (POST /medical, POST /icu, GET /stats)")
+    server.serve_forever()
+
+
+# ── Offline parity check + latency ──────────────────────────────────────────
+def verify(clients=16):
+    """Replay the raw datasets through the service and compare with cleaned/."""
+    import pandas as pd
+    from .ingest import load_table
+
+    def replay(batcher, requests):
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            return list(pool.map(batcher, requests))
+
+    # Cardiac: one request per record
+    raw, _ = load_table(os.path.join(BASE_DIR, "Medicaldataset.csv"))
+    ref = pd.read_csv(os.path.join(CLEAN_DIR, "medical_cleaned.csv"), float_precision="round_trip")
+    med = MicroBatcher(MedicalPreprocessor())
+    raw_med = raw.to_dict("records")
+    t0  = time.perf_counter()
+    got = replay(med, [[r] for r in raw_med])
+    wall = time.perf_counter() - t0
+    got = pd.DataFrame([g[0] for g in got])[ref.columns]
+    _report("medical", med, wall, np.array_equal(got.to_numpy(float), ref.to_numpy(float)))
+
+    # ICU: one request per patient visit (all its windows)
+    raw, _ = load_table(os.path.join(BASE_DIR, "Kaggle_Sirio_Libanes_ICU_Prediction.xlsx"))
+    ref = pd.read_csv(os.path.join(CLEAN_DIR, "icu_cleaned_full.csv"), float_precision="round_trip")
+    icu = MicroBatcher(IcuPreprocessor())
+    requests = [g.to_dict("records") for _, g in raw.groupby("PATIENT_VISIT_IDENTIFIER", sort=True)]
+    t0  = time.perf_counter()
+    got = replay(icu, requests)
+    wall = time.perf_counter() - t0
+    got = pd.DataFrame([r for g in got for r in g])[ref.columns]
+    num = ref.columns.drop("WINDOW")
+    same = (got["WINDOW"].tolist() == ref["WINDOW"].tolist()
+            and np.array_equal(got[num].to_numpy(float), ref[num].to_numpy(float), equal_nan=True))
+    _report("icu", icu, wall, same)
+
+    # A malformed request batched with a valid one fails alone
+    isolated = all(_isolates(MicroBatcher(pre, max_batch=2, max_wait_ms=1000), bad, good)
+                   for pre, bad, good in [
+                       (MedicalPreprocessor(), [{**raw_med[0], "Age": "abc"}], [raw_med[1]]),
+                       (IcuPreprocessor(), [{**requests[0][0], "WINDOW": "0-3"}], requests[1])])
+    print(f"bad request isolated from its batch: {'yes' if isolated else 'NO'}")
+
+
+def _isolates(batcher, bad, good):
+    expected = batcher.pre.transform_batch([good])[0]
+    bad_fut, good_fut = batcher.submit(bad), batcher.submit(good)
+    return bad_fut.exception() is not None and good_fut.result() == expected
+
+
+def _report(name, batcher, wall, identical):
+    rep = batcher.latency_report()
+    print(f"{name:8s} requests={rep['requests']:,}  records={rep['records']:,}  "
+          f"p50={rep['p50_ms']:.3f} ms  p99={rep['p99_ms']:.3f} ms  "
+          f"per record={wall / rep['records'] * 1000:.4f} ms  "
+          f"bit-identical to batch: {'yes' if identical else 'NO'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Online preprocessing service")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_serve = sub.add_parser("serve", help="run the local HTTP service")
+    p_serve.add_argument("--host", default="127.0.0.1")
+    p_serve.add_argument("--port", type=int, default=8000)
+    p_verify = sub.add_parser("verify", help="replay raw data, check parity, report latency")
+    p_verify.add_argument("--clients", type=int, default=16)
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve(args.host, args.port)
+    else:
+        verify(args.clients)
@@ -0,0 +1,184 @@
+"""
+CRISP-DM: Data Preparation — shared percentile capping
+Fit/transform Winsorizer used by the hospital, cardiac and ICU cleaning
+scripts.  Lower/upper bounds are computed with one vectorised quantile call
+per block of columns (bounding the temporary copies for wide frames), and
+the fitted bounds can be pickled so new data is capped without recomputing
+the percentiles.  Capping keeps the width of float columns.
+
+For inputs that do not fit in memory, `partial_fit` accumulates exact
+per-column value counts chunk by chunk (memory grows with the number of
+distinct values, not rows); the bounds are then resolved from the merged
+counts with the same linear interpolation numpy uses.  With `sketch_k` set,
+`partial_fit` feeds per-column KLL sketches instead (bounded memory, ~1/k
+rank error), for columns with too many distinct values to count; a second
+pass over the same chunks with `partial_refine` then makes the sketched
+bounds exact (quantile_sketch.QuantileBand).
+"""
+
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from .quantile_sketch import KllSketch, QuantileBand, weighted_quantiles
+
+
+class Winsorizer:
+    """Cap columns at their [lower_pct, upper_pct] quantiles (linear interp.)."""
+
+    def __init__(self, lower_pct=0.01, upper_pct=0.99, block_size=64, sketch_k=None):
+        self.lower_pct = lower_pct
+        self.upper_pct = upper_pct
+        self.block_size = block_size
+        self.sketch_k = sketch_k
+        self.lower_ = None
+        self.upper_ = None
+        self._counts = None
+        self._bands = None
+
+    @property
+    def columns(self):
+        self._resolve_counts()
+        return list(self.lower_.index)
+
+    def _blocks(self, cols):
+        for i in range(0, len(cols), self.block_size):
+            yield cols[i:i + self.block_size]
+
+    def fit(self, df, cols):
+        cols = list(cols)
+        qs = [self.lower_pct, self.upper_pct]
+        bounds = []
+        for block in self._blocks(cols):
+            values = df[block].to_numpy(dtype=float)
+            if np.isnan(values).any():
+                bounds.append(np.nanquantile(values, qs, axis=0))
+            else:
+                bounds.append(np.quantile(values, qs, axis=0))
+        bounds = np.concatenate(bounds, axis=1) if bounds else np.empty((2, 0))
+        self.lower_ = pd.Series(bounds[0], index=cols)
+        self.upper_ = pd.Series(bounds[1], index=cols)
+        self._counts = self._bands = None
+        return self
+
+    def partial_fit(self, df, cols):
+        """Accumulate value counts (or sketches) of `cols` from one chunk."""
+        if self._counts is None:
+            if self.sketch_k:
+                self._counts = {col: KllSketch(self.sketch_k) for col in cols}
+            else:
+                self._counts = {col: pd.Series(dtype=float) for col in cols}
+        for col in cols:
+            if self.sketch_k:
+                self._counts[col].update(df[col].to_numpy(dtype=float))
+                continue
+            vc = df[col].value_counts(dropna=True)
+            vc.index = vc.index.astype(float)
+            self._counts[col] = self._counts[col].add(vc, fill_value=0)
+        self.lower_ = self.upper_ = None
+        self._bands = None
+        return self
+
+    def partial_refine(self, df):
+        """Second pass over the chunks given to partial_fit (sketches only).
+
+        Once every chunk has been seen again, the bounds are exact.
+        """
+        if not self.sketch_k or self._counts is None:
+            raise RuntimeError("partial_refine follows partial_fit with sketch_k set")
+        if self._bands is None:
+            qs = [self.lower_pct, self.upper_pct]
+            self._bands = {col: QuantileBand(sketch, qs) for col, sketch in self._counts.items()}
+        for col, band in self._bands.items():
+            band.update(df[col].to_numpy(dtype=float))
+        self.lower_ = self.upper_ = None
+        return self
+
+    def _resolve_counts(self):
+        if self._counts is None or self.lower_ is not None:
+            return
+        qs = [self.lower_pct, self.upper_pct]
+        if self._bands is not None:
+            bounds = {col: band.quantile() for col, band in self._bands.items()}
+        else:
+            bounds = {col: vc.quantile(qs) if isinstance(vc, KllSketch)
+                      else _quantiles_from_counts(vc, qs)
+                      for col, vc in self._counts.items()}
+        self.lower_ = pd.Series({c: b[0] for c, b in bounds.items()}, dtype=float)
+        self.upper_ = pd.Series({c: b[1] for c, b in bounds.items()}, dtype=float)
+
+    def bounds(self):
+        """(lower_, upper_), resolved from the accumulated counts if needed."""
+        self._resolve_counts()
+        return self.lower_, self.upper_
+
+    def transform(self, df):
+        """Clip the fitted columns of `df` in place.
+
+        Returns the number of values capped per column (pd.Series).
+        """
+        self._resolve_counts()
+        if self.lower_ is None:
+            raise RuntimeError("Winsorizer is not fitted yet")
+        cols = self.columns
+        n_capped = []
+        for block in self._blocks(cols):
+            part   = df[block]
+            values = part.to_numpy(dtype=float)
+            lo, hi = self.lower_[block], self.upper_[block]
+            n_capped.append(((values < lo.to_numpy()) | (values > hi.to_numpy())).sum(axis=0))
+            # clip() upcasts float32 against float64 bounds; cast float columns back
+            keep = {c: t for c, t in part.dtypes.items() if t.kind == "f"}
+            df[block] = part.clip(lower=lo, upper=hi, axis=1).astype(keep)
+        return pd.Series(np.concatenate(n_capped) if n_capped else [], index=cols, dtype=int)
+
+    def fit_transform(self, df, cols):
+        return self.fit(df, cols).transform(df)
+
+    # ── Persistence ─────────────────────────────────────────────────────────
+    #   Stored as a plain dict so the file does not depend on this module path.
+    def save(self, path):
+        self._resolve_counts()
+        state = {"lower_pct": self.lower_pct, "upper_pct": self.upper_pct,
+                 "lower": self.lower_.to_dict(), "upper": self.upper_.to_dict()}
+        with open(path, "wb") as f:
+            pickle.dump(state, f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+        w = cls(state["lower_pct"], state["upper_pct"])
+        w.lower_ = pd.Series(state["lower"], dtype=float)
+        w.upper_ = pd.Series(state["upper"], dtype=float)
+        return w
+
+    def save_counts(self, path):
+        """Save the exact partial_fit counts, so a later run can keep accumulating them."""
+        if self.sketch_k:
+            raise ValueError("only exact counts can be saved, not sketches")
+        arrays = {}
+        for i, vc in enumerate((self._counts or {}).values()):
+            arrays[f"values{i}"] = vc.index.to_numpy(dtype=float)
+            arrays[f"counts{i}"] = vc.to_numpy(dtype=np.int64)
+        with open(path, "wb") as f:
+            np.savez(f, columns=np.array(list(self._counts or {}), dtype=str), **arrays)
+
+    @classmethod
+    def load_counts(cls, path, lower_pct=0.01, upper_pct=0.99):
+        w = cls(lower_pct, upper_pct)
+        with np.load(path) as data:
+            w._counts = {col: pd.Series(data[f"counts{i}"], index=data[f"values{i}"],
+                                        dtype=float)
+                         for i, col in enumerate(data["columns"].tolist())}
+        return w
+
+
+def _quantiles_from_counts(value_counts, qs):
+    """Exact linear-interpolated quantiles of the sample described by counts.
+
+    Matches np.quantile(values, qs) for the expanded sample bit for bit.
+    """
+    return weighted_quantiles(value_counts.index.to_numpy(dtype=float),
+                              value_counts.to_numpy(dtype=np.int64), qs)
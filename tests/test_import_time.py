@@ -0,0 +1,53 @@
+"""
+Start-up budget of the package command line: `--help` of the CLI and of
+every stage must not import a heavy library and must return within
+BUDGET_MS (best of REPEATS, interpreter start-up included).
+benchmarks/bench_import_time.py prints the same measurements as a table.
+"""
+
+import subprocess
+import sys
+import time
+
+import pytest
+
+from conftest import ROOT
+from data_preparation import STAGES
+
+HEAVY     = ("numpy", "pandas", "sklearn", "scipy", "matplotlib", "seaborn")
+BUDGET_MS = 250
+REPEATS   = 3
+
+
+def _help(args):
+    """Best wall time (ms) of `python -X importtime -m data_preparation ARGS --help`
+    and the top-level modules it imported."""
+    best, modules = float("inf"), set()
+    for _ in range(REPEATS):
+        t0 = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-m", "data_preparation",
+                               *args, "--help"], cwd=ROOT, capture_output=True, text=True)
+        best = min(best, (time.perf_counter() - t0) * 1000)
+        assert proc.returncode == 0, proc.stderr[-2000:]
+        # "import time: self [us] | cumulative | imported package"
+        for line in proc.stderr.splitlines():
+            if line.startswith("import time:") and line.count("|") == 2:
+                modules.add(line.rsplit("|", 1)[1].strip().split(".")[0])
+    return best, modules
+
+
+@pytest.mark.parametrize("stage", [None, *STAGES])
+def test_help_is_light_and_fast(stage):
+    ms, modules = _help([] if stage is None else [stage])
+    assert not set(HEAVY) & modules, f"heavy imports: {sorted(set(HEAVY) & modules)}"
+    assert ms <= BUDGET_MS, f"{ms:.0f} ms > {BUDGET_MS} ms budget"
+
+
+def test_no_module_shadows_the_path():
+    # The package's generic module names stay inside it
+    proc = subprocess.run([sys.executable, "-c",
+                           "import sys, data_preparation.winsorizer; "
+                           "print('winsorizer' in sys.modules, "
+                           "any(p.endswith('data_preparation') for p in sys.path))"],
+                          cwd=ROOT, capture_output=True, text=True)
+    assert proc.stdout.split() == ["False", "False"], proc.stderr[-2000:]
@@ -0,0 +1,107 @@
+"""
+Streamed fits of outofcore_fit.py against the in-memory fits of scripts 2
+and 3.  The datasets are tiled and read in small chunks with a small
+sketch_k, so every sketch compacts and the exact pass does the work.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import StandardScaler
+
+from conftest import ROOT
+from data_preparation.icu_schema import continuous_cols
+from data_preparation.ingest import load_table
+from data_preparation.medical_schema import NUMERIC_COLS
+from data_preparation.outofcore_fit import (fit_icu, fit_medical, prepare_icu_chunk,
+                                            prepare_medical_chunk)
+from data_preparation.quantile_sketch import KllSketch, QuantileBand
+from data_preparation.winsorizer import Winsorizer
+
+TILE      = 3
+CHUNKSIZE = 1000
+SKETCH_K  = 50
+SCALE_TOL = 1e-9      # relative to the exact scale: rounding only
+
+
+def _scaler_error(exact, streamed):
+    d_mean  = np.max(np.abs(exact.mean_ - streamed.mean_) / exact.scale_)
+    d_scale = np.max(np.abs(exact.scale_ - streamed.scale_) / exact.scale_)
+    return max(d_mean, d_scale)
+
+
+@pytest.fixture(scope="module")
+def medical_csv(tmp_path_factory):
+    med, _ = load_table(os.path.join(ROOT, "Medicaldataset.csv"))
+    path = tmp_path_factory.mktemp("medical") / "medical.csv"
+    pd.concat([med] * TILE, ignore_index=True).to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.fixture(scope="module")
+def icu_csv(tmp_path_factory):
+    icu, _ = load_table(os.path.join(ROOT, "Kaggle_Sirio_Libanes_ICU_Prediction.xlsx"))
+    step = int(icu["PATIENT_VISIT_IDENTIFIER"].max()) + 1
+    tiles = []
+    for i in range(TILE):
+        part = icu.copy()
+        part["PATIENT_VISIT_IDENTIFIER"] += i * step
+        tiles.append(part)
+    path = tmp_path_factory.mktemp("icu") / "icu.csv"
+    pd.concat(tiles, ignore_index=True).to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.mark.parametrize("q", [0.01, 0.5, 0.99])
+def test_quantile_band_is_exact(q):
+    rng = np.random.default_rng(0)
+    values = np.round(rng.lognormal(sigma=2, size=50_000), 1)    # long tail, many ties
+    values[rng.random(len(values)) < 0.1] = np.nan
+    sketch = KllSketch(SKETCH_K)
+    for chunk in np.array_split(values, 7):
+        sketch.update(chunk)
+    band = QuantileBand(sketch, [q])
+    for chunk in np.array_split(values, 7):
+        band.update(chunk)
+    assert band.exact == [True]
+    assert band.quantile() == [np.nanquantile(values, q)]
+
+
+def test_quantile_band_needs_the_same_data():
+    sketch = KllSketch(SKETCH_K).update(np.arange(1000.0))
+    band = QuantileBand(sketch, [0.5]).update(np.arange(500.0))
+    with pytest.raises(ValueError):
+        band.quantile()
+
+
+def test_fit_medical_matches_in_memory_fit(medical_csv):
+    df = prepare_medical_chunk(pd.read_csv(medical_csv))
+    capper = Winsorizer(lower_pct=0.01, upper_pct=0.99)
+    capper.fit_transform(df, NUMERIC_COLS)
+    scaler = StandardScaler().fit(df[NUMERIC_COLS])
+
+    caps, streamed, rows = fit_medical(medical_csv, CHUNKSIZE, SKETCH_K)
+    assert rows == len(df)
+    pd.testing.assert_series_equal(caps.lower_[NUMERIC_COLS], capper.lower_)
+    pd.testing.assert_series_equal(caps.upper_[NUMERIC_COLS], capper.upper_)
+    assert _scaler_error(scaler, streamed) <= SCALE_TOL
+
+
+def test_fit_icu_matches_in_memory_fit(icu_csv):
+    df   = pd.read_csv(icu_csv)
+    cols = continuous_cols(df.columns)
+    df   = prepare_icu_chunk(df, cols)
+    medians = df[cols].median()
+    df[cols] = df[cols].fillna(medians)
+    capper = Winsorizer(lower_pct=0.01, upper_pct=0.99)
+    capper.fit_transform(df, cols)
+    scaler = StandardScaler().fit(df[cols])
+
+    streamed_medians, caps, streamed, rows = fit_icu(icu_csv, CHUNKSIZE, SKETCH_K)
+    assert rows == len(df)
+    pd.testing.assert_series_equal(pd.Series(streamed_medians)[cols], medians)
+    pd.testing.assert_series_equal(caps.lower_[cols], capper.lower_)
+    pd.testing.assert_series_equal(caps.upper_[cols], capper.upper_)
+    assert _scaler_error(scaler, streamed) <= SCALE_TOL